@@ -0,0 +1,149 @@
+# agg_cache.py
+# Bounded LRU cache untuk bundle agregat (DashAggregates) per filter state.
+# Satu instance di-share oleh semua session di server yang sama (st.cache_resource),
+# jadi view populer cukup dihitung sekali untuk semua orang. Miss yang bersamaan untuk
+# key yang sama digabung (single-flight): satu thread menghitung, sisanya menunggu hasilnya.
+
+import dataclasses
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_bytes(obj) -> int:
+    """Rough deep size of a cached value (DataFrames, arrays, dataclasses, containers)."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return sys.getsizeof(obj) + sum(estimate_bytes(getattr(obj, f.name))
+                                        for f in dataclasses.fields(obj))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class _Flight:
+    __slots__ = ("done", "value", "ok")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.ok = False
+
+
+class LRUCache:
+    """
+    Thread-safe LRU dengan dua batas: jumlah entry dan total byte.
+    Entry paling lama tidak dipakai dibuang lebih dulu.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 256 * 1024 * 1024,
+                 sizeof=estimate_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: OrderedDict = OrderedDict()   # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0                      # miss yang menunggu hasil thread lain
+        self._inflight: dict = {}               # key -> _Flight
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value) -> None:
+        nbytes = self._sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return                          # terlalu besar untuk di-cache
+            self._data[key] = (value, nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+        Selama satu thread menghitung `key`, thread lain dengan key yang sama menunggu
+        hasil itu (bukan menghitung ulang); kalau compute gagal, mereka menghitung sendiri.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        with self._lock:
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not owner:
+            flight.done.wait()
+            if flight.ok:
+                return flight.value
+            return compute()
+        # hitung di luar lock: session lain (key berbeda) tidak ikut tertahan
+        try:
+            value = compute()
+            self.put(key, value)
+            flight.value, flight.ok = value, True
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _evict(self) -> None:
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, nbytes) = self._data.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
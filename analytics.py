@@ -0,0 +1,481 @@
+# analytics.py
+# Lapisan analitik headless: filter -> agregat dashboard tanpa Streamlit.
+# - AnalyticsService : API Python (options / dashboard / users / leaderboard / date_range /
+#   daily_trend) di atas satu
+#   PartitionedDataset + satu LRUCache agregat. streamlit_app memakai satu instance untuk
+#   semua session (thin client), job BI / alert bisa memakai API yang sama.
+# - HTTP JSON endpoint lokal (stdlib ThreadingHTTPServer): /options, /dashboard, /users, /range,
+#   /trend, /health.
+#   Response (bytes JSON) di-cache per (data.version, path, query ter-normalisasi) + ETag/304.
+# Usage (optional): python analytics.py serve [--port 8765]
+#                   python analytics.py dashboard --period Monthly [--year 2025]
+#                   python analytics.py range --start 2025-11-01 --end 2025-12-15
+#                   python analytics.py trend --metric gmv --by category --points 300
+#                   curl 'localhost:8765/dashboard?period=Weekly&cats=Airtime,Data%20Bundle'
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from agg_cache import LRUCache
+from backends import BACKEND, make_backend
+from daily_totals import DailyTrend, RangeAggregates, range_aggregates
+from data_store import CSV_PATH, PartitionedDataset, open_dataset
+from engine import DashAggregates
+from leaderboard import SORT_COLUMNS, LeaderboardPage
+from timing import TIMING_LOG, SectionTimer, TimingSink
+
+PERIODS = ["Weekly", "Monthly", "Quarterly", "Yearly"]
+# filter waktu per tab (sama dengan render_dash): Weekly = year+month, Monthly/Quarterly = year
+TIME_FILTERS = {"Weekly": ("year", "month"), "Monthly": ("year",), "Quarterly": ("year",), "Yearly": ()}
+
+# batas cache agregat (di-share semua session / request di proses ini)
+AGG_CACHE_MAX_ENTRIES = int(os.environ.get("TXN_CACHE_MAX_ENTRIES", "128"))
+AGG_CACHE_MAX_MB      = float(os.environ.get("TXN_CACHE_MAX_MB", "256"))
+# HTTP endpoint: port 0 = tidak dijalankan dari streamlit_app (CLI serve default 8765)
+API_HOST              = os.environ.get("TXN_API_HOST", "127.0.0.1")
+API_PORT              = int(os.environ.get("TXN_API_PORT", "0"))
+API_CACHE_MAX_ENTRIES = int(os.environ.get("TXN_API_CACHE_MAX_ENTRIES", "512"))
+API_CACHE_MAX_MB      = float(os.environ.get("TXN_API_CACHE_MAX_MB", "64"))
+API_MAX_AGE           = int(os.environ.get("TXN_API_MAX_AGE", "30"))     # Cache-Control (detik)
+LEADERBOARD_PAGE      = int(os.environ.get("TXN_LEADERBOARD_PAGE", "200"))
+RANGE_DAYS            = int(os.environ.get("TXN_RANGE_DAYS", "45"))      # default tab Date Range
+# budget titik per trace trend harian (~1 titik per 2 px chart lebar penuh); downsampling LTTB
+TREND_POINTS          = int(os.environ.get("TXN_TREND_POINTS", "600"))
+
+
+def selection_key(sel: dict) -> tuple:
+    """Hashable, order-stable form of a filter selection (dipakai sebagai cache key)."""
+    return tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in sorted(sel.items()))
+
+
+def _records(frame: pd.DataFrame) -> list[dict]:
+    return frame.to_dict("records")
+
+
+def _json_default(v):
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, datetime.date):
+        return v.isoformat()
+    raise TypeError(f"{type(v).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    return json.dumps(obj, default=_json_default, separators=(",", ":")).encode()
+
+
+def dashboard_payload(agg: DashAggregates, sel: dict, version: int) -> dict:
+    """KPI / trend / mix / reliability / users satu tab sebagai dict siap JSON."""
+    return {
+        "period": agg.period,
+        "selection": sel,
+        "version": version,
+        "kpi": {"gmv": agg.gmv, "fee": agg.fee, "txns": agg.txns, "users": agg.users,
+                "users_error": agg.users_error},
+        "trend": _records(agg.trend),
+        "mix": {"category": _records(agg.cat), "region": _records(agg.reg)},
+        "reliability": {"status_by_category": _records(agg.sf),
+                        "failure_reasons": _records(agg.fr)},
+        "users": {"active": agg.users,
+                  "avg_gmv_per_user": agg.gmv / agg.users if agg.users > 0 else 0,
+                  "total_txns": agg.txns},
+    }
+
+
+def range_payload(agg: RangeAggregates, sel: dict, version: int) -> dict:
+    """KPI + breakdown category/channel/region satu rentang tanggal sebagai dict siap JSON."""
+    return {
+        "start": agg.start, "end": agg.end, "days": agg.days,
+        "selection": sel,
+        "version": version,
+        "kpi": {"gmv": agg.gmv, "fee": agg.fee, "txns": agg.txns, "success": agg.success,
+                "success_rate": agg.success_rate},
+        "mix": {"category": _records(agg.cat), "channel": _records(agg.ch),
+                "region": _records(agg.reg)},
+    }
+
+
+def trend_payload(trend: DailyTrend, by: str | None, sel: dict, version: int) -> dict:
+    """Satu entry per series: tanggal + nilai (hasil downsampling, siap digambar)."""
+    return {
+        "start": trend.start, "end": trend.end, "metric": trend.metric, "by": by,
+        "selection": sel,
+        "version": version,
+        "raw_points": trend.raw_points, "points": trend.points,
+        "series": [{"name": name,
+                    "date": [str(d) for d in g["date"].to_numpy().astype("datetime64[D]")],
+                    "value": g["value"].tolist()}
+                   for name, g in trend.frame.groupby("series", sort=False)],
+    }
+
+
+def leaderboard_payload(lb: LeaderboardPage, by: str, sel: dict, version: int) -> dict:
+    return {"selection": sel, "version": version, "by": by, "page": lb.page,
+            "n_pages": lb.n_pages, "total": lb.total, "start": lb.start,
+            "rows": _records(lb.rows)}
+
+
+class AnalyticsService:
+    """
+    Filter -> agregat tanpa UI. Aman dipakai banyak thread: hasil di-cache per
+    (period, data.version, filter) dan miss bersamaan untuk key yang sama dihitung sekali.
+    """
+
+    def __init__(self, data: PartitionedDataset, cache: LRUCache | None = None, watcher=None,
+                 backend: str = BACKEND):
+        self.data = data
+        self.backend = make_backend(data, backend)     # pandas (default) / duckdb, lihat backends.py
+        self.cache = cache or LRUCache(max_entries=AGG_CACHE_MAX_ENTRIES,
+                                       max_bytes=int(AGG_CACHE_MAX_MB * 1024 * 1024))
+        self.watcher = watcher                  # IngestWatcher opsional (poll per request)
+
+    # ---- filter ----
+    def options(self) -> dict:
+        """Pilihan filter dari cube (jauh lebih kecil dari baris mentah)."""
+        def _compute():
+            cube, daily = self.data.cube, self.data.daily
+            years = sorted(cube["year"].unique().tolist())
+            return {
+                "cats": sorted(cube["category"].unique().tolist()),
+                "chs": sorted(cube["channel"].unique().tolist()),
+                "regs": sorted(cube["region"].unique().tolist()),
+                "years": years,
+                "months": {y: sorted(cube.loc[cube["year"] == y, "month"].unique().tolist())
+                           for y in years},
+                "dates": [daily.first, daily.last],
+            }
+        return self.cache.get_or_compute(("options", self.data.version), _compute)
+
+    def default_selection(self, period: str) -> dict:
+        """Filter awal tab: semua dimensi, tahun (dan bulan) terakhir."""
+        opts = self.options()
+        sel = dict(cats=opts["cats"], chs=opts["chs"], regs=opts["regs"])
+        if "year" in TIME_FILTERS[period]:
+            sel["year"] = opts["years"][-1]
+        if "month" in TIME_FILTERS[period]:
+            sel["month"] = opts["months"][sel["year"]][-1]
+        return sel
+
+    def default_range(self, days: int = RANGE_DAYS) -> tuple[datetime.date, datetime.date]:
+        """`days` hari terakhir data (tab Date Range)."""
+        first, last = self.options()["dates"]
+        return max(first, last - datetime.timedelta(days=days - 1)), last
+
+    # ---- agregat ----
+    # data.version naik setiap ingest -> entry lama otomatis tidak terpakai lagi
+    def dashboard_key(self, period: str, sel: dict, exact_users: bool = True,
+                      version: int | None = None) -> tuple:
+        version = self.data.version if version is None else version
+        return (period, version, selection_key(sel), exact_users)
+
+    def users_key(self, sel: dict, version: int | None = None) -> tuple:
+        return ("users", self.data.version if version is None else version, selection_key(sel))
+
+    def dashboard(self, period: str, sel: dict, exact_users: bool = True,
+                  timer: SectionTimer | None = None) -> DashAggregates:
+        """Semua agregat satu tab; di-cache per (period, filter) supaya pindah tab kembali instan."""
+        return self.cache.get_or_compute(self.dashboard_key(period, sel, exact_users),
+                                         lambda: self.backend.dashboard(period, sel, exact_users, timer))
+
+    def users(self, sel: dict, timer: SectionTimer | None = None) -> pd.DataFrame:
+        """Per-user gmv/txns (tabel Users), di-cache terpisah dari KPI."""
+        return self.cache.get_or_compute(self.users_key(sel), lambda: self.backend.users(sel, timer))
+
+    def date_range(self, sel: dict, start: datetime.date, end: datetime.date,
+                   timer: SectionTimer | None = None) -> RangeAggregates:
+        """
+        Total rentang tanggal start..end (inklusif) dari prefix sum harian: dua lookup per
+        cell, berapa pun panjang rentangnya -> tidak perlu cache agregat.
+        """
+        daily, timer = self.data.daily, timer or SectionTimer()
+        with timer.section("prefix_sums", rows=len(daily.keys),
+                           note=f"{(end - start).days + 1} days"):
+            cells = daily.totals(self.data.categories, start=start, end=end, **sel)
+        with timer.section("range_aggregate", rows=len(cells)):
+            return range_aggregates(cells, start, end)
+
+    def daily_trend(self, sel: dict, start: datetime.date, end: datetime.date, metric: str = "gmv",
+                    by: str | None = None, points: int = TREND_POINTS,
+                    timer: SectionTimer | None = None) -> DailyTrend:
+        """
+        Trend harian start..end dari prefix sum, di-downsample LTTB ke `points` titik per series.
+        Jendela lebih sempit (zoom) -> lebih sedikit hari per bucket, sampai detail harian penuh.
+        """
+        daily, timer = self.data.daily, timer or SectionTimer()
+
+        def _compute():
+            with timer.section("daily_trend", note=f"{metric} by {by or 'all'}, LTTB {points}/series") as sec:
+                trend = daily.trend(self.data.categories, start=start, end=end, metric=metric,
+                                    by=by, points=points, **sel)
+                sec.rows = trend.raw_points
+                return trend
+        key = ("trend", self.data.version, selection_key(sel), start, end, metric, by, points)
+        return self.cache.get_or_compute(key, _compute)
+
+    def leaderboard(self, sel: dict, by: str = "gmv", page: int = 0,
+                    size: int = LEADERBOARD_PAGE) -> LeaderboardPage:
+        """Satu halaman top list dari backend (pandas: dari tabel Users ter-cache, duckdb: SQL)."""
+        key = ("leaderboard", self.data.version, selection_key(sel), by, int(page), int(size))
+        return self.cache.get_or_compute(
+            key, lambda: self.backend.leaderboard(sel, by, page, size, users=self.users))
+
+    def refresh(self) -> list:
+        """Cek file ingest baru (kalau ada watcher); data.version naik bila ada yang masuk."""
+        return self.watcher.poll() if self.watcher is not None else []
+
+    # ---- query string -> selection ----
+    def parse_selection(self, period: str, params: dict) -> dict:
+        """
+        Query params (nilai string) -> selection dengan bentuk yang sama seperti render_dash,
+        jadi request HTTP & session Streamlit berbagi entry cache yang sama.
+        cats/chs/regs dipisah koma (default semua); year/month default = terakhir.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"unknown period {period!r}; expected one of {PERIODS}")
+        opts, sel = self.options(), self._parse_dims(self.default_selection(period), params)
+        for col in ("year", "month"):
+            if params.get(col) is None:
+                continue
+            if col not in TIME_FILTERS[period]:
+                raise ValueError(f"{col} is not a filter of the {period} view")
+            try:
+                sel[col] = int(params[col])
+            except ValueError:
+                raise ValueError(f"{col} must be an integer, got {params[col]!r}") from None
+        if "month" in sel and params.get("year") is not None and params.get("month") is None:
+            sel["month"] = opts["months"].get(sel["year"], [sel["month"]])[-1]
+        return sel
+
+    def _parse_dims(self, sel: dict, params: dict) -> dict:
+        opts = self.options()
+        for dim in ("cats", "chs", "regs"):
+            if params.get(dim):
+                picked = params[dim].split(",")
+                unknown = sorted(set(picked) - set(opts[dim]))
+                if unknown:
+                    raise ValueError(f"unknown {dim}: {unknown}")
+                sel[dim] = [v for v in opts[dim] if v in picked]    # urutan kanonik
+        return sel
+
+    def parse_range(self, params: dict) -> tuple[dict, datetime.date, datetime.date]:
+        """start/end (YYYY-MM-DD, default RANGE_DAYS hari terakhir) + cats/chs/regs."""
+        sel = self._parse_dims(self.default_selection("Yearly"), params)
+        start, end = self.default_range()
+        try:
+            start = datetime.date.fromisoformat(params["start"]) if params.get("start") else start
+            end = datetime.date.fromisoformat(params["end"]) if params.get("end") else end
+        except ValueError:
+            raise ValueError("start and end must be dates (YYYY-MM-DD)") from None
+        if start > end:
+            raise ValueError(f"start {start} is after end {end}")
+        return sel, start, end
+
+    # ---- JSON ----
+    def dashboard_json(self, params: dict) -> dict:
+        period = params.get("period", "Monthly")
+        sel = self.parse_selection(period, params)
+        exact = params.get("exact", "1") not in ("0", "false")
+        return dashboard_payload(self.dashboard(period, sel, exact), sel, self.data.version)
+
+    def range_json(self, params: dict) -> dict:
+        sel, start, end = self.parse_range(params)
+        return range_payload(self.date_range(sel, start, end), sel, self.data.version)
+
+    def trend_json(self, params: dict) -> dict:
+        sel, start, end = self.parse_range(params)
+        by = params.get("by") or None
+        try:
+            points = int(params.get("points", TREND_POINTS))
+        except ValueError:
+            raise ValueError("points must be an integer") from None
+        if not 3 <= points <= 100_000:
+            raise ValueError("points must be between 3 and 100000")
+        trend = self.daily_trend(sel, start, end, params.get("metric", "gmv"), by, points)
+        return trend_payload(trend, by, sel, self.data.version)
+
+    def users_json(self, params: dict) -> dict:
+        sel = self.parse_selection(params.get("period", "Monthly"), params)
+        by = params.get("by", "gmv")
+        if by not in SORT_COLUMNS:
+            raise ValueError(f"cannot sort leaderboard by {by!r}; expected one of {SORT_COLUMNS}")
+        try:
+            page, size = int(params.get("page", 0)), int(params.get("size", LEADERBOARD_PAGE))
+        except ValueError:
+            raise ValueError("page and size must be integers") from None
+        if not 1 <= size <= 10_000:
+            raise ValueError("size must be between 1 and 10000")
+        return leaderboard_payload(self.leaderboard(sel, by, page, size), by, sel, self.data.version)
+
+
+# ---- HTTP ----
+class ResponseCache:
+    """Body JSON (bytes) + ETag per (data.version, route, query ter-normalisasi)."""
+
+    def __init__(self, max_entries: int = API_CACHE_MAX_ENTRIES,
+                 max_bytes: int = int(API_CACHE_MAX_MB * 1024 * 1024)):
+        self._lru = LRUCache(max_entries=max_entries, max_bytes=max_bytes,
+                             sizeof=lambda item: len(item[0]))
+
+    def get_or_render(self, key, render) -> tuple[bytes, str]:
+        def _render():
+            body = dumps(render())
+            return body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        return self._lru.get_or_compute(key, _render)
+
+    def stats(self) -> dict:
+        return self._lru.stats()
+
+
+ROUTES = {
+    "/options": lambda svc, params: {"version": svc.data.version, **svc.options()},
+    "/dashboard": AnalyticsService.dashboard_json,
+    "/users": AnalyticsService.users_json,
+    "/range": AnalyticsService.range_json,
+    "/trend": AnalyticsService.trend_json,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: AnalyticsService
+    response_cache: ResponseCache
+    sink: TimingSink | None = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            return self._send(200, dumps({"status": "ok", "version": self.service.data.version,
+                                          "aggregate_cache": self.service.cache.stats(),
+                                          "response_cache": self.response_cache.stats()}), cache=False)
+        route = ROUTES.get(url.path)
+        if route is None:
+            return self._send(404, dumps({"error": f"unknown path {url.path}"}), cache=False)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        timer = SectionTimer({"session": "api"})
+        try:
+            with timer.section(f"api{url.path}") as sec:
+                self.service.refresh()
+                key = (self.service.data.version, url.path, tuple(sorted(params.items())))
+                body, etag = self.response_cache.get_or_render(key, lambda: route(self.service, params))
+                sec.rows, sec.note = len(body), url.query
+        except ValueError as e:
+            return self._send(400, dumps({"error": str(e)}), cache=False)
+        if self.sink is not None:
+            self.sink.write(timer.records())
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", etag=etag)
+        self._send(200, body, etag=etag)
+
+    def _send(self, status: int, body: bytes, etag: str | None = None, cache: bool = True):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", f"max-age={API_MAX_AGE}" if cache else "no-store")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass                                    # latency per request -> TXN_TIMING_LOG
+
+
+def make_server(service: AnalyticsService, host: str = API_HOST, port: int = 8765,
+                responses: ResponseCache | None = None) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {
+        "service": service,
+        "response_cache": responses or ResponseCache(),
+        "sink": TimingSink(TIMING_LOG) if TIMING_LOG else None,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(service: AnalyticsService, host: str = API_HOST,
+                 port: int = 8765) -> ThreadingHTTPServer:
+    """Jalankan endpoint di thread background (mis. di dalam proses Streamlit)."""
+    server = make_server(service, host, port)
+    threading.Thread(target=server.serve_forever, name="analytics-api", daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Headless dashboard aggregates (Python API / HTTP JSON)")
+    ap.add_argument("--source", default=CSV_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    srv = sub.add_parser("serve", help="local HTTP JSON endpoint")
+    srv.add_argument("--host", default=API_HOST)
+    srv.add_argument("--port", type=int, default=API_PORT or 8765)
+    srv.add_argument("--watch", type=float, default=0,
+                     help="poll drop dir ingest paling sering tiap N detik (0 = mati)")
+    srv.add_argument("--warmup", choices=["off", "default", "all"], default="default",
+                     help="precompute view default sebelum menerima request (lihat warmup.py)")
+    sub.add_parser("options")
+    for name in ("dashboard", "users"):
+        p = sub.add_parser(name)
+        p.add_argument("--period", default="Monthly", choices=PERIODS)
+        for opt in ("year", "month", "cats", "chs", "regs"):
+            p.add_argument(f"--{opt}")
+        if name == "dashboard":
+            p.add_argument("--approx-users", action="store_true")
+        else:
+            p.add_argument("--by", default="gmv", choices=SORT_COLUMNS)
+            p.add_argument("--page", default="0")
+            p.add_argument("--size", default=str(LEADERBOARD_PAGE))
+    for name in ("range", "trend"):
+        p = sub.add_parser(name, help="total / trend harian rentang tanggal (prefix sum harian)")
+        for opt in ("start", "end", "cats", "chs", "regs"):
+            p.add_argument(f"--{opt}")
+        if name == "trend":
+            p.add_argument("--metric", default="gmv")
+            p.add_argument("--by")
+            p.add_argument("--points", default=str(TREND_POINTS))
+    args = ap.parse_args()
+
+    data = open_dataset(args.source)
+    if args.cmd == "serve":
+        watcher = None
+        if args.watch:
+            from ingest import IngestWatcher
+            watcher = IngestWatcher(data, interval=args.watch)
+        svc = AnalyticsService(data, watcher=watcher)
+        if args.warmup != "off":
+            from warmup import warm_cache
+            print(f"warm-up: {warm_cache(svc, args.warmup)}", file=sys.stderr)
+        server = make_server(svc, args.host, args.port)
+        print(f"serving dashboard aggregates on http://{args.host}:{server.server_port}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return
+
+    svc = AnalyticsService(data)
+    params = {k: v for k, v in vars(args).items()
+              if k not in ("source", "cmd", "approx_users") and v is not None}
+    if args.cmd == "options":
+        out = svc.options()
+    elif args.cmd == "dashboard":
+        out = svc.dashboard_json({**params, "exact": "0" if args.approx_users else "1"})
+    elif args.cmd == "range":
+        out = svc.range_json(params)
+    elif args.cmd == "trend":
+        out = svc.trend_json(params)
+    else:
+        out = svc.users_json(params)
+    sys.stdout.write(json.dumps(out, default=_json_default, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# backends.py
+# Backend query dashboard yang bisa ditukar (TXN_BACKEND), dipakai AnalyticsService:
+# - "pandas" (default): cube + user index/HLL + per-user partials di memori proses (engine.py)
+# - "duckdb": filter + group by dijalankan DuckDB (embedded, kolumnar, multi-thread) langsung
+#   di atas file Parquet partisi (hanya partisi hasil pruning year/month yang dibaca), tanpa
+#   memuat baris ke DataFrame. Hasil group by = sel kecil (period x category x region x status
+#   x failure_reason) yang direduksi oleh engine.aggregate yang sama -> label, urutan dan bentuk
+#   frame identik dengan backend pandas. Butuh `pip install duckdb` (opsional).
+# Parity + throughput: python benchmarks/bench_backends.py
+
+import dataclasses
+import os
+
+import pandas as pd
+
+from cube import filter_frame
+from data_store import PartitionedDataset, _part_files, apply_schema, partition_path
+from engine import PERIOD_KEY, DashAggregates, aggregate, aggregate_users
+from leaderboard import SORT_COLUMNS, LeaderboardPage, leaderboard_page
+from timing import SectionTimer
+
+BACKEND         = os.environ.get("TXN_BACKEND", "pandas")
+DUCKDB_THREADS  = int(os.environ.get("TXN_DUCKDB_THREADS", "0"))     # 0 = jumlah CPU
+DUCKDB_MEMORY   = os.environ.get("TXN_DUCKDB_MEMORY", "")           # mis. "2GB" (kosong = default)
+
+
+class PandasBackend:
+    """Agregat dari cube & index in-memory (perilaku asli dashboard)."""
+    name = "pandas"
+
+    def __init__(self, data: PartitionedDataset):
+        self.data = data
+
+    def dashboard(self, period: str, sel: dict, exact_users: bool = True,
+                  timer: SectionTimer | None = None) -> DashAggregates:
+        data, timer = self.data, timer or SectionTimer()
+        with timer.section("filter", rows=len(data.cube)):
+            cube_f = filter_frame(data.cube, **sel)
+        with timer.section("aggregate", rows=len(cube_f)):
+            agg = aggregate(cube_f, period)
+        # distinct users tanpa menyentuh baris mentah:
+        # exact = union bitmap user_id per cell, approx = merge sketch HLL
+        with timer.section("distinct_users", rows=len(cube_f),
+                           note="exact index" if exact_users else "HLL"):
+            return _with_users(data, agg, sel, exact_users)
+
+    def users(self, sel: dict, timer: SectionTimer | None = None) -> pd.DataFrame:
+        timer = timer or SectionTimer()
+        with timer.section("read_partials") as sec:
+            partials = self.data.select_user_partials(**sel)
+            sec.rows = len(partials)
+        with timer.section("merge_users", rows=len(partials)):
+            return aggregate_users(partials)
+
+    def leaderboard(self, sel: dict, by: str = "gmv", page: int = 0, size: int = 200,
+                    users=None) -> LeaderboardPage:
+        """Top-K dari tabel per-user; `users(sel)` = sumber tabel itu (service: versi ter-cache)."""
+        return leaderboard_page((users or self.users)(sel), by=by, page=page, size=size)
+
+
+def _with_users(data: PartitionedDataset, agg: DashAggregates, sel: dict,
+                exact_users: bool) -> DashAggregates:
+    if exact_users:
+        return dataclasses.replace(agg, users=data.user_index.count(data.categories, **sel))
+    est = data.user_hll.estimate(data.categories, **sel)
+    return dataclasses.replace(agg, users=est.value, users_error=est.rel_error)
+
+
+class DuckDBBackend:
+    """
+    Query SQL di atas Parquet partisi. Satu koneksi per backend; tiap query memakai
+    cursor sendiri (aman dipanggil dari banyak thread / session).
+    """
+    name = "duckdb"
+
+    def __init__(self, data: PartitionedDataset, threads: int = DUCKDB_THREADS,
+                 memory_limit: str = DUCKDB_MEMORY):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("TXN_BACKEND=duckdb needs the duckdb package (pip install duckdb)") from e
+        self.data = data
+        self._con = duckdb.connect()
+        self._con.execute(f"SET threads = {int(threads or os.cpu_count() or 1)}")
+        if memory_limit:
+            self._con.execute("SET memory_limit = ?", [memory_limit])
+
+    def _files(self, sel: dict) -> list[str]:
+        """Partition pruning year/month sama seperti PartitionedDataset (part-0..N per partisi)."""
+        return [f for y, m in self.data.prune(sel.get("year"), sel.get("month"))
+                for f in _part_files(partition_path(self.data.root, y, m))]
+
+    def _query(self, select: str, sel: dict, tail: str = "") -> pd.DataFrame | None:
+        files = self._files(sel)
+        if not files:
+            return None
+        sql = (f"SELECT {select} FROM read_parquet($files, union_by_name = true) "
+               "WHERE list_contains($cats, category) AND list_contains($chs, channel) "
+               f"AND list_contains($regs, region) {tail}")
+        params = {"files": files, "cats": list(sel["cats"]), "chs": list(sel["chs"]),
+                  "regs": list(sel["regs"])}
+        return self._con.cursor().execute(sql, params).df()
+
+    def cells(self, period: str, sel: dict) -> pd.DataFrame:
+        """Sel period x category x region x status x failure_reason (kolom seperti cube)."""
+        key = PERIOD_KEY[period]
+        cells = self._query(
+            f"{key}, category, region, status, coalesce(failure_reason, '') AS failure_reason, "
+            "sum(amount) AS amount, sum(fee_amount) AS fee_amount, count(*) AS txns",
+            sel, "GROUP BY ALL")
+        if cells is None or cells.empty:
+            return pd.DataFrame()
+        # kategori global (urutan kode = cube) supaya urutan baris hasil aggregate sama
+        return apply_schema(cells, categories=self.data.categories)
+
+    def dashboard(self, period: str, sel: dict, exact_users: bool = True,
+                  timer: SectionTimer | None = None) -> DashAggregates:
+        timer = timer or SectionTimer()
+        with timer.section("sql/cells", note="duckdb") as sec:
+            cells = self.cells(period, sel)
+            sec.rows = len(cells)
+        with timer.section("aggregate", rows=len(cells)):
+            agg = aggregate(cells, period)
+        if agg.empty:
+            return agg
+        if not exact_users:
+            with timer.section("distinct_users", note="HLL"):
+                return _with_users(self.data, agg, sel, exact_users=False)
+        with timer.section("sql/distinct_users", note="duckdb"):
+            users = self._query("count(DISTINCT user_id) AS users", sel)
+            return dataclasses.replace(agg, users=int(users["users"].iloc[0]))
+
+    def users(self, sel: dict, timer: SectionTimer | None = None) -> pd.DataFrame:
+        timer = timer or SectionTimer()
+        with timer.section("sql/users", note="duckdb") as sec:
+            per_user = self._query("user_id, sum(amount) AS gmv, count(*) AS txns", sel,
+                                   "GROUP BY user_id ORDER BY user_id")
+            if per_user is None or per_user.empty:
+                return aggregate_users(None)
+            sec.rows = len(per_user)
+            return per_user.astype({"user_id": "int64", "gmv": "float64", "txns": "int64"})
+
+    def leaderboard(self, sel: dict, by: str = "gmv", page: int = 0, size: int = 200,
+                    users=None) -> LeaderboardPage:
+        """
+        Top list langsung di SQL (ORDER BY .. LIMIT/OFFSET), tie -> user_id naik.
+        `users` diabaikan: hanya satu halaman yang dibaca, bukan tabel per-user penuh.
+        """
+        if by not in SORT_COLUMNS:
+            raise ValueError(f"cannot sort leaderboard by {by!r}; expected one of {SORT_COLUMNS}")
+        total = self._query("count(DISTINCT user_id) AS n", sel)
+        total = int(total["n"].iloc[0]) if total is not None else 0
+        n_pages = max((total + size - 1) // size, 1)
+        page = min(max(int(page), 0), n_pages - 1)
+        rows = self._query("user_id, sum(amount) AS gmv, count(*) AS txns", sel,
+                           f"GROUP BY user_id ORDER BY {by} DESC, user_id "
+                           f"LIMIT {int(size)} OFFSET {page * int(size)}")
+        rows = aggregate_users(None) if rows is None else rows.astype(
+            {"user_id": "int64", "gmv": "float64", "txns": "int64"})
+        return LeaderboardPage(rows, page, n_pages, total, page * size)
+
+
+BACKENDS = {"pandas": PandasBackend, "duckdb": DuckDBBackend}
+
+
+def make_backend(data: PartitionedDataset, name: str = BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name!r}; expected one of {list(BACKENDS)}")
+    return BACKENDS[name](data)
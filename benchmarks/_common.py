@@ -0,0 +1,24 @@
+# _common.py
+# Helper bersama script benchmark: parsing jumlah baris dari argumen dan timing best-of-N.
+
+import time
+
+
+def parse_rows(text: str) -> list[int]:
+    """'1M,10M,160k' -> [1_000_000, 10_000_000, 160_000]"""
+    mult = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+    out = []
+    for tok in text.split(","):
+        tok = tok.strip().lower()
+        out.append(int(float(tok[:-1]) * mult[tok[-1]]) if tok[-1] in mult else int(tok))
+    return out
+
+
+def best_of(fn, repeat: int) -> float:
+    """Waktu terbaik (detik) dari `repeat` kali menjalankan fn()."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
@@ -0,0 +1,132 @@
+# bench_backends.py
+# Parity check + throughput: backend pandas (cube / index in-memory) vs duckdb (SQL di atas
+# Parquet partisi). Query yang dibandingkan = yang dipakai dashboard: KPI, trend per period,
+# mix category & region, success/failed, failure reasons, distinct users, tabel per-user dan
+# top list (leaderboard). Keluar dengan status 1 kalau ada hasil yang berbeda.
+# Usage: python benchmarks/bench_backends.py [--source DIR|CSV] [--random 40] [--repeat 3]
+
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from _common import best_of                                           # noqa: E402
+from analytics import TIME_FILTERS, AnalyticsService                  # noqa: E402
+from backends import BACKENDS                                         # noqa: E402
+from data_store import CACHE_DIR, CSV_PATH, open_dataset              # noqa: E402
+
+FRAMES = ["trend", "cat", "reg", "sf", "fr"]
+RTOL = 1e-9                                     # urutan penjumlahan float beda antar engine
+
+
+def selections(svc: AnalyticsService, n_random: int, seed: int = 11) -> list[tuple[str, dict]]:
+    """View default tiap tab + subset acak dimensi & waktu (termasuk seleksi kosong)."""
+    rng = random.Random(seed)
+    opts = svc.options()
+    out = [(p, svc.default_selection(p)) for p in TIME_FILTERS]
+    out.append(("Yearly", dict(svc.default_selection("Yearly"), cats=[])))
+    for _ in range(n_random):
+        period = rng.choice(list(TIME_FILTERS))
+        sel = {dim: sorted(rng.sample(opts[dim], rng.randint(1, len(opts[dim]))))
+               for dim in ("cats", "chs", "regs")}
+        if TIME_FILTERS[period]:
+            sel["year"] = rng.choice(opts["years"])
+        if "month" in TIME_FILTERS[period]:
+            sel["month"] = rng.choice(opts["months"][sel["year"]])
+        out.append((period, sel))
+    return out
+
+
+def _frames_equal(a: pd.DataFrame, b: pd.DataFrame) -> str:
+    if a.empty and b.empty:
+        return ""
+    try:
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True),
+                                      check_exact=False, rtol=RTOL, check_dtype=False,
+                                      check_categorical=False)
+    except AssertionError as e:
+        return str(e).splitlines()[0]
+    return ""
+
+
+def compare(base: AnalyticsService, other: AnalyticsService, period: str, sel: dict) -> list[str]:
+    """Bandingkan lewat AnalyticsService (jalur yang dipakai dashboard & API), beda backend."""
+    bad = []
+    a, b = base.dashboard(period, sel), other.dashboard(period, sel)
+    for f in ("txns", "users"):
+        if getattr(a, f) != getattr(b, f):
+            bad.append(f"{f}: {getattr(a, f)} != {getattr(b, f)}")
+    for f in ("gmv", "fee"):
+        if not np.isclose(getattr(a, f), getattr(b, f), rtol=RTOL, atol=0):
+            bad.append(f"{f}: {getattr(a, f)} != {getattr(b, f)}")
+    for f in FRAMES:
+        if err := _frames_equal(getattr(a, f), getattr(b, f)):
+            bad.append(f"{f}: {err}")
+    if err := _frames_equal(base.users(sel), other.users(sel)):
+        bad.append(f"users table: {err}")
+    for by in ("gmv", "txns"):
+        la, lb = base.leaderboard(sel, by, page=1, size=50), other.leaderboard(sel, by, page=1, size=50)
+        if (la.total, la.page, la.n_pages, la.start) != (lb.total, lb.page, lb.n_pages, lb.start):
+            bad.append(f"leaderboard/{by} paging differs")
+        elif err := _frames_equal(la.rows, lb.rows):
+            bad.append(f"leaderboard/{by}: {err}")
+    return bad
+
+
+def throughput(backend, views: list, repeat: int) -> dict:
+    """Query per detik (tanpa cache AnalyticsService) untuk tiap jenis kerja render."""
+    out = {}
+    jobs = {
+        "dashboard": lambda p, s: backend.dashboard(p, s),
+        "users": lambda p, s: backend.users(s),
+        "leaderboard": lambda p, s: backend.leaderboard(s, "gmv", 0, 200),
+    }
+    for name, job in jobs.items():
+        best = best_of(lambda: [job(period, sel) for period, sel in views], repeat)
+        out[name] = len(views) / best
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="pandas vs duckdb dashboard backends")
+    ap.add_argument("--source", default=CSV_PATH)
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--random", type=int, default=40, help="jumlah seleksi acak untuk parity")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--backends", default=",".join(BACKENDS))
+    args = ap.parse_args()
+
+    data = open_dataset(args.source, args.cache_dir)
+    names = args.backends.split(",")
+    services = {n: AnalyticsService(data, backend=n) for n in names}
+    views = selections(services[names[0]], args.random)
+
+    failures = 0
+    base = services[names[0]]
+    for name in names[1:]:
+        print(f"parity {names[0]} vs {name}: {len(views)} selections")
+        for period, sel in views:
+            bad = compare(base, services[name], period, sel)
+            if bad:
+                failures += 1
+                desc = {k: (v if not isinstance(v, list) else len(v)) for k, v in sel.items()}
+                print(f"  MISMATCH {period} {desc}: {bad[:3]}")
+        print(f"  {'ok' if not failures else f'{failures} selections differ'}")
+
+    defaults = views[:len(TIME_FILTERS)]
+    print(f"\nthroughput ({data.rows:,} rows, default view per tab, queries/s, best of {args.repeat})")
+    print(f"{'backend':>10} {'dashboard':>10} {'users':>10} {'leaderboard':>12}")
+    for name, svc in services.items():
+        q = throughput(svc.backend, defaults, args.repeat)
+        print(f"{name:>10} {q['dashboard']:>10.2f} {q['users']:>10.2f} {q['leaderboard']:>12.2f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
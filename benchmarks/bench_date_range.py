@@ -0,0 +1,113 @@
+# bench_date_range.py
+# Tab Date Range: total rentang tanggal dari prefix sum harian (daily_totals.py) vs scan baris
+# mentah (filter tanggal + dimensi, lalu sum). Parity untuk rentang & seleksi acak (KPI +
+# breakdown category/channel/region), lalu latency per query kedua cara untuk beberapa
+# panjang rentang. Keluar dengan status 1 kalau ada hasil yang berbeda.
+# Usage: python benchmarks/bench_date_range.py [--source DIR|CSV] [--random 40] [--repeat 5]
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from _common import best_of                                           # noqa: E402
+from analytics import AnalyticsService                                # noqa: E402
+from daily_totals import RangeAggregates, range_aggregates            # noqa: E402
+from data_store import CACHE_DIR, CSV_PATH, open_dataset              # noqa: E402
+
+RTOL = 1e-9
+LENGTHS = [1, 7, 45, 365, None]                 # None = seluruh histori
+
+
+def scan_range(rows: pd.DataFrame, sel: dict, start, end) -> RangeAggregates:
+    """Referensi: filter baris mentah lalu jumlahkan per cell (tanpa prefix sum)."""
+    day = rows["date"].to_numpy().astype("datetime64[D]")
+    mask = ((day >= np.datetime64(start)) & (day <= np.datetime64(end))
+            & rows["category"].isin(sel["cats"]).to_numpy()
+            & rows["channel"].isin(sel["chs"]).to_numpy()
+            & rows["region"].isin(sel["regs"]).to_numpy())
+    r = rows[mask]
+    cells = (r.assign(success=(r["status"] == "SUCCESS").astype(np.int64))
+              .groupby(["category", "channel", "region"], observed=True)
+              .agg(gmv=("amount", "sum"), fee=("fee_amount", "sum"),
+                   txns=("amount", "size"), success=("success", "sum"))
+              .reset_index())
+    return range_aggregates(cells, start, end)
+
+
+def ranges(svc: AnalyticsService, n_random: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    opts = svc.options()
+    first, last = opts["dates"]
+    span = (last - first).days + 1
+    out = [(svc.default_selection("Yearly"), *svc.default_range())]
+    for _ in range(n_random):
+        n = rng.choice(LENGTHS) or span
+        start = first + datetime.timedelta(days=rng.randrange(max(span - n + 1, 1)))
+        end = min(start + datetime.timedelta(days=n - 1), last)
+        sel = {dim: sorted(rng.sample(opts[dim], rng.randint(1, len(opts[dim]))))
+               for dim in ("cats", "chs", "regs")}
+        out.append((sel, start, end))
+    return out
+
+
+def compare(a: RangeAggregates, b: RangeAggregates) -> list[str]:
+    bad = [f for f in ("txns", "success") if getattr(a, f) != getattr(b, f)]
+    bad += [f for f in ("gmv", "fee") if not np.isclose(getattr(a, f), getattr(b, f), rtol=RTOL, atol=1e-6)]
+    for f in ("cat", "ch", "reg"):
+        try:
+            pd.testing.assert_frame_equal(getattr(a, f), getattr(b, f), check_exact=False,
+                                          rtol=RTOL, check_dtype=False)
+        except AssertionError as e:
+            bad.append(f"{f}: {str(e).splitlines()[0]}")
+    return bad
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Date-range totals: daily prefix sums vs row scan")
+    ap.add_argument("--source", default=CSV_PATH)
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--random", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    data = open_dataset(args.source, args.cache_dir)
+    svc = AnalyticsService(data)
+    t0 = time.perf_counter()
+    rows = data.scan()
+    print(f"{data.rows:,} rows, scan {time.perf_counter() - t0:,.1f} s · daily prefix sums "
+          f"{data.daily.n_days:,} days x {len(data.daily.keys)} cells ({data.daily.nbytes / 1e6:,.1f} MB)")
+
+    views = ranges(svc, args.random)
+    failures = 0
+    for sel, start, end in views:
+        bad = compare(svc.date_range(sel, start, end), scan_range(rows, sel, start, end))
+        if bad:
+            failures += 1
+            desc = {k: len(v) for k, v in sel.items()}
+            print(f"  MISMATCH {start}..{end} {desc}: {bad[:3]}")
+    print(f"parity prefix sums vs row scan: {len(views)} ranges, "
+          f"{'ok' if not failures else f'{failures} differ'}")
+
+    first, last = svc.options()["dates"]
+    sel = svc.default_selection("Yearly")
+    print(f"\nlatency per query (ms, best of {args.repeat}, semua dimensi)")
+    print(f"{'days':>8} {'prefix':>10} {'row scan':>10} {'speedup':>9}")
+    for n in LENGTHS:
+        start = first if n is None else max(first, last - datetime.timedelta(days=n - 1))
+        p = best_of(lambda: svc.date_range(sel, start, last), args.repeat) * 1000
+        s = best_of(lambda: scan_range(rows, sel, start, last), args.repeat) * 1000
+        print(f"{(last - start).days + 1:>8,} {p:>10.2f} {s:>10.1f} {s / p:>8.0f}x")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
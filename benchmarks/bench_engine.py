@@ -0,0 +1,123 @@
+# bench_engine.py
+# Benchmark: per-chart groupbys (kode lama render_dash) vs fused engine (engine.aggregate).
+# Usage: python benchmarks/bench_engine.py [--rows 1M,10M,50M] [--repeat 3]
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import create_data_dummy as gen                      # noqa: E402
+from _common import best_of, parse_rows              # noqa: E402
+from cube import build_cube                          # noqa: E402
+from engine import MONTH_NAMES, aggregate            # noqa: E402
+
+PERIODS = ["Weekly", "Monthly", "Quarterly", "Yearly"]
+
+
+def make_frame(n: int, seed: int = gen.SEED) -> pd.DataFrame:
+    """Synthetic frame in the compact schema, built from codes (cheap at 50M rows)."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(f"{gen.START_YEAR}-01-01",
+                         f"{gen.START_YEAR + gen.N_YEARS - 1}-12-31", freq="D")
+    d = rng.integers(0, len(days), size=n)
+
+    def pick(items):
+        labels, probs = gen._weighted_choice(rng, items)
+        codes = rng.choice(len(labels), size=n, p=probs).astype(np.int8)
+        order = np.argsort(labels)
+        remap = np.empty(len(labels), np.int8)
+        remap[order] = np.arange(len(labels))
+        return pd.Categorical.from_codes(remap[codes], sorted(labels))
+
+    failed = rng.random(n) < gen.FAILED_RATE
+    fr_labels, fr_probs = gen._weighted_choice(rng, gen.FAILURE_REASONS)
+    fr_cats = [""] + sorted(fr_labels)
+    fr_codes = np.zeros(n, np.int8)
+    fr_codes[failed] = 1 + rng.choice(len(fr_labels), size=int(failed.sum()), p=fr_probs)
+    fr_remap = np.array([0] + [1 + sorted(fr_labels).index(l) for l in fr_labels], np.int8)
+
+    amount = np.clip(np.exp(rng.normal(10.2, 0.9, size=n)), 5_000, None).round(0)
+    return pd.DataFrame({
+        "date": days.values[d],
+        "category": pick(gen.CATEGORIES),
+        "channel": pick(gen.CHANNELS),
+        "region": pick(gen.REGIONS),
+        "user_id": rng.integers(10_000, 19_999, size=n, dtype=np.int32),
+        "amount": amount,
+        "fee_amount": (amount * rng.uniform(0.018, 0.031, size=n)).round(2),
+        "status": pd.Categorical.from_codes((~failed).astype(np.int8), ["FAILED", "SUCCESS"]),
+        "failure_reason": pd.Categorical.from_codes(np.where(failed, fr_remap[fr_codes], 0), fr_cats),
+        "year": days.year.values[d].astype(np.int16),
+        "month": days.month.values[d].astype(np.int8),
+        "week": days.isocalendar().week.values[d].astype(np.int8),
+        "quarter": days.quarter.values[d].astype(np.int8),
+    })
+
+
+# ---- kode lama (sebelum engine): satu groupby per chart, lambda di agg ----
+def legacy_agg_trend(dff, period):
+    key = {"Weekly": "week", "Monthly": "month", "Quarterly": "quarter", "Yearly": "year"}[period]
+    g = (dff.groupby(key)
+            .agg(GMV=("amount", "sum"),
+                 Fee=("fee_amount", "sum"),
+                 Txn=("amount", "size"),
+                 success=("status", lambda s: (s == "SUCCESS").mean()))
+         ).reset_index().sort_values(key)
+    if period == "Monthly":
+        g["Period"] = g["month"].map(MONTH_NAMES)
+    return g
+
+
+def legacy_dashboard(dff, period):
+    out = {
+        "gmv": dff["amount"].sum(),
+        "fee": dff["fee_amount"].sum(),
+        "users": dff["user_id"].nunique(),
+        "txns": len(dff),
+        "trend": legacy_agg_trend(dff, period),
+    }
+    out["cat"] = (dff.groupby("category", observed=True)
+                     .agg(transactions=("amount", "size"), gmv=("amount", "sum"), fee=("fee_amount", "sum"))
+                     .reset_index().sort_values("transactions", ascending=False))
+    out["reg"] = dff.groupby("region", observed=True).agg(transactions=("amount", "size")).reset_index()
+    out["sf"] = dff.groupby(["category", "status"], observed=True).size().reset_index(name="count")
+    failed = dff[dff["status"].eq("FAILED")]
+    out["fr"] = failed.groupby("failure_reason", observed=True).size().sort_values(ascending=False)
+    out["per_user"] = (dff.groupby("user_id")
+                          .agg(gmv=("amount", "sum"), txns=("amount", "size")).reset_index())
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Legacy groupbys vs fused engine")
+    ap.add_argument("--rows", default="1M,10M,50M")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'rows':>12} {'period':>10} {'legacy_s':>10} {'engine_s':>10} {'speedup':>8} "
+          f"{'cube+users_s':>13} {'speedup':>8}")
+    for n in parse_rows(args.rows):
+        df = make_frame(n)
+        cube = build_cube(df)
+        for period in PERIODS:
+            # sanity: hasil engine == kode lama
+            ref, agg = legacy_dashboard(df, period), aggregate(df, period, rows=df)
+            assert ref["txns"] == agg.txns and ref["users"] == agg.users
+            assert np.isclose(ref["gmv"], agg.gmv)
+
+            t_old = best_of(lambda: legacy_dashboard(df, period), args.repeat)
+            t_eng = best_of(lambda: aggregate(df, period, rows=df), args.repeat)
+            t_cub = best_of(lambda: aggregate(cube, period, rows=df), args.repeat)
+            print(f"{n:>12,} {period:>10} {t_old:>10.3f} {t_eng:>10.3f} {t_old / t_eng:>7.1f}x "
+                  f"{t_cub:>13.3f} {t_old / t_cub:>7.1f}x")
+        del df, cube
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_format.py
+# Equivalence check + microbenchmark: number_format skalar (.apply / list comprehension)
+# vs versi vektor (*_array). Keluar dengan status 1 kalau ada output yang berbeda.
+# Usage: python benchmarks/bench_format.py [--sizes 200,10k,1M] [--repeat 5]
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from _common import best_of, parse_rows                                   # noqa: E402
+from number_format import (fmt_en, fmt_en_array, fmt_int, fmt_int_array,   # noqa: E402
+                           fmt_rp, fmt_rp_array, fmt_short, fmt_short_array)
+
+PAIRS = [
+    ("fmt_en", fmt_en, fmt_en_array),
+    ("fmt_rp", fmt_rp, fmt_rp_array),
+    ("fmt_short", fmt_short, fmt_short_array),
+    ("fmt_int", fmt_int, fmt_int_array),
+]
+
+# kasus tepi: pembulatan .5 sen, batas suffix, nol bertanda, non-finite, sangat besar
+EDGE_CASES = [0.0, -0.0, 0.004, -0.004, 0.005, -0.005, 0.125, -0.125, 0.375, 1234.625,
+              1.005, 2.675, 0.1, 10.0,
+              999.995, 999.999, 1e3, 999_999.995, 1e6, 1e9, 1e12, 1e15, 9.99e17,
+              -1234.5, -1e6, np.nan, np.inf, -np.inf, 1e19, -1e19]
+
+
+def sample_values(n: int, seed: int = 7) -> np.ndarray:
+    """Campuran nilai seperti di dashboard: amount (2 desimal), total besar, pecahan kecil."""
+    rng = np.random.default_rng(seed)
+    k = n // 4
+    return np.concatenate([
+        np.round(rng.uniform(1_000, 5_000_000, k), 2),                 # amount / gmv per user
+        rng.random(k) * 10.0 ** rng.integers(-3, 14, k),                # skala acak
+        rng.integers(0, 10_000_000, k).astype(np.float64),              # nilai bulat
+        (rng.integers(-80_000, 80_000, n - 3 * k) / 8.0),               # tie .5 sen (x/8)
+    ])
+
+
+def check_equivalence(values: np.ndarray) -> int:
+    failures = 0
+    for name, scalar, vector in PAIRS:
+        got = vector(values)
+        exp = [scalar(v) for v in values]
+        bad = [(v, g, e) for v, g, e in zip(values, got, exp) if g != e]
+        status = "ok" if not bad else f"{len(bad)} MISMATCH, e.g. {bad[:3]}"
+        print(f"  {name:<10} {len(values):>10,} values  {status}")
+        failures += len(bad)
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scalar vs vectorized number formatting")
+    ap.add_argument("--sizes", default="200,10k,1M")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print("equivalence:")
+    # diulang supaya melewati ambang _MIN_VECTOR (jalur vektor, bukan loop skalar)
+    failures = check_equivalence(np.tile(EDGE_CASES, 8))
+    failures += check_equivalence(sample_values(200_000))
+    ints = np.random.default_rng(3).integers(-10**12, 10**12, 100_000)
+    bad = sum(a != fmt_int(b) for a, b in zip(fmt_int_array(ints), ints))
+    print(f"  {'fmt_int':<10} {len(ints):>10,} int64     {'ok' if not bad else f'{bad} MISMATCH'}")
+    failures += bad
+
+    print(f"\n{'size':>10} {'func':>10} {'apply_ms':>10} {'array_ms':>10} {'speedup':>8}")
+    for n in parse_rows(args.sizes):
+        s = pd.Series(sample_values(n))
+        for name, scalar, vector in PAIRS:
+            t_apply = best_of(lambda: s.apply(scalar), args.repeat)
+            t_array = best_of(lambda: vector(s), args.repeat)
+            print(f"{n:>10,} {name:>10} {t_apply * 1000:>10.2f} {t_array * 1000:>10.2f} "
+                  f"{t_apply / t_array:>7.1f}x")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
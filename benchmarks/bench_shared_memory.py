@@ -0,0 +1,80 @@
+# bench_shared_memory.py
+# Memori N proses server yang memegang dataset yang sama: TXN_MMAP=1 (sidecar .arrow
+# memory-mapped, page di-share) vs TXN_MMAP=0 (tiap proses punya salinan privat).
+# Tiap worker membuka dataset, memuat semua partisi + per-user partials + cube lalu menyentuh
+# semua kolom; setelah semua siap, laporan smaps (resident / shared / PSS) per worker dicetak.
+# Usage: python benchmarks/bench_shared_memory.py [--workers 3] [--source data/transactions_dummy.csv]
+
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_store import CACHE_DIR, CSV_PATH                            # noqa: E402
+from proc_memory import report_frame                                 # noqa: E402
+
+
+def _touch(frame: pd.DataFrame) -> None:
+    for c in frame.columns:
+        arr = frame[c].array
+        np.asarray(getattr(arr, "codes", arr)).view(np.uint8).sum()
+
+
+def worker(source: str, cache_dir: str) -> None:
+    from data_store import open_dataset
+    data = open_dataset(source, cache_dir)
+    _touch(data.cube)
+    for y, m in data.partitions:
+        for frame, _ in data.partition(y, m):
+            _touch(frame)
+        _touch(data.user_partials(y, m))
+    print(f"ready {data.rows} {data.memory_bytes()}", flush=True)
+    sys.stdin.read()                            # tahan sampai induk selesai mengukur
+
+
+def run(mmap: bool, args) -> pd.DataFrame:
+    env = dict(os.environ, TXN_MMAP="1" if mmap else "0",
+               TXN_MEMORY_MB=str(args.memory_mb), PYTHONPATH=ROOT)
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker",
+           "--source", args.source, "--cache-dir", args.cache_dir]
+    procs = []
+    try:
+        # worker pertama sendirian: membuat sidecar .arrow (sekali) sebelum yang lain membuka
+        for i in range(args.workers):
+            p = subprocess.Popen(cmd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            procs.append(p)
+            line = p.stdout.readline()
+            if not line.startswith("ready"):
+                raise SystemExit(f"worker {p.pid} failed")
+        return report_frame([p.pid for p in procs])
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Resident vs shared memory across worker processes")
+    ap.add_argument("--source", default=CSV_PATH)
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--workers", type=int, default=3)
+    ap.add_argument("--memory-mb", type=float, default=8192, help="TXN_MEMORY_MB worker (tanpa evict)")
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.worker:
+        return worker(args.source, args.cache_dir)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        for mmap in (False, True):
+            print(f"\nTXN_MMAP={int(mmap)} ({args.workers} workers, MB)")
+            print(run(mmap, args))
+
+
+if __name__ == "__main__":
+    main()
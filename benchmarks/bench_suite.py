@@ -0,0 +1,268 @@
+# bench_suite.py
+# Benchmark hot path dashboard di beberapa skala data: load_data (cold build / warm open),
+# agg_trend per period, query tiap tab lewat AnalyticsService (tanpa UI), dan export CSV.
+# Wall time + peak memori (high-water RSS per langkah) disimpan ke file JSON;
+# dua file hasil bisa dibandingkan untuk menandai regresi (exit status 1).
+# Dataset di-generate sekali per skala ke --workdir (hapus foldernya untuk generate ulang).
+# Usage: python benchmarks/bench_suite.py run [--rows 160k,1M,10M,50M] [--out bench_results.json]
+#        python benchmarks/bench_suite.py compare base.json new.json [--time-tol 0.15]
+
+import argparse
+import ctypes
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import create_data_dummy as gen                                       # noqa: E402
+from _common import parse_rows                                        # noqa: E402
+from analytics import AnalyticsService                                # noqa: E402
+from cube import filter_frame                                         # noqa: E402
+from data_store import open_dataset                                   # noqa: E402
+from engine import aggregate                                          # noqa: E402
+from export import write_export                                       # noqa: E402
+
+PERIODS = ["Weekly", "Monthly", "Quarterly", "Yearly"]
+LEADERBOARD_PAGE = 200
+
+
+def rows_label(n: int) -> str:
+    for div, suf in ((1_000_000, "M"), (1_000, "k")):
+        if n >= div and n % div == 0:
+            return f"{n // div}{suf}"
+    return str(n)
+
+
+# ---- peak memori: VmHWM di-reset per langkah lewat /proc/self/clear_refs (Linux) ----
+def _proc_status_kb(key: str) -> int | None:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(key):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak() -> int:
+    """Reset high-water RSS bila bisa; return RSS saat ini (bytes)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    rss = _proc_status_kb("VmRSS:")
+    return (rss if rss is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+
+
+def _peak_rss() -> int:
+    hwm = _proc_status_kb("VmHWM:")
+    return (hwm if hwm is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+
+
+def _release_free_memory() -> None:
+    # memori bebas di allocator tidak menaikkan RSS saat dipakai ulang -> kembalikan ke OS dulu
+    gc.collect()
+    pa.default_memory_pool().release_unused()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def measure(fn, repeat: int, out: list | None = None) -> dict:
+    """
+    Jalankan fn `repeat` kali: waktu terbaik + semua run, peak RSS di atas RSS awal.
+    Hasil fn terakhir ditaruh di `out` (opsional).
+    """
+    runs, peak = [], 0
+    for _ in range(repeat):
+        _release_free_memory()
+        base = _reset_peak()
+        t0 = time.perf_counter()
+        res = fn()
+        runs.append(time.perf_counter() - t0)
+        peak = max(peak, _peak_rss() - base)
+        if out is not None:
+            out[:] = [res]
+        del res
+    return {"seconds": min(runs), "runs": runs, "peak_bytes": int(peak)}
+
+
+# ---- dataset ----
+def dataset(rows: int, workdir: str, source: str, workers: int | None) -> str:
+    """Path sumber untuk `rows` baris (dibuat sekali). csv = generate(), parquet = chunked."""
+    if source == "csv":
+        path = os.path.join(workdir, f"transactions_{rows_label(rows)}.csv")
+        if not os.path.exists(path):
+            tmp = path + ".tmp"
+            gen.generate(rows).to_csv(tmp, index=False)
+            os.replace(tmp, path)
+    else:
+        path = os.path.join(workdir, f"transactions_{rows_label(rows)}")
+        if not os.path.isdir(path):
+            gen.generate_partitioned(path, rows, workers=workers)
+    return path
+
+
+def render_tab(svc: AnalyticsService, period: str, sel: dict):
+    """Query satu tab lewat AnalyticsService seperti render_dash (cache agregat dikosongkan dulu)."""
+    svc.cache.clear()
+    return (svc.dashboard(period, sel), svc.users(sel),
+            svc.leaderboard(sel, by="gmv", page=0, size=LEADERBOARD_PAGE))
+
+
+def export_csv(data, sel: dict, workdir: str):
+    with tempfile.TemporaryFile(dir=workdir) as out:
+        return write_export(data, sel, "csv", out)
+
+
+def bench_scale(rows: int, args) -> list[dict]:
+    src = dataset(rows, args.workdir, args.source, args.workers)
+    cache_dir = os.path.join(args.workdir, "cache")
+    results = []
+
+    def record(name: str, res: dict, **extra):
+        res = {"rows": rows, "name": name, **res, **extra}
+        results.append(res)
+        print(f"{rows:>12,} {name:<22} {res['seconds']:>10.3f} {res['peak_bytes'] / 2**20:>10.1f}")
+
+    def load_cold():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        return open_dataset(src, cache_dir)
+
+    def load_warm():
+        d = open_dataset(src, cache_dir)
+        d.cube, d.user_index                     # yang dibutuhkan render pertama
+        return d
+
+    record("load_data/cold", measure(load_cold, 1))
+    record("load_data/warm", measure(load_warm, args.repeat))
+    data = load_warm()
+    svc = AnalyticsService(data)
+    sels = {period: svc.default_selection(period) for period in PERIODS}
+
+    for period in PERIODS:
+        cube_f = filter_frame(data.cube, **sels[period])
+        record(f"agg_trend/{period}",
+               measure(lambda: aggregate(filter_frame(data.cube, **sels[period]), period).trend,
+                       args.repeat),
+               cells=len(cube_f))
+    for period in PERIODS:
+        record(f"render/{period}", measure(lambda: render_tab(svc, period, sels[period]),
+                                           args.repeat))
+
+    sel, report = sels[args.export_period], []
+    res = measure(lambda: export_csv(data, sel, args.workdir), args.export_repeat, out=report)
+    record(f"export_csv/{args.export_period}", res,
+           export_rows=report[0].rows, export_bytes=report[0].bytes)
+    return results
+
+
+def environment(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__, "pandas": pd.__version__, "pyarrow": pa.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "source": args.source,
+        "repeat": args.repeat,
+        "memory_mb": os.environ.get("TXN_MEMORY_MB"),
+    }
+
+
+def run(args) -> int:
+    os.makedirs(args.workdir, exist_ok=True)
+    print(f"{'rows':>12} {'step':<22} {'seconds':>10} {'peak_MB':>10}")
+    results = []
+    for n in parse_rows(args.rows):
+        results += bench_scale(n, args)
+        gc.collect()
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"env": environment(args), "results": results}, f, indent=1)
+    print(f"saved {args.out}")
+    return 0
+
+
+def compare(args) -> int:
+    """Bandingkan dua file hasil; regresi = lebih lambat/boros dari toleransi DAN ambang absolut."""
+    with open(args.base, encoding="utf-8") as f:
+        base = {(r["rows"], r["name"]): r for r in json.load(f)["results"]}
+    with open(args.new, encoding="utf-8") as f:
+        new = {(r["rows"], r["name"]): r for r in json.load(f)["results"]}
+
+    print(f"{'rows':>12} {'step':<22} {'base_s':>9} {'new_s':>9} {'ratio':>7} "
+          f"{'base_MB':>9} {'new_MB':>9} {'ratio':>7}  flag")
+    regressions = 0
+    for key in sorted(base.keys() | new.keys(), key=lambda k: (k[0], k[1])):
+        if key not in base or key not in new:
+            print(f"{key[0]:>12,} {key[1]:<22} {'only in ' + ('base' if key in base else 'new'):>44}")
+            continue
+        b, n = base[key], new[key]
+        t_ratio = n["seconds"] / max(b["seconds"], 1e-9)
+        m_ratio = n["peak_bytes"] / max(b["peak_bytes"], 1)
+        flags = []
+        if t_ratio > 1 + args.time_tol and n["seconds"] - b["seconds"] > args.min_seconds:
+            flags.append("SLOWER")
+        if m_ratio > 1 + args.mem_tol and n["peak_bytes"] - b["peak_bytes"] > args.min_mb * 2**20:
+            flags.append("MEMORY")
+        if not flags and t_ratio < 1 - args.time_tol and b["seconds"] - n["seconds"] > args.min_seconds:
+            flags.append("faster")
+        regressions += any(f.isupper() for f in flags)
+        print(f"{key[0]:>12,} {key[1]:<22} {b['seconds']:>9.3f} {n['seconds']:>9.3f} {t_ratio:>6.2f}x "
+              f"{b['peak_bytes'] / 2**20:>9.1f} {n['peak_bytes'] / 2**20:>9.1f} {m_ratio:>6.2f}x  "
+              f"{' '.join(flags)}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Dashboard hot-path benchmark suite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="jalankan benchmark, simpan hasil JSON")
+    r.add_argument("--rows", default="160k,1M,10M,50M")
+    r.add_argument("--repeat", type=int, default=3)
+    r.add_argument("--source", choices=["parquet", "csv"], default="parquet",
+                   help="parquet = generate_partitioned (skala besar), csv = generate() + to_csv")
+    r.add_argument("--workers", type=int, default=None, help="worker generator data")
+    r.add_argument("--export-period", choices=PERIODS, default="Monthly")
+    r.add_argument("--export-repeat", type=int, default=1)
+    r.add_argument("--workdir", default=os.path.join(ROOT, "data", ".cache", "bench"))
+    r.add_argument("--out", default="bench_results.json")
+
+    c = sub.add_parser("compare", help="bandingkan dua file hasil")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--time-tol", type=float, default=0.15, help="toleransi waktu relatif")
+    c.add_argument("--mem-tol", type=float, default=0.20, help="toleransi peak memori relatif")
+    c.add_argument("--min-seconds", type=float, default=0.005, help="abaikan selisih waktu lebih kecil")
+    c.add_argument("--min-mb", type=float, default=16, help="abaikan selisih memori lebih kecil")
+
+    args = ap.parse_args()
+    sys.exit(run(args) if args.cmd == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_trend_downsample.py
+# Trend harian di tab Date Range: seri penuh vs LTTB ke budget titik per series.
+# Per skenario (seluruh histori / 1 tahun / 90 hari zoom, total atau per category):
+# jumlah titik, ukuran JSON figure Plotly, waktu query+downsample dan waktu build figure.
+# Parity: jendela yang muat di budget harus mengembalikan nilai harian persis (detail penuh
+# setelah zoom), dicek terhadap scan baris mentah. Keluar dengan status 1 kalau berbeda.
+# Usage: python benchmarks/bench_trend_downsample.py [--source DIR|CSV] [--points 600]
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analytics import TREND_POINTS, AnalyticsService                  # noqa: E402
+from data_store import CACHE_DIR, CSV_PATH, open_dataset              # noqa: E402
+
+
+def figure_json(frame: pd.DataFrame) -> str:
+    fig = go.Figure([go.Scatter(x=g["date"], y=g["value"], mode="lines", name=name)
+                     for name, g in frame.groupby("series", sort=False)])
+    return pio.to_json(fig, validate=False)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Daily trend: full series vs LTTB downsampling")
+    ap.add_argument("--source", default=CSV_PATH)
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--points", type=int, default=TREND_POINTS)
+    args = ap.parse_args()
+
+    data = open_dataset(args.source, args.cache_dir)
+    svc = AnalyticsService(data)
+    sel = svc.default_selection("Yearly")
+    first, last = svc.options()["dates"]
+    windows = {"all history": first, "365 days": last - datetime.timedelta(days=364),
+               "90 days (zoom)": last - datetime.timedelta(days=89)}
+
+    print(f"{data.rows:,} rows · budget {args.points} points/series")
+    print(f"{'window':>15} {'by':>9} {'points':>14} {'JSON KB':>16} {'query ms':>9} {'figure ms':>16}")
+    for label, start in windows.items():
+        for by in (None, "category"):
+            full, _ = timed(lambda: data.daily.trend(data.categories, start=start, end=last,
+                                                     by=by, points=10**9, **sel))
+            small, q_ms = timed(lambda: data.daily.trend(data.categories, start=start, end=last,
+                                                         by=by, points=args.points, **sel))
+            full_json, full_ms = timed(lambda: figure_json(full.frame))
+            small_json, small_ms = timed(lambda: figure_json(small.frame))
+            print(f"{label:>15} {by or 'all':>9} {full.points:>6,} -> {small.points:>5,} "
+                  f"{len(full_json) / 1e3:>7,.0f} -> {len(small_json) / 1e3:>5,.0f} {q_ms:>9.1f} "
+                  f"{full_ms:>7.1f} -> {small_ms:>5.1f}")
+
+    # zoom ke jendela <= budget: nilai harian persis sama dengan scan baris
+    start = last - datetime.timedelta(days=min(args.points, 90) - 1)
+    rows = data.scan()
+    rows = rows[rows["date"].to_numpy().astype("datetime64[D]") >= np.datetime64(start)]
+    ref = (rows.groupby(["category", rows["date"].dt.floor("D")], observed=True)["amount"].sum()
+               .rename("value").reset_index())
+    got = svc.daily_trend(sel, start, last, "gmv", "category", args.points).frame
+    got = got[got["value"] != 0]
+    ok = (len(got) == len(ref)
+          and np.allclose(got.sort_values(["series", "date"])["value"].to_numpy(),
+                          ref.sort_values(["category", "date"])["value"].to_numpy(), rtol=1e-9))
+    print(f"\nzoomed window {start}..{last}: {'full daily detail ok' if ok else 'MISMATCH vs row scan'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# bitmap_index.py
+# Bitmap index untuk filter dimensi (category, channel, region) satu segmen partisi.
+# Satu bitset terkompresi per nilai dimensi, dibangun sekali saat load. Filter year/month
+# tidak di sini: segmen sudah satu partisi year=/month= (partition pruning di data_store).
+# Filter = OR di dalam satu dimensi, AND antar dimensi; hasilnya posisi baris
+# yang langsung dipakai tahap agregasi (tanpa scan isin/== per kolom).
+
+import numpy as np
+import pandas as pd
+
+INDEX_DIMS = ["category", "channel", "region"]
+
+
+class Bitset:
+    """
+    Bitset terkompresi dengan dua representasi (mirip container Roaring):
+    - "runs"  : array (start, stop) untuk bit yang berurutan (mis. segmen yang urut per dimensi)
+    - "packed": np.packbits, 1 bit per baris
+    Representasi yang lebih kecil dipilih saat build.
+    """
+    __slots__ = ("n", "kind", "data")
+
+    def __init__(self, n: int, kind: str, data):
+        self.n, self.kind, self.data = n, kind, data
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "Bitset":
+        n = len(mask)
+        # batas run: posisi di mana mask berubah nilai
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).view(np.int8)))
+        runs = edges.reshape(-1, 2).astype(np.int64)
+        if runs.nbytes < (n + 7) // 8:
+            return cls(n, "runs", runs)
+        return cls(n, "packed", np.packbits(mask))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes)
+
+    def count(self) -> int:
+        if self.kind == "runs":
+            return int((self.data[:, 1] - self.data[:, 0]).sum())
+        return int(np.unpackbits(self.data, count=self.n).sum())
+
+    def packed(self) -> np.ndarray:
+        """Packed bytes untuk semua baris."""
+        if self.kind == "packed":
+            return self.data
+        bits = np.zeros(self.n, dtype=bool)
+        for a, b in self.data:
+            bits[a:b] = True
+        return np.packbits(bits)
+
+
+class BitmapIndex:
+    """Bitset per nilai dimensi untuk satu frame (posisi baris = urutan frame)."""
+
+    def __init__(self, n: int, bitmaps: dict, values: dict):
+        self.n = n
+        self.bitmaps = bitmaps      # dim -> {value: Bitset}
+        self.values = values        # dim -> semua nilai yang ada
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame) -> "BitmapIndex":
+        bitmaps, values = {}, {}
+        for dim in INDEX_DIMS:
+            s = frame[dim]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                codes, labels = s.cat.codes.to_numpy(), s.cat.categories.tolist()
+            else:
+                codes, labels = pd.factorize(s, sort=True)
+                labels = labels.tolist()
+            present = np.unique(codes[codes >= 0])
+            bitmaps[dim] = {labels[c]: Bitset.from_mask(codes == c) for c in present}
+            values[dim] = [labels[c] for c in present]
+        return cls(len(frame), bitmaps, values)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for dim in self.bitmaps.values() for b in dim.values())
+
+    def _union(self, dim: str, keys):
+        """OR bitset untuk `keys`. None = semua nilai dipilih (tanpa filter)."""
+        bms = self.bitmaps[dim]
+        keys = [k for k in keys if k in bms]
+        if len(keys) == len(bms):
+            return None
+        out = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for k in keys:
+            np.bitwise_or(out, bms[k].packed(), out=out)
+        return out
+
+    def select(self, cats, chs, regs) -> np.ndarray:
+        """Posisi baris yang lolos filter (urut naik), setara cube.filter_frame tanpa year/month."""
+        acc = None
+        for dim, keys in (("category", cats), ("channel", chs), ("region", regs)):
+            part = self._union(dim, keys)
+            if part is None:
+                continue
+            acc = part if acc is None else np.bitwise_and(acc, part, out=acc)
+        if acc is None:
+            return np.arange(self.n, dtype=np.int64)
+        return np.flatnonzero(np.unpackbits(acc, count=self.n))
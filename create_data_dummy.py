@@ -2,12 +2,21 @@
 # create_data_dummy.py
 # Generate multi-year dummy transactions for the Streamlit dashboard
 # Usage (optional): python create_data_dummy.py
+#   Skala besar (Parquet terpartisi year=/month=, paralel, memori per worker dibatasi chunk):
+#   python create_data_dummy.py --rows 100M --parquet data/transactions_100m --workers 8
 # You can tweak parameters in the CONFIG section.
 
+import argparse
 import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
-from datetime import datetime
+
+from partitions import write_partitions
 
 # ===== CONFIG =====
 SEED             = 42
@@ -17,6 +26,8 @@ ROWS_TOTAL       = 160_000
 FAILED_RATE      = 0.15   # 15% failed
 OUT_DIR          = "data"
 OUT_FILE         = "transactions_dummy.csv"
+CHUNK_ROWS       = 1_000_000   # mode --parquet: baris per chunk (= unit kerja satu worker)
+USER_ID_RANGE    = (10_000, 19_999)
 
 CATEGORIES = [
     ("Airtime",              0.30),
@@ -69,13 +80,22 @@ MONTH_SEASON = {
 # Day-of-week factor (weekend slightly lower)
 DOW_FACTOR = {0:1.00, 1:1.00, 2:1.01, 3:1.01, 4:1.02, 5:0.95, 6:0.94}
 
+def _lut(mapping: dict, dtype=float) -> np.ndarray:
+    """Dict {kode int: nilai} -> array lookup (index = kode), pengganti np.vectorize(dict.get)."""
+    lut = np.zeros(max(mapping) + 1, dtype=dtype)
+    lut[list(mapping)] = list(mapping.values())
+    return lut
+
+MONTH_SEASON_LUT = _lut(MONTH_SEASON)
+DOW_FACTOR_LUT   = _lut(DOW_FACTOR)
+
 def _weighted_choice(rng, items):
     labels = [x for x,_ in items]
     probs  = np.array([p for _,p in items], dtype=float)
     probs  = probs / probs.sum()
     return labels, probs
 
-def generate():
+def generate(rows: int = ROWS_TOTAL):
     rng = np.random.default_rng(SEED)
 
     # Dates
@@ -89,13 +109,13 @@ def generate():
     rg_labels, rg_probs   = _weighted_choice(rng, REGIONS)
     fr_labels, fr_probs   = _weighted_choice(rng, FAILURE_REASONS)
 
-    n = ROWS_TOTAL
+    n = rows
     df = pd.DataFrame({
         "date":    rng.choice(dates, size=n, replace=True),
         "category":rng.choice(cat_labels, size=n, p=cat_probs),
         "channel": rng.choice(ch_labels, size=n, p=ch_probs),
         "region":  rng.choice(rg_labels, size=n, p=rg_probs),
-        "user_id": rng.integers(10_000, 19_999, size=n),
+        "user_id": rng.integers(*USER_ID_RANGE, size=n),
     })
 
     # Amount generation: lognormal base * category * month * dow * year growth
@@ -106,8 +126,8 @@ def generate():
 
     base = np.exp(rng.normal(10.2, 0.9, size=n))  # long-tail distribution
     cat_fac = df["category"].map(CAT_AMOUNT_FACTOR).values
-    m_fac = np.vectorize(MONTH_SEASON.get)(month)
-    d_fac = np.vectorize(DOW_FACTOR.get)(dow)
+    m_fac = MONTH_SEASON_LUT[month.to_numpy()]
+    d_fac = DOW_FACTOR_LUT[dow.to_numpy()]
     yr_growth = 1.0 + 0.07 * (year - START_YEAR)  # ~7% YoY
 
     amount = base * cat_fac * m_fac * d_fac * yr_growth
@@ -140,8 +160,160 @@ def generate():
     df = df[cols].sort_values("date").reset_index(drop=True)
     return df
 
+# ===== Skala besar: chunk independen, seed deterministik, Parquet terpartisi =====
+# Jumlah baris per hari ditarik sekali (multinomial), lalu urutan global (urut tanggal)
+# dipotong per CHUNK_ROWS. Chunk i hanya butuh (seed, i, batas baris) -> hasilnya sama
+# berapa pun jumlah worker / urutan eksekusi, dan tiap chunk cuma menyentuh 1-2 partisi.
+
+@lru_cache(maxsize=1)
+def _calendar() -> dict:
+    """Tabel per hari (index = hari ke-d sejak START_YEAR-01-01)."""
+    dates = pd.date_range(f"{START_YEAR}-01-01", f"{START_YEAR + N_YEARS - 1}-12-31", freq="D")
+    return {
+        "date":    dates.to_numpy(),
+        "year":    dates.year.to_numpy().astype(np.int16),
+        "month":   dates.month.to_numpy().astype(np.int8),
+        "week":    dates.isocalendar().week.to_numpy().astype(np.int8),
+        "quarter": dates.quarter.to_numpy().astype(np.int8),
+        "dow":     dates.dayofweek.to_numpy(),
+    }
+
+@lru_cache(maxsize=1)
+def _tables() -> dict:
+    """Label + probabilitas + faktor per kode (lookup array) untuk tiap dimensi."""
+    def table(items, factor=None):
+        labels, probs = _weighted_choice(None, items)
+        fac = None if factor is None else np.array([factor[x] for x in labels])
+        return labels, np.cumsum(probs), fac
+    return {
+        "category": table(CATEGORIES, CAT_AMOUNT_FACTOR),
+        "channel":  table(CHANNELS, FEE_RATE_BY_CHANNEL),
+        "region":   table(REGIONS),
+        "failure_reason": table(FAILURE_REASONS),
+    }
+
+def _draw(rng, cdf: np.ndarray, n: int) -> np.ndarray:
+    # inverse-CDF: sama dengan rng.choice(k, p=...) tanpa validasi per panggilan
+    return np.minimum(np.searchsorted(cdf, rng.random(n), side="right"), len(cdf) - 1).astype(np.int8)
+
+def day_bounds(rows_total: int, seed: int = SEED) -> np.ndarray:
+    """Prefix sum baris per hari (panjang n_days + 1); tanggal uniform seperti generate()."""
+    n_days = len(_calendar()["date"])
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(2**32,)))
+    counts = rng.multinomial(rows_total, np.full(n_days, 1.0 / n_days))
+    return np.concatenate([[0], np.cumsum(counts)])
+
+def generate_chunk(index: int, lo: int, hi: int, bounds: np.ndarray, seed: int = SEED,
+                   user_ids: tuple = USER_ID_RANGE) -> pd.DataFrame:
+    """Baris global [lo, hi) (urut tanggal) dengan RNG milik chunk `index`."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    cal, tab = _calendar(), _tables()
+    n = hi - lo
+
+    first = int(np.searchsorted(bounds, lo, side="right")) - 1
+    last = int(np.searchsorted(bounds, hi - 1, side="right")) - 1
+    span = np.arange(first, last + 1)
+    per_day = np.minimum(bounds[span + 1], hi) - np.maximum(bounds[span], lo)
+    day = np.repeat(span, per_day)
+
+    cat = _draw(rng, tab["category"][1], n)
+    ch = _draw(rng, tab["channel"][1], n)
+    reg = _draw(rng, tab["region"][1], n)
+    year = cal["year"][day]
+
+    base = np.exp(rng.normal(10.2, 0.9, size=n))
+    amount = (base * tab["category"][2][cat] * MONTH_SEASON_LUT[cal["month"][day]]
+              * DOW_FACTOR_LUT[cal["dow"][day]] * (1.0 + 0.07 * (year - START_YEAR)))
+    amount = np.clip(amount, 5_000, None).round(0)
+    fee_rate = (tab["channel"][2][ch] * rng.uniform(0.9, 1.1, size=n)).clip(0.005, 0.08)
+
+    failed = rng.random(n) < FAILED_RATE
+    reason = np.zeros(n, dtype=np.int8)             # kode 0 = "" (SUCCESS)
+    reason[failed] = _draw(rng, tab["failure_reason"][1], int(failed.sum())) + 1
+
+    def categorical(codes, labels):
+        return pd.Categorical.from_codes(codes, categories=labels)
+
+    return pd.DataFrame({
+        "date":     cal["date"][day],
+        "category": categorical(cat, tab["category"][0]),
+        "channel":  categorical(ch, tab["channel"][0]),
+        "region":   categorical(reg, tab["region"][0]),
+        "user_id":  rng.integers(*user_ids, size=n, dtype=np.int64),
+        "amount":   amount,
+        "fee_amount": (amount * fee_rate).round(2),
+        "status":   categorical(failed.astype(np.int8), ["SUCCESS", "FAILED"]),
+        "failure_reason": categorical(reason, [""] + tab["failure_reason"][0]),
+        "year":     year,
+        "month":    cal["month"][day],
+        "week":     cal["week"][day],
+        "quarter":  cal["quarter"][day],
+    })
+
+def _write_chunk(args) -> dict:
+    index, lo, hi, bounds, seed, user_ids, root = args
+    return write_partitions(generate_chunk(index, lo, hi, bounds, seed, user_ids), root, part=index,
+                            drop_keys=True)
+
+def generate_partitioned(out_dir: str, rows_total: int = ROWS_TOTAL, chunk_rows: int = CHUNK_ROWS,
+                         workers: int | None = None, seed: int = SEED,
+                         user_ids: tuple = USER_ID_RANGE) -> dict:
+    """
+    Tulis `rows_total` baris ke out_dir/year=YYYY/month=MM/part-<chunk>.parquet
+    (year/month hanya di nama folder, jadi pd.read_parquet(out_dir) langsung bisa dipakai).
+    Memori ~ workers x chunk_rows baris; return {"YYYY-MM": rows}.
+    """
+    workers = workers or os.cpu_count() or 1
+    bounds = day_bounds(rows_total, seed)
+    tmp = out_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    tasks = [(i, lo, min(lo + chunk_rows, rows_total), bounds, seed, user_ids, tmp)
+             for i, lo in enumerate(range(0, rows_total, chunk_rows))]
+    parts = {}
+    if workers == 1:
+        results = map(_write_chunk, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_write_chunk, tasks)
+    try:
+        for res in results:
+            for name, n in res.items():
+                parts[name] = parts.get(name, 0) + n
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    return parts
+
+def _parse_rows(text: str) -> int:
+    mult = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+    text = text.strip().lower()
+    return int(float(text[:-1]) * mult[text[-1]]) if text[-1] in mult else int(text)
+
 def main():
-    df = generate()
+    ap = argparse.ArgumentParser(description="Generate dummy transactions")
+    ap.add_argument("--rows", type=_parse_rows, default=ROWS_TOTAL, help="mis. 160k, 10M, 100M")
+    ap.add_argument("--parquet", metavar="DIR",
+                    help="tulis Parquet terpartisi year=/month= ke DIR (paralel, per chunk)")
+    ap.add_argument("--chunk-rows", type=_parse_rows, default=CHUNK_ROWS)
+    ap.add_argument("--workers", type=int, default=None, help="default: jumlah CPU")
+    ap.add_argument("--users", type=_parse_rows, default=USER_ID_RANGE[1] - USER_ID_RANGE[0],
+                    help="jumlah user_id berbeda (mode --parquet)")
+    args = ap.parse_args()
+
+    if args.parquet:
+        t0 = time.perf_counter()
+        user_ids = (USER_ID_RANGE[0], USER_ID_RANGE[0] + args.users)
+        parts = generate_partitioned(args.parquet, args.rows, args.chunk_rows, args.workers,
+                                     user_ids=user_ids)
+        dt = time.perf_counter() - t0
+        print(f"Saved {args.parquet}  rows={sum(parts.values()):,}  partitions={len(parts)}  "
+              f"{dt:,.1f}s ({sum(parts.values()) / dt:,.0f} rows/s)")
+        return
+
+    df = generate(args.rows)
     os.makedirs(OUT_DIR, exist_ok=True)
     out_path = os.path.join(OUT_DIR, OUT_FILE)
     df.to_csv(out_path, index=False)
@@ -0,0 +1,75 @@
+# cube.py
+# Rollup cube (pre-aggregasi) untuk render_dash.
+# Satu baris per kombinasi date-part x category x channel x region x status x failure_reason,
+# berisi sum(amount), sum(fee_amount) dan jumlah transaksi (txns).
+# Semua chart kecuali metrik distinct-user bisa dijawab dari cube ini;
+# tabel per-user dijawab dari per-user partials (build_user_partials).
+
+import pandas as pd
+
+CUBE_DIMS = ["year", "month", "week", "category", "channel", "region",
+             "status", "failure_reason"]
+CUBE_MEASURES = ["amount", "fee_amount", "txns"]
+# per-user partials per cell (tabel Users tanpa baris mentah)
+USER_DIMS = ["year", "month", "category", "channel", "region", "user_id"]
+USER_MEASURES = ["amount", "txns"]
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate row-level transactions into the rollup cube."""
+    cube = (df.groupby(CUBE_DIMS, observed=True, sort=False)
+              .agg(amount=("amount", "sum"),
+                   fee_amount=("fee_amount", "sum"),
+                   txns=("amount", "size"))
+              .reset_index())
+    # quarter diturunkan dari month (tidak perlu jadi dimensi terpisah)
+    cube["quarter"] = ((cube["month"] - 1) // 3 + 1).astype("int8")
+    cube["txns"] = cube["txns"].astype("int64")
+    return cube
+
+
+def merge_cubes(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """Gabungkan dua cube (mis. cube lama + cube baris baru) tanpa menyentuh baris mentah."""
+    both = pd.concat([a, b], ignore_index=True)
+    cube = (both.groupby(CUBE_DIMS, observed=True, sort=False)[CUBE_MEASURES]
+                .sum()
+                .reset_index())
+    cube["quarter"] = ((cube["month"] - 1) // 3 + 1).astype("int8")
+    return cube
+
+
+def build_user_partials(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-user partials: sum(amount) & jumlah transaksi per user per cell."""
+    return (df.groupby(USER_DIMS, observed=True, sort=False)
+              .agg(amount=("amount", "sum"), txns=("amount", "size"))
+              .reset_index()
+              .astype({"txns": "int64"}))
+
+
+def merge_user_partials(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    both = pd.concat([a, b], ignore_index=True)
+    return (both.groupby(USER_DIMS, observed=True, sort=False)[USER_MEASURES]
+                .sum()
+                .reset_index())
+
+
+def filter_frame(frame: pd.DataFrame, cats, chs, regs, year=None, month=None) -> pd.DataFrame:
+    """
+    Filter baris mentah atau potongan cube dengan aturan yang sama.
+    year/month None => tidak difilter (mis. tab Yearly).
+    """
+    mask = (frame["category"].isin(cats)
+            & frame["channel"].isin(chs)
+            & frame["region"].isin(regs))
+    if year is not None:
+        mask &= frame["year"] == year
+    if month is not None:
+        mask &= frame["month"] == month
+    return frame[mask]
+
+
+def txn_weights(frame: pd.DataFrame) -> pd.Series:
+    """Transaction count per row: `txns` for cube slices, 1 for raw rows."""
+    if "txns" in frame.columns:
+        return frame["txns"]
+    return pd.Series(1, index=frame.index, dtype="int64")
@@ -0,0 +1,238 @@
+# daily_totals.py
+# Prefix sum harian per cell (category x channel x region) untuk tab Date Range.
+# cum[cell, i] = total hari start .. start+i-1 untuk gmv, fee, txns dan success, jadi total
+# rentang tanggal apa pun = cum[:, end+1] - cum[:, start]: dua lookup per cell, tanpa scan
+# baris, berapa pun panjang rentangnya (range slider tetap interaktif di seluruh histori).
+# Dibangun per partisi saat build cache dan di-merge saat ingest (seperti sketch HLL).
+# Seri harian satu seleksi (trend Daily) = selisih berurutan cum di jendela tanggal, lalu
+# di-downsample LTTB ke budget titik per trace (downsample.py).
+
+import datetime
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from downsample import lttb
+from user_sketches import CELL_DIMS, cell_codes, cell_key, cell_parts, select_cells
+
+MEASURES = ["gmv", "fee", "txns", "success"]
+TREND_METRICS = ["gmv", "fee", "txns", "success_rate"]
+
+
+@dataclass(frozen=True)
+class RangeAggregates:
+    """Total satu rentang tanggal (inklusif) + breakdown per dimensi."""
+    start: datetime.date
+    end: datetime.date
+    gmv: float
+    fee: float
+    txns: int
+    success: int
+    cat: pd.DataFrame        # category, gmv, fee, txns, success, success_rate (urut txns desc)
+    ch: pd.DataFrame         # channel, ...
+    reg: pd.DataFrame        # region, ...
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    @property
+    def success_rate(self) -> float:
+        return self.success / self.txns if self.txns else 0.0
+
+    @property
+    def empty(self) -> bool:
+        return self.txns == 0
+
+
+@dataclass(frozen=True)
+class DailyTrend:
+    """Trend harian (sudah di-downsample) satu rentang; satu series per label `by` (atau "All")."""
+    metric: str
+    start: datetime.date
+    end: datetime.date
+    frame: pd.DataFrame      # series, date, value (urut series lalu tanggal)
+    raw_points: int          # titik harian sebelum downsampling (semua series)
+
+    @property
+    def points(self) -> int:
+        return len(self.frame)
+
+    @property
+    def downsampled(self) -> bool:
+        return self.points < self.raw_points
+
+
+def _breakdown(cells: pd.DataFrame, dim: str) -> pd.DataFrame:
+    """Jumlah per label `dim` via bincount di atas kode kategori (urut txns desc, lalu label)."""
+    labels = cells[dim].cat.categories.tolist()
+    codes = cells[dim].cat.codes.to_numpy(np.int64)
+    sums = {m: np.bincount(codes, cells[m].to_numpy(np.float64), len(labels)) for m in MEASURES}
+    order = sorted(np.flatnonzero(sums["txns"]), key=lambda i: (-sums["txns"][i], labels[i]))
+    out = pd.DataFrame({dim: [labels[i] for i in order]})
+    for m in MEASURES:
+        out[m] = sums[m][order] if m in ("gmv", "fee") else np.rint(sums[m][order]).astype(np.int64)
+    out["success_rate"] = out["success"] / out["txns"]
+    return out
+
+
+def range_aggregates(cells: pd.DataFrame, start: datetime.date, end: datetime.date) -> RangeAggregates:
+    """Reduce total per cell (hasil DailyTotals.totals) ke KPI + breakdown category/channel/region."""
+    return RangeAggregates(
+        start, end,
+        gmv=float(cells["gmv"].sum()), fee=float(cells["fee"].sum()),
+        txns=int(cells["txns"].sum()), success=int(cells["success"].sum()),
+        cat=_breakdown(cells, "category"), ch=_breakdown(cells, "channel"),
+        reg=_breakdown(cells, "region"),
+    )
+
+
+class DailyTotals:
+    """
+    - keys : cell key terurut (encoding user_sketches.cell_key dengan ym = 0)
+    - start: hari pertama (np.datetime64[D])
+    - cum  : float64, shape (n_cells, n_days + 1, len(MEASURES)); cum[:, 0] = 0
+    """
+
+    def __init__(self, keys: np.ndarray, start: np.datetime64, cum: np.ndarray):
+        self.keys = keys
+        self.start = np.datetime64(start, "D")
+        self.cum = cum
+
+    @property
+    def n_days(self) -> int:
+        return self.cum.shape[1] - 1
+
+    @property
+    def first(self) -> datetime.date:
+        return self.start.astype(datetime.date)
+
+    @property
+    def last(self) -> datetime.date:
+        return (self.start + max(self.n_days - 1, 0)).astype(datetime.date)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.keys.nbytes + self.cum.nbytes)
+
+    @classmethod
+    def from_daily(cls, keys: np.ndarray, start, daily: np.ndarray) -> "DailyTotals":
+        cum = np.zeros((daily.shape[0], daily.shape[1] + 1, daily.shape[2]), dtype=np.float64)
+        np.cumsum(daily, axis=1, out=cum[:, 1:])
+        return cls(keys, start, cum)
+
+    def daily(self) -> np.ndarray:
+        """Total per hari (n_cells, n_days, len(MEASURES))."""
+        return np.diff(self.cum, axis=1)
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, categories: dict) -> "DailyTotals":
+        codes = cell_codes(frame, categories)
+        cell = cell_key(dict(codes, ym=np.zeros(len(frame), np.int32)))
+        day = frame["date"].to_numpy().astype("datetime64[D]")
+        if not len(frame):
+            return cls.from_daily(np.array([], np.int64), np.datetime64("1970-01-01"),
+                                  np.zeros((0, 0, len(MEASURES))))
+        start = day.min()
+        offset = (day - start).astype(np.int64)
+        n_days = int(offset.max()) + 1
+        keys, inv = np.unique(cell, return_inverse=True)
+        flat, size = inv.astype(np.int64) * n_days + offset, len(keys) * n_days
+        success = (frame["status"] == "SUCCESS").to_numpy(np.float64)
+        daily = np.stack([np.bincount(flat, frame["amount"].to_numpy(np.float64), size),
+                          np.bincount(flat, frame["fee_amount"].to_numpy(np.float64), size),
+                          np.bincount(flat, minlength=size).astype(np.float64),
+                          np.bincount(flat, success, size)], axis=-1)
+        return cls.from_daily(keys, start, daily.reshape(len(keys), n_days, len(MEASURES)))
+
+    @classmethod
+    def concat(cls, parts: list) -> "DailyTotals":
+        """Jumlahkan beberapa DailyTotals (mis. satu per partisi) ke satu rentang hari gabungan."""
+        parts = [p for p in parts if p.n_days]
+        if not parts:
+            return cls.from_daily(np.array([], np.int64), np.datetime64("1970-01-01"),
+                                  np.zeros((0, 0, len(MEASURES))))
+        keys = np.unique(np.concatenate([p.keys for p in parts]))
+        start = min(p.start for p in parts)
+        n_days = int(max((p.start - start).astype(np.int64) + p.n_days for p in parts))
+        daily = np.zeros((len(keys), n_days, len(MEASURES)), dtype=np.float64)
+        for p in parts:
+            lo = int((p.start - start).astype(np.int64))
+            daily[np.searchsorted(keys, p.keys), lo:lo + p.n_days] += p.daily()
+        return cls.from_daily(keys, start, daily)
+
+    def merge(self, other: "DailyTotals") -> "DailyTotals":
+        """Histori + baris baru (ingest); hari yang sama dijumlahkan."""
+        return DailyTotals.concat([self, other])
+
+    def offset(self, day) -> int:
+        """Index hari di `cum` (dipotong ke 0..n_days)."""
+        i = int((np.datetime64(day, "D") - self.start).astype(np.int64))
+        return min(max(i, 0), self.n_days)
+
+    def totals(self, categories: dict, cats, chs, regs, start, end) -> pd.DataFrame:
+        """Total per cell terpilih untuk start..end (inklusif): category, channel, region + MEASURES."""
+        mask = select_cells(self.keys, categories, cats, chs, regs)
+        i0 = self.offset(start)
+        i1 = max(self.offset(np.datetime64(end, "D") + 1), i0)
+        sums = self.cum[mask, i1] - self.cum[mask, i0]
+        codes = cell_parts(self.keys[mask])
+        out = pd.DataFrame({c: pd.Categorical.from_codes(codes[c], categories[c]) for c in CELL_DIMS})
+        for j, m in enumerate(MEASURES):
+            # counts disimpan float64 (exact sampai 2^53) -> kembali ke int
+            out[m] = sums[:, j] if m in ("gmv", "fee") else np.rint(sums[:, j]).astype(np.int64)
+        return out
+
+    def series(self, categories: dict, cats, chs, regs, start, end,
+               by: str | None = None) -> tuple[np.ndarray, list, np.ndarray]:
+        """
+        Total harian start..end untuk seleksi: (hari datetime64[D], label series,
+        array (n_series, n_days, len(MEASURES))). `by` = category/channel/region atau None.
+        """
+        mask = select_cells(self.keys, categories, cats, chs, regs)
+        i0 = self.offset(start)
+        i1 = max(self.offset(np.datetime64(end, "D") + 1), i0)
+        daily = np.diff(self.cum[mask, i0:i1 + 1], axis=1)
+        days = self.start + np.arange(i0, i1)
+        if by is None:
+            return days, ["All"], daily.sum(axis=0, keepdims=True)
+        group = cell_parts(self.keys[mask])[by]
+        out = np.zeros((len(categories[by]), i1 - i0, len(MEASURES)))
+        np.add.at(out, group, daily)
+        present = np.unique(group)
+        return days, [categories[by][g] for g in present], out[present]
+
+    def trend(self, categories: dict, cats, chs, regs, start, end, metric: str = "gmv",
+              by: str | None = None, points: int = 600) -> DailyTrend:
+        """Seri harian `metric` per series, di-downsample LTTB ke maksimal `points` titik per series."""
+        if metric not in TREND_METRICS:
+            raise ValueError(f"unknown trend metric {metric!r}; expected one of {TREND_METRICS}")
+        if by not in (None, *CELL_DIMS):
+            raise ValueError(f"cannot split trend by {by!r}; expected one of {CELL_DIMS}")
+        days, labels, values = self.series(categories, cats, chs, regs, start, end, by)
+        x = (days - self.start).astype(np.int64)
+        frames, raw = [], 0
+        for label, v in zip(labels, values):
+            if metric == "success_rate":
+                keep = v[:, 2] > 0                      # hari tanpa transaksi: tidak ada rate
+                xs, y = x[keep], v[keep, 3] / v[keep, 2]
+            else:
+                xs, y = x, v[:, MEASURES.index(metric)]
+            idx = lttb(xs, y, points)
+            raw += len(xs)
+            frames.append(pd.DataFrame({"series": label, "date": self.start + xs[idx], "value": y[idx]}))
+        frame = (pd.concat(frames, ignore_index=True) if frames
+                 else pd.DataFrame({"series": [], "date": np.array([], "datetime64[D]"), "value": []}))
+        return DailyTrend(metric, start, end, frame, raw)
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, keys=self.keys, start=np.array(self.start), cum=self.cum)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DailyTotals":
+        with np.load(path) as z:
+            return cls(z["keys"], z["start"][()], z["cum"])
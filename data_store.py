@@ -0,0 +1,782 @@
+# data_store.py
+# Columnar cache (Parquet) untuk dataset transaksi.
+# CSV hanya di-parse sekali; start berikutnya cukup baca Parquet yang
+# kolom periodenya (year/month/week/quarter) sudah dimaterialisasi.
+# Data disimpan terpartisi per year/month (data/.cache/<stem>/year=YYYY/month=MM/)
+# dan dibaca lewat PartitionedDataset yang hanya memuat partisi yang dibutuhkan.
+# Build dari CSV berjalan out-of-core (per chunk), dibatasi TXN_MEMORY_MB.
+# Sumber bisa juga folder Parquet terpartisi hasil `create_data_dummy.py --parquet`.
+# Tiap file Parquet cache punya sidecar Arrow IPC (.arrow) yang dibaca lewat memory map:
+# beberapa proses server berbagi page fisik yang sama (read-only, zero-copy).
+# Ingest & build antar proses diserialkan lewat flock pada <stem>.lock (cache_lock);
+# proses lain memuat ulang state-nya saat file meta berubah (PartitionedDataset.refresh).
+
+import hashlib
+import json
+import os
+import glob
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from bitmap_index import BitmapIndex
+from cube import (build_cube, build_user_partials, filter_frame, merge_cubes,
+                  merge_user_partials)
+from daily_totals import DailyTotals
+from partitions import partition_path, write_partitions
+from user_index import UserIdIndex
+from user_sketches import CELL_DIMS, HLLSketches, as_categories, check_cell_labels
+
+try:
+    import fcntl                                # POSIX; tanpa fcntl lock hanya berlaku per proses
+except ImportError:
+    fcntl = None
+
+# sumber: file CSV atau folder Parquet year=YYYY/month=MM (TXN_SOURCE)
+CSV_PATH   = os.environ.get("TXN_SOURCE", "data/transactions_dummy.csv")
+CACHE_DIR  = "data/.cache"
+PERIOD_COLS = ["year", "month", "week", "quarter"]
+
+# ---- Compact in-memory schema ----
+# Dimensi teks -> dictionary-encoded (category); kolom periode -> int sempit.
+# Naikkan SCHEMA_VERSION setiap kali skema berubah agar cache lama dibangun ulang.
+SCHEMA_VERSION = 12
+CATEGORY_COLS  = ["category", "channel", "region", "status", "failure_reason"]
+# user_id tetap int64: id di atas 2^31 tidak boleh wrap (distinct users, per-user partials,
+# UserIdIndex memakai nilainya langsung)
+INT_DTYPES     = {"year": "int16", "month": "int8", "week": "int8",
+                  "quarter": "int8", "user_id": "int64"}
+# fee float32 opsional (hemat 4 byte/baris, presisi ~7 digit)
+FEE_FLOAT32    = os.environ.get("TXN_FEE_FLOAT32", "0") == "1"
+
+# ---- Out-of-core ----
+# Batas memori (MB): menentukan ukuran chunk saat build dari CSV dan
+# total partisi yang boleh resident di memori saat dashboard berjalan (LRU).
+MEMORY_MB  = float(os.environ.get("TXN_MEMORY_MB", "1024"))
+CHUNK_ROWS = int(os.environ.get("TXN_CHUNK_ROWS", "0"))   # 0 = otomatis dari MEMORY_MB
+
+# ---- Shared memory-mapped dataset ----
+# 1 = frame partisi / per-user partials / cube dibaca dari sidecar .arrow (IPC tanpa kompresi,
+# skema final) lewat pa.memory_map. Kolom menunjuk langsung ke page cache file, jadi N proses
+# Streamlit di belakang load balancer memakai satu salinan fisik, bukan N salinan privat.
+# 0 = baca Parquet ke memori privat tiap proses (perilaku lama, hemat disk).
+MMAP = os.environ.get("TXN_MMAP", "1") == "1"
+
+
+def add_period_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Derive year/month/week/quarter from `date` (in place)."""
+    df["year"] = df["date"].dt.year
+    df["month"] = df["date"].dt.month
+    df["week"] = df["date"].dt.isocalendar().week.astype(int)
+    df["quarter"] = df["date"].dt.quarter
+    return df
+
+
+def apply_schema(df: pd.DataFrame, fee_float32: bool = FEE_FLOAT32,
+                 categories: dict | None = None) -> pd.DataFrame:
+    """
+    Cast to the compact schema: categoricals for dimensions, narrow ints for periods.
+    `categories` memaksa daftar kategori global (dipakai saat membaca partisi,
+    supaya kode kategori sama di semua partisi).
+    """
+    for c in CATEGORY_COLS:
+        if c not in df.columns:
+            continue
+        col = df[c]
+        if c == "failure_reason" and col.isna().any():
+            col = col.astype(object).fillna("")   # SUCCESS -> "" (bukan NaN)
+        if categories and c in categories:
+            # urutan kode harus sama dengan daftar global (user index / sketch memakai kode ini)
+            recoded = as_categories(col, categories[c])
+            if recoded is not col:
+                df[c] = recoded
+            continue
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            continue
+        df[c] = col.astype(pd.CategoricalDtype(sorted(col.unique().tolist())))
+    for c, dt in INT_DTYPES.items():
+        if c in df.columns and df[c].dtype != dt:
+            df[c] = df[c].astype(dt)
+    if fee_float32 and "fee_amount" in df.columns:
+        df["fee_amount"] = df["fee_amount"].astype(np.float32)
+    return df
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column (deep) before vs after the compact schema."""
+    b = before.memory_usage(index=False, deep=True)
+    a = after.memory_usage(index=False, deep=True).reindex(b.index)
+    rep = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str).reindex(b.index),
+        "bytes_before": b,
+        "bytes_after": a,
+    })
+    rep.loc["TOTAL"] = ["", "", b.sum(), a.sum()]
+    rep["ratio"] = (rep["bytes_after"] / rep["bytes_before"]).round(3)
+    return rep
+
+
+def source_files(path: str) -> list:
+    """File sumber: CSV itu sendiri, atau semua *.parquet di bawah folder sumber (urut)."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True))
+    return [path]
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-1 of the file content (folder: nama relatif + isi tiap file), read in 1 MiB chunks."""
+    h = hashlib.sha1()
+    for name in source_files(path):
+        if name != path:
+            h.update(os.path.relpath(name, path).encode())
+        with open(name, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def _source_stat(path: str) -> dict:
+    stats = [os.stat(f) for f in source_files(path)]
+    return {"size": sum(st.st_size for st in stats),
+            "mtime_ns": max((st.st_mtime_ns for st in stats), default=0)}
+
+
+def cache_paths(csv_path: str = CSV_PATH, cache_dir: str = CACHE_DIR) -> tuple[str, str]:
+    """Return (dataset_dir, meta_path) for a given source CSV / Parquet folder."""
+    stem = os.path.splitext(os.path.basename(os.path.normpath(csv_path)))[0]
+    return (os.path.join(cache_dir, stem),
+            os.path.join(cache_dir, f"{stem}.meta.json"))
+
+
+def _read_meta(meta_path: str) -> dict | None:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: str, meta: dict) -> None:
+    tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, meta_path)
+
+
+def _meta_stamp(meta_path: str | None) -> tuple | None:
+    """Identitas versi file meta: tiap tulis = file baru (os.replace) -> inode/mtime berubah."""
+    try:
+        st = os.stat(meta_path)
+    except (OSError, TypeError):
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def lock_path(meta_path: str) -> str:
+    # di cache dir, bukan di dalam folder dataset (build_cache mengganti folder itu)
+    return meta_path[:-len(".meta.json")] + ".lock"
+
+
+@contextmanager
+def cache_lock(meta_path: str | None, blocking: bool = True):
+    """
+    Lock eksklusif antar proses (flock) untuk satu cache: build, recover & ingest tidak
+    berjalan bersamaan di beberapa worker. Yield False kalau `blocking=False` dan lock
+    sedang dipegang proses lain.
+    """
+    if meta_path is None or fcntl is None:
+        yield True
+        return
+    os.makedirs(os.path.dirname(meta_path) or ".", exist_ok=True)
+    with open(lock_path(meta_path), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def cache_is_fresh(csv_path: str = CSV_PATH, cache_dir: str = CACHE_DIR) -> bool:
+    """
+    True jika Parquet cache masih sesuai dengan CSV sumber.
+    - size + mtime sama  -> fresh (tanpa hashing)
+    - beda mtime saja    -> cek hash isi; kalau sama, meta di-update
+    """
+    root, meta_path = cache_paths(csv_path, cache_dir)
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.isdir(root):
+        return False
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return False
+
+    stat = _source_stat(csv_path)
+    if stat == meta.get("source"):
+        return True
+    if stat["size"] != meta.get("source", {}).get("size"):
+        return False
+
+    # file di-touch / di-copy ulang: bandingkan isi
+    if file_digest(csv_path) != meta.get("sha1"):
+        return False
+    meta["source"] = stat
+    _write_meta(meta_path, meta)
+    return True
+
+
+def chunk_rows_for(csv_path: str, memory_mb: float = MEMORY_MB) -> int:
+    """
+    Baris per chunk sumber supaya satu chunk (+ salinan saat cast/groupby) muat di ~1/4 cap.
+    CSV: ukuran baris diperkirakan dari 1 MiB pertama file (parsed ~4x byte CSV).
+    Parquet: byte tak terkompresi per baris dari metadata file pertama.
+    """
+    if CHUNK_ROWS:
+        return CHUNK_ROWS
+    if os.path.isdir(csv_path):
+        files = source_files(csv_path)
+        md = pq.ParquetFile(files[0]).metadata if files else None
+        row_bytes = (sum(md.row_group(i).total_byte_size for i in range(md.num_row_groups))
+                     / max(md.num_rows, 1)) if md else 100
+    else:
+        with open(csv_path, "rb") as f:
+            sample = f.read(1 << 20)
+        row_bytes = 4 * len(sample) / max(sample.count(b"\n"), 1)
+    return max(10_000, int(memory_mb * 2**20 / 4 / max(row_bytes, 1)))
+
+
+def iter_source(csv_path: str, chunk_rows: int):
+    """
+    Chunk DataFrame dari sumber (kolom date + periode sudah ada).
+    File folder sumber tidak menyimpan year/month (ada di nama folder) -> diturunkan dari date.
+    """
+    if not os.path.isdir(csv_path):
+        for chunk in pd.read_csv(csv_path, parse_dates=["date"], chunksize=chunk_rows):
+            yield add_period_columns(chunk)
+        return
+    for name in source_files(csv_path):
+        for batch in pq.ParquetFile(name).iter_batches(batch_size=chunk_rows):
+            chunk = batch.to_pandas()
+            if any(c not in chunk.columns for c in PERIOD_COLS):
+                # urutan kolom sama dengan sumber CSV (periode di akhir)
+                chunk = add_period_columns(chunk)[
+                    [c for c in chunk.columns if c not in PERIOD_COLS] + PERIOD_COLS]
+            yield chunk
+
+
+def arrow_path(parquet_path: str) -> str:
+    return parquet_path[:-len(".parquet")] + ".arrow"
+
+
+def write_arrow(frame: pd.DataFrame, parquet_path: str) -> str:
+    """Tulis sidecar .arrow untuk `parquet_path` (atomic: tmp per proses lalu rename)."""
+    path = arrow_path(parquet_path)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def write_frame(frame: pd.DataFrame, parquet_path: str) -> None:
+    """Parquet (sumber kebenaran) + sidecar .arrow bila TXN_MMAP=1 (ditulis sesudahnya)."""
+    tmp = parquet_path + ".tmp"
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, parquet_path)
+    if MMAP:
+        write_arrow(frame, parquet_path)
+
+
+def read_frame(parquet_path: str, categories: dict | None = None) -> pd.DataFrame:
+    """
+    Satu file cache dalam skema ringkas. TXN_MMAP=1: memory-mapped dari sidecar .arrow
+    (dibuat dulu kalau belum ada / lebih tua dari Parquet-nya, mis. cache lama atau
+    file yang ditulis ulang proses lain saat ingest). Kolom numerik dan kode kategori
+    adalah view ke file; hanya daftar label kategori yang dibuat per proses. Kode ikut
+    disalin kalau dictionary file bukan prefix kategori global atau lebar kodenya berubah
+    (mis. > 127 label setelah ingest).
+    """
+    if not MMAP:
+        return apply_schema(pd.read_parquet(parquet_path), categories=categories)
+    path = arrow_path(parquet_path)
+    try:
+        fresh = os.stat(path).st_mtime_ns >= os.stat(parquet_path).st_mtime_ns
+    except FileNotFoundError:
+        fresh = False
+    if not fresh:
+        write_arrow(apply_schema(pd.read_parquet(parquet_path), categories=categories), parquet_path)
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    # split_blocks: satu block per kolom, tanpa konsolidasi (copy) ke block 2D;
+    # apply_schema tidak menyalin kolom yang dtype-nya sudah sesuai
+    return apply_schema(table.to_pandas(split_blocks=True), categories=categories)
+
+
+def staged_path(path: str) -> str:
+    """Nama staging untuk file cache yang sedang ditulis ingest (tidak cocok glob part-*)."""
+    return os.path.join(os.path.dirname(path), "_staged." + os.path.basename(path))
+
+
+def journal_path(root: str) -> str:
+    return os.path.join(root, "_ingest.journal.json")
+
+
+def commit_staged(root: str, meta_path: str | None, renames: list, meta: dict) -> None:
+    """
+    Commit satu ingest: journal (rename staged -> final + meta baru) ditulis atomic dulu,
+    baru rename dijalankan dan meta disimpan. Journal = titik commit; proses yang mati di
+    tengah diselesaikan oleh recover_ingest saat dataset dibuka lagi.
+    """
+    rel = [[os.path.relpath(src, root), os.path.relpath(dst, root)] for src, dst in renames]
+    _write_meta(journal_path(root), {"renames": rel, "meta": meta})
+    _replay_journal(root, meta_path)
+
+
+def _replay_journal(root: str, meta_path: str | None) -> bool:
+    journal = _read_meta(journal_path(root))
+    if journal is None:
+        return False
+    for src, dst in journal["renames"]:
+        src = os.path.join(root, src)
+        if os.path.exists(src):                 # sudah di-rename sebelum crash -> lewati
+            os.replace(src, os.path.join(root, dst))
+    if meta_path:
+        _write_meta(meta_path, journal["meta"])
+    os.remove(journal_path(root))
+    return True
+
+
+def recover_ingest(root: str, meta_path: str | None) -> bool:
+    """
+    Selesaikan commit ingest yang terputus (roll forward dari journal) dan buang file
+    staging yang tidak pernah di-commit. True jika ada journal yang di-replay.
+    """
+    if not os.path.isdir(root):
+        return False
+    replayed = _replay_journal(root, meta_path)
+    for f in glob.glob(os.path.join(root, "**", "_staged.*"), recursive=True):
+        os.remove(f)
+    return replayed
+
+
+def _part_files(path: str) -> list:
+    return sorted(glob.glob(os.path.join(path, "part-*.parquet")),
+                  key=lambda p: int(os.path.basename(p)[5:-8]))
+
+
+def compact_partition(path: str, categories: dict) -> pd.DataFrame:
+    """Gabungkan file part-N satu partisi jadi part-0 (satu segmen); return baris partisi."""
+    files = _part_files(path)
+    frame = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    frame = apply_schema(frame, categories=categories)
+    if len(files) > 1:
+        tmp = os.path.join(path, "part-0.parquet.tmp")
+        frame.to_parquet(tmp, index=False)
+        for f in files:
+            os.remove(f)
+        os.replace(tmp, os.path.join(path, "part-0.parquet"))
+    if MMAP:
+        write_arrow(frame, os.path.join(path, "part-0.parquet"))
+    return frame
+
+
+def build_cache(csv_path: str = CSV_PATH, cache_dir: str = CACHE_DIR,
+                memory_mb: float = MEMORY_MB) -> dict:
+    """
+    Bangun cache secara out-of-core: sumber (CSV / folder Parquet) dibaca per chunk (ukuran dibatasi `memory_mb`),
+    tiap chunk ditulis sebagai file part-N di partisinya dan di-fold ke cube berjalan
+    (sum, count, failure reason). Setelah itu tiap partisi diproses sendiri-sendiri:
+    file part di-compact, lalu per-user partials, sketch HLL, user index dan total
+    harian dibangun dari partisi itu saja. Tidak pernah ada DataFrame berisi seluruh histori.
+    Return meta cache.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    root, meta_path = cache_paths(csv_path, cache_dir)
+    tmp = root + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    parts, labels, cube, columns = {}, {c: set() for c in CATEGORY_COLS}, None, None
+    for i, chunk in enumerate(iter_source(csv_path, chunk_rows_for(csv_path, memory_mb))):
+        apply_schema(chunk)
+        columns = chunk.columns.tolist()
+        for c in CATEGORY_COLS:
+            labels[c].update(chunk[c].cat.categories)
+        for name, n in write_partitions(chunk, tmp, part=i).items():
+            parts[name] = parts.get(name, 0) + n
+        cube = build_cube(chunk) if cube is None else merge_cubes(cube, build_cube(chunk))
+        del chunk
+
+    # kategori global = union semua chunk (urut), sama seperti build satu DataFrame
+    categories = {c: sorted(labels[c]) for c in CATEGORY_COLS}
+    for c in CELL_DIMS:
+        check_cell_labels(c, len(categories[c]))
+    write_frame(apply_schema(cube, categories=categories), os.path.join(tmp, "cube.parquet"))
+    hll, uix, daily = [], [], []
+    for name in sorted(parts):
+        path = partition_path(tmp, *name.split("-"))
+        frame = compact_partition(path, categories)
+        write_frame(build_user_partials(frame), os.path.join(path, "users.parquet"))
+        hll.append(HLLSketches.build(frame, categories))
+        uix.append(UserIdIndex.build(frame, categories))
+        daily.append(DailyTotals.build(frame, categories))
+        del frame
+    HLLSketches.concat(hll).save(os.path.join(tmp, "users_hll.npz"))
+    UserIdIndex.concat(uix).save(os.path.join(tmp, "users_ix.npz"))
+    DailyTotals.concat(daily).save(os.path.join(tmp, "daily.npz"))
+
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp, root)
+    # cache single-file lama (sebelum partisi) tidak dipakai lagi
+    legacy = root + ".parquet"
+    if os.path.exists(legacy):
+        os.remove(legacy)
+    meta = {
+        "source": _source_stat(csv_path),
+        "sha1": file_digest(csv_path),
+        "schema_version": SCHEMA_VERSION,
+        "rows": int(sum(parts.values())),
+        "columns": columns,
+        "categories": categories,
+        "partitions": parts,
+        "ingested": {},
+    }
+    _write_meta(meta_path, meta)
+    return meta
+
+
+def _resident_bytes(value) -> int:
+    """Bytes di memori untuk entry resident: frame per-user partials atau list segmen."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return int(sum(f.memory_usage(index=True, deep=True).sum() + ix.nbytes for f, ix in value))
+
+
+class PartitionedDataset:
+    """
+    Dataset terpartisi year/month dengan partition pruning.
+    Partisi baru dibaca dari disk saat pertama dibutuhkan (lazy), lalu disimpan
+    di memori bersama bitmap index-nya. Cube selalu tersedia untuk semua chart.
+    Satu partisi bisa terdiri dari beberapa file (part-0 = hasil build, part-N =
+    hasil ingest harian); tiap file = satu segmen (frame, BitmapIndex).
+    Partisi resident (baris & per-user partials) dibatasi `max_bytes`; yang paling
+    lama tidak dipakai dilepas dulu (LRU) dan dibaca ulang dari disk bila perlu.
+    """
+
+    def __init__(self, root: str, meta: dict, meta_path: str | None = None,
+                 max_bytes: int | None = None):
+        self.root = root
+        self.meta = meta
+        self.meta_path = meta_path
+        self.categories = meta["categories"]
+        self.partitions = sorted(tuple(int(x) for x in k.split("-")) for k in meta["partitions"])
+        self.version = 0                        # naik setiap append (dipakai di cache key)
+        self.max_bytes = int(MEMORY_MB * 2**20) if max_bytes is None else max_bytes
+        self._loaded: dict = {}                 # (year, month) -> [(frame, BitmapIndex), ...]
+        self._users: dict = {}                  # (year, month) -> per-user partials
+        self._lru: OrderedDict = OrderedDict()  # (kind, year, month) -> bytes, urut akses
+        self._cube = None
+        self._user_hll = None
+        self._user_index = None
+        self._daily = None
+        self._lock = threading.RLock()
+        self._ingest_lock = threading.RLock()
+        self._exclusive = False                 # thread ini memegang cache_lock
+        self._meta_stamp = _meta_stamp(meta_path)
+
+    @property
+    def cube(self) -> pd.DataFrame:
+        if self._cube is None:
+            self._cube = read_frame(os.path.join(self.root, "cube.parquet"), self.categories)
+        return self._cube
+
+    @property
+    def user_hll(self) -> HLLSketches:
+        """HLL sketch distinct user per (year-month, category, channel, region)."""
+        if self._user_hll is None:
+            self._user_hll = HLLSketches.load(os.path.join(self.root, "users_hll.npz"))
+        return self._user_hll
+
+    @property
+    def user_index(self) -> UserIdIndex:
+        """Himpunan user_id exact per (year-month, category, channel, region)."""
+        if self._user_index is None:
+            self._user_index = UserIdIndex.load(os.path.join(self.root, "users_ix.npz"))
+        return self._user_index
+
+    @property
+    def daily(self) -> DailyTotals:
+        """Prefix sum harian per (category, channel, region) untuk query rentang tanggal."""
+        if self._daily is None:
+            self._daily = DailyTotals.load(os.path.join(self.root, "daily.npz"))
+        return self._daily
+
+    @property
+    def rows(self) -> int:
+        return int(sum(self.meta["partitions"].values()))
+
+    @property
+    def loaded(self) -> list:
+        return sorted(self._loaded)
+
+    def prune(self, year=None, month=None) -> list:
+        """(year, month) partitions that can contain rows for the selection."""
+        return [(y, m) for y, m in self.partitions
+                if (year is None or y == int(year)) and (month is None or m == int(month))]
+
+    def _read_segment(self, path: str) -> tuple[pd.DataFrame, BitmapIndex]:
+        frame = read_frame(path, self.categories)
+        return frame, BitmapIndex.build(frame)
+
+    def _resident(self, kind: str, key: tuple, store: dict, load):
+        """Ambil entry resident (tandai baru dipakai) atau load + evict LRU sampai <= max_bytes."""
+        with self._lock:
+            value = store.get(key)
+            if value is not None:
+                self._lru.move_to_end((kind, *key))
+                return value
+            value = load()
+            store[key] = value
+            self._lru[(kind, *key)] = _resident_bytes(value)
+            self._evict()
+            return value
+
+    def _evict(self) -> None:
+        # entry terakhir (yang baru dimuat) selalu dipertahankan
+        while len(self._lru) > 1 and sum(self._lru.values()) > self.max_bytes:
+            (kind, *key), _ = self._lru.popitem(last=False)
+            (self._loaded if kind == "rows" else self._users).pop(tuple(key), None)
+
+    def partition(self, year: int, month: int) -> list:
+        """Segments [(frame, BitmapIndex), ...] of one partition, loaded on first use."""
+        key = (int(year), int(month))
+        path = partition_path(self.root, *key)
+        return self._resident("rows", key, self._loaded,
+                              lambda: [self._read_segment(p) for p in _part_files(path)])
+
+    def user_partials(self, year: int, month: int) -> pd.DataFrame:
+        """Per-user partials (amount, txns per user per cell) satu partisi."""
+        key = (int(year), int(month))
+        path = os.path.join(partition_path(self.root, *key), "users.parquet")
+        return self._resident("users", key, self._users,
+                              lambda: read_frame(path, self.categories))
+
+    def select_user_partials(self, cats, chs, regs, year=None, month=None) -> pd.DataFrame:
+        """Per-user partials yang lolos filter (tanpa membaca baris mentah)."""
+        frames = [filter_frame(self.user_partials(y, m), cats, chs, regs)
+                  for y, m in self.prune(year, month)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def scan(self, year=None, month=None) -> pd.DataFrame:
+        """All rows of the pruned partitions (urut year, month)."""
+        frames = [f for y, m in self.prune(year, month) for f, _ in self.partition(y, m)]
+        return self._concat(frames)
+
+    def memory_bytes(self) -> int:
+        """Bytes partisi yang sedang resident (baris + bitmap index + per-user partials)."""
+        return int(sum(self._lru.values()))
+
+    def refresh(self) -> bool:
+        """
+        Muat ulang meta kalau file meta berubah sejak terakhir dibaca/ditulis proses ini
+        (mis. ingest oleh worker lain): partisi resident, cube & sketch dilepas (dibaca ulang
+        dari disk saat dibutuhkan) dan version naik. Cukup satu stat kalau tidak berubah.
+        """
+        stamp = _meta_stamp(self.meta_path)
+        if stamp is None or stamp == self._meta_stamp:
+            return False
+        with self._lock:
+            meta = _read_meta(self.meta_path)
+            if meta is None or meta.get("schema_version") != SCHEMA_VERSION:
+                return False
+            self.meta, self.categories = meta, meta["categories"]
+            self.partitions = sorted(tuple(int(x) for x in k.split("-")) for k in meta["partitions"])
+            self._loaded.clear()
+            self._users.clear()
+            self._lru.clear()
+            self._cube = self._user_hll = self._user_index = self._daily = None
+            self._meta_stamp = stamp
+            self.version += 1
+            return True
+
+    @contextmanager
+    def exclusive(self, blocking: bool = True):
+        """
+        Pegang cache_lock (reentrant di thread yang sama) untuk urutan baca manifest ->
+        append -> commit. Saat masuk: commit terputus diselesaikan lalu state disegarkan,
+        jadi ingest selalu berjalan di atas hasil commit worker lain. Yield False kalau
+        `blocking=False` dan lock sedang dipegang thread/proses lain.
+        """
+        if not self._ingest_lock.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            if self._exclusive:
+                yield True
+                return
+            with cache_lock(self.meta_path, blocking) as held:
+                if not held:
+                    yield False
+                    return
+                self._exclusive = True
+                try:
+                    recover_ingest(self.root, self.meta_path)
+                    self.refresh()
+                    yield True
+                finally:
+                    self._exclusive = False
+        finally:
+            self._ingest_lock.release()
+
+    def append(self, rows: pd.DataFrame, ingested: dict | None = None) -> list:
+        """
+        Tambahkan baris baru tanpa memproses ulang histori:
+        tiap (year, month) dapat file part-N baru, cube, per-user partials, sketch HLL,
+        user index & total harian di-merge dengan hasil dari baris baru, dan bitmap index hanya
+        dibangun untuk segmen baru.
+        Semua file ditulis dengan nama staging dulu; setelah semuanya jadi, satu commit
+        (commit_staged) me-rename-nya dan menyimpan meta + entry manifest `ingested`.
+        Gagal di tengah -> tidak ada yang terlihat dan file sumber bisa di-ingest ulang.
+        Berjalan di dalam exclusive(): part-N, cube & sketch di-merge dengan state terbaru di disk.
+        Return partisi yang tersentuh.
+        """
+        with self.exclusive(), self._lock:
+            self._extend_categories(rows)
+            rows = apply_schema(rows[self.meta["columns"]].copy(), categories=self.categories)
+            meta = json.loads(json.dumps(self.meta))
+            renames, segments = [], {}
+            try:
+                for (y, m), part in rows.groupby(["year", "month"], sort=True):
+                    key, name = (int(y), int(m)), f"{int(y)}-{int(m):02d}"
+                    path = partition_path(self.root, *key)
+                    os.makedirs(path, exist_ok=True)
+                    n = len(_part_files(path))
+                    part = part.reset_index(drop=True)
+                    renames += self._stage_frame(part, os.path.join(path, f"part-{n}.parquet"))
+                    users_path = os.path.join(path, "users.parquet")
+                    users = build_user_partials(part)
+                    if os.path.exists(users_path):
+                        users = merge_user_partials(self.user_partials(*key), users)
+                    renames += self._stage_frame(users, users_path)
+                    meta["partitions"][name] = meta["partitions"].get(name, 0) + len(part)
+                    segments[key] = part
+
+                cube = merge_cubes(self.cube, build_cube(rows))
+                renames += self._stage_frame(cube, os.path.join(self.root, "cube.parquet"))
+                hll = self.user_hll.merge(HLLSketches.build(rows, self.categories))
+                uix = self.user_index.merge(UserIdIndex.build(rows, self.categories))
+                daily = self.daily.merge(DailyTotals.build(rows, self.categories))
+                for sketch, name in ((hll, "users_hll.npz"), (uix, "users_ix.npz"), (daily, "daily.npz")):
+                    path = os.path.join(self.root, name)
+                    sketch.save(staged_path(path))
+                    renames.append((staged_path(path), path))
+                meta["rows"] = int(sum(meta["partitions"].values()))
+                meta.setdefault("ingested", {}).update(ingested or {})
+            except BaseException:
+                for src, _ in renames:
+                    if os.path.exists(src):
+                        os.remove(src)
+                raise
+            commit_staged(self.root, self.meta_path, renames, meta)
+            self._meta_stamp = _meta_stamp(self.meta_path)
+
+            # commit selesai -> baru state di memori ikut berubah
+            self.meta, self.categories = meta, meta["categories"]
+            for key, part in segments.items():
+                if key in self._loaded:
+                    self._loaded[key] = self._loaded[key] + [(part, BitmapIndex.build(part))]
+                    self._lru[("rows", *key)] = _resident_bytes(self._loaded[key])
+                # dibaca ulang dari disk saat dibutuhkan (dtype kategori global)
+                self._users.pop(key, None)
+                self._lru.pop(("users", *key), None)
+            self.partitions = sorted(set(self.partitions) | set(segments))
+            self._cube, self._user_hll, self._user_index, self._daily = cube, hll, uix, daily
+            self.version += 1
+            return sorted(segments)
+
+    @staticmethod
+    def _stage_frame(frame: pd.DataFrame, parquet_path: str) -> list:
+        """Tulis `frame` ke nama staging; return pasangan (staged, final) yang harus di-rename."""
+        staged = staged_path(parquet_path)
+        write_frame(frame, staged)
+        pairs = [(staged, parquet_path)]
+        if MMAP:
+            pairs.append((arrow_path(staged), arrow_path(parquet_path)))
+        return pairs
+
+    def save_meta(self) -> None:
+        """Tulis self.meta; ubah meta + panggil ini di dalam exclusive() (meta worker lain aman)."""
+        if self.meta_path:
+            with self.exclusive():
+                _write_meta(self.meta_path, self.meta)
+                self._meta_stamp = _meta_stamp(self.meta_path)
+
+    def _extend_categories(self, rows: pd.DataFrame) -> None:
+        """
+        Label baru (mis. region baru) ditambahkan di akhir; kode lama tidak berubah.
+        ValueError (sebelum apa pun diubah) kalau dimensi cell melewati batas label cell key.
+        """
+        added = {}
+        for c in CATEGORY_COLS:
+            vals = rows[c].fillna("") if c == "failure_reason" else rows[c]
+            new = sorted(set(vals.astype(str).unique()) - set(self.categories[c]))
+            if new:
+                if c in CELL_DIMS:
+                    check_cell_labels(c, len(self.categories[c]) + len(new))
+                added[c] = new
+        if not added:
+            return
+        for c, new in added.items():
+            self.categories[c] = self.categories[c] + new
+        if self._cube is not None:
+            self._cube = apply_schema(self._cube, categories=self.categories)
+        for key, segs in self._loaded.items():
+            self._loaded[key] = [(apply_schema(f, categories=self.categories), ix) for f, ix in segs]
+        for key, users in self._users.items():
+            self._users[key] = apply_schema(users, categories=self.categories)
+
+    def _concat(self, frames: list) -> pd.DataFrame:
+        if not frames:
+            if not self.partitions:
+                return pd.DataFrame()
+            return self.partition(*self.partitions[0])[0][0].iloc[0:0]
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+
+def open_dataset(csv_path: str = CSV_PATH, cache_dir: str = CACHE_DIR) -> PartitionedDataset:
+    """Partitioned view of the cache (dibangun dari CSV jika belum ada / basi)."""
+    root, meta_path = cache_paths(csv_path, cache_dir)
+    # worker lain bisa sedang ingest / build cache yang sama -> tunggu giliran
+    with cache_lock(meta_path):
+        recover_ingest(root, meta_path)
+        if not cache_is_fresh(csv_path, cache_dir):
+            build_cache(csv_path, cache_dir)
+        return PartitionedDataset(root, _read_meta(meta_path), meta_path)
+
+
+def load_transactions(csv_path: str = CSV_PATH, cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """Load all transactions from the Parquet cache, rebuilding it when the CSV changed."""
+    return open_dataset(csv_path, cache_dir).scan()
+
+
+def main():
+    # python data_store.py  -> laporan memori per kolom (CSV mentah vs skema ringkas)
+    raw = add_period_columns(pd.read_csv(CSV_PATH, parse_dates=["date"]))
+    compact = apply_schema(raw.copy())
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(memory_report(raw, compact))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# downsample.py
+# Largest-Triangle-Three-Buckets (LTTB, Steinarsson 2013) untuk trend harian.
+# Seri dibagi jadi n_out - 2 bucket; dari tiap bucket dipilih titik yang membentuk segitiga
+# terbesar dengan titik terpilih sebelumnya dan rata-rata bucket berikutnya. Bentuk garis
+# (puncak, lembah, perubahan tren) tetap terlihat dengan titik sebanyak lebar chart dalam
+# pixel, bukan ribuan titik per trace di JSON figure Plotly.
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Index titik terpilih (naik), termasuk titik pertama & terakhir.
+    `x` harus naik (mis. hari sebagai int); seri <= n_out titik dikembalikan utuh.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # bucket i = [edges[i], edges[i+1]) untuk titik 1..n-2; titik 0 & n-1 selalu dipakai
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # rata-rata tiap bucket sekaligus (reduceat); "bucket" setelah bucket terakhir = titik terakhir
+    sizes = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / sizes, x[-1])
+    mean_y = np.append(np.add.reduceat(y[:-1], edges[:-1]) / sizes, y[-1])
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nx, ny, xa, ya = mean_x[i + 1], mean_y[i + 1], x[a], y[a]
+        # 2x luas segitiga (titik a, kandidat, rata-rata bucket berikutnya)
+        area = np.abs((xa - nx) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (ny - ya))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
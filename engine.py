@@ -0,0 +1,188 @@
+# engine.py
+# Fused aggregation engine untuk render_dash.
+# Semua agregat dashboard dihitung dalam satu pass vektor di atas kode integer:
+# setiap baris dipetakan ke satu sel (period x category x region x status x failure_reason),
+# lalu np.bincount menjumlahkan amount / fee / txns per sel. KPI, trend, mix dan
+# reliability cukup di-reduce dari tensor kecil itu. Per-user juga lewat bincount.
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from cube import txn_weights
+
+MONTH_NAMES = {i: pd.Timestamp(2000, i, 1).strftime("%b") for i in range(1, 13)}
+WEEK_LABELS = ["W1", "W2", "W3", "W4", "W5"]
+PERIOD_KEY  = {"Weekly": "week", "Monthly": "month", "Quarterly": "quarter", "Yearly": "year"}
+
+
+@dataclass(frozen=True)
+class DashAggregates:
+    """Typed result bundle: everything render_dash draws for one filter state."""
+    period: str
+    gmv: float
+    fee: float
+    txns: int
+    users: int
+    trend: pd.DataFrame      # Period, GMV, Fee, Txn, success
+    cat: pd.DataFrame        # category, transactions, gmv, fee (urut transactions desc)
+    reg: pd.DataFrame        # region, transactions
+    sf: pd.DataFrame         # category, status, count
+    fr: pd.DataFrame         # failure_reason, Total (urut Total desc)
+    per_user: pd.DataFrame   # user_id, gmv, txns
+    users_error: float = 0.0 # 0 = exact; >0 = relative std error (HLL estimate)
+
+    @property
+    def empty(self) -> bool:
+        return self.txns == 0
+
+
+def _codes(frame: pd.DataFrame, col: str) -> tuple[np.ndarray, list]:
+    """Integer codes + labels for a categorical (or plain) column."""
+    s = frame[col]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(np.int64), s.cat.categories.tolist()
+    codes, labels = pd.factorize(s, sort=True)
+    return codes.astype(np.int64), labels.tolist()
+
+
+def _period_codes(frame: pd.DataFrame, period: str) -> tuple[np.ndarray, int, int]:
+    """Offset period values to 0..n-1 (small ints, no hashing)."""
+    v = frame[PERIOD_KEY[period]].to_numpy(np.int64)
+    lo = int(v.min())
+    return v - lo, lo, int(v.max()) - lo + 1
+
+
+def _trend_frame(period: str, lo: int, gmv, fee, txn, succ) -> pd.DataFrame:
+    present = np.flatnonzero(txn)
+    keys = present + lo
+    gmv, fee, txn, succ = gmv[present], fee[present], txn[present], succ[present]
+
+    if period == "Weekly":
+        # Map week -> W1..W5 (minggu ke-6 ikut W5), lalu re-agregasi per label
+        slot = np.minimum(np.arange(len(keys)), len(WEEK_LABELS) - 1)
+        n = int(slot.max()) + 1 if len(slot) else 0
+        gmv, fee = np.bincount(slot, gmv, n), np.bincount(slot, fee, n)
+        txn, succ = np.bincount(slot, txn, n), np.bincount(slot, succ, n)
+        labels = WEEK_LABELS[:n]
+    elif period == "Monthly":
+        labels = [MONTH_NAMES[int(k)] for k in keys]
+    elif period == "Quarterly":
+        labels = [f"Q{int(k)}" for k in keys]
+    else:  # Yearly
+        labels = [str(int(k)) for k in keys]
+
+    return pd.DataFrame({
+        "Period": labels,
+        "GMV": gmv,
+        "Fee": fee,
+        "Txn": txn.astype(np.int64),
+        "success": succ / txn,
+    })
+
+
+def aggregate_users(rows: pd.DataFrame | None) -> pd.DataFrame:
+    """Per-user gmv/txns via bincount over user_id offsets (urut user_id)."""
+    if rows is None or rows.empty:
+        return pd.DataFrame({"user_id": np.array([], np.int64),
+                             "gmv": np.array([], float), "txns": np.array([], np.int64)})
+    uid = rows["user_id"].to_numpy(np.int64)
+    w = txn_weights(rows).to_numpy(np.int64)
+    lo, hi = int(uid.min()), int(uid.max())
+    if hi - lo + 1 <= 4 * len(uid):
+        off = uid - lo
+        txns = np.bincount(off, w, hi - lo + 1)
+        gmv = np.bincount(off, rows["amount"].to_numpy(np.float64), hi - lo + 1)
+        keep = np.flatnonzero(txns)
+        ids = keep + lo
+        gmv, txns = gmv[keep], txns[keep]
+    else:
+        # id sangat jarang (sparse) -> factorize dulu supaya array bincount tetap kecil
+        ids, inv = np.unique(uid, return_inverse=True)
+        txns = np.bincount(inv, w, len(ids))
+        gmv = np.bincount(inv, rows["amount"].to_numpy(np.float64), len(ids))
+    return pd.DataFrame({"user_id": ids, "gmv": gmv, "txns": txns.astype(np.int64)})
+
+
+def aggregate(cells: pd.DataFrame, period: str, rows: pd.DataFrame | None = None) -> DashAggregates:
+    """
+    Hitung semua agregat dashboard dalam satu pass.
+    - cells: potongan cube (kolom `txns`) atau baris mentah (bobot 1)
+    - rows : baris mentah untuk metrik per-user (None => users kosong)
+    """
+    per_user = aggregate_users(rows)
+    if cells is None or cells.empty:
+        empty = pd.DataFrame()
+        return DashAggregates(period, 0.0, 0.0, 0, len(per_user),
+                              pd.DataFrame(columns=["Period", "GMV", "Fee", "Txn", "success"]),
+                              empty, empty, empty, empty, per_user)
+
+    p, lo, n_p = _period_codes(cells, period)
+    c, cat_labels = _codes(cells, "category")
+    r, reg_labels = _codes(cells, "region")
+    s, st_labels  = _codes(cells, "status")
+    f, fr_labels  = _codes(cells, "failure_reason")
+    n_c, n_r, n_s, n_f = len(cat_labels), len(reg_labels), len(st_labels), len(fr_labels)
+
+    # ---- satu kunci sel per baris, satu bincount per measure ----
+    key = (((p * n_c + c) * n_r + r) * n_s + s) * n_f + f
+    size = n_p * n_c * n_r * n_s * n_f
+    shape = (n_p, n_c, n_r, n_s, n_f)
+    txn = np.bincount(key, txn_weights(cells).to_numpy(np.float64), size).reshape(shape)
+    amt = np.bincount(key, cells["amount"].to_numpy(np.float64), size).reshape(shape)
+    fee = np.bincount(key, cells["fee_amount"].to_numpy(np.float64), size).reshape(shape)
+
+    # ---- reduksi tensor kecil ----
+    ok = st_labels.index("SUCCESS") if "SUCCESS" in st_labels else None
+    bad = st_labels.index("FAILED") if "FAILED" in st_labels else None
+
+    txn_p = txn.sum(axis=(1, 2, 3, 4))
+    succ_p = txn[:, :, :, ok, :].sum(axis=(1, 2, 3)) if ok is not None else np.zeros(n_p)
+    trend = _trend_frame(period, lo, amt.sum(axis=(1, 2, 3, 4)), fee.sum(axis=(1, 2, 3, 4)),
+                         txn_p, succ_p)
+
+    txn_c = txn.sum(axis=(0, 2, 3, 4))
+    pc = np.flatnonzero(txn_c)
+    cat = (pd.DataFrame({
+                "category": [cat_labels[i] for i in pc],
+                "transactions": txn_c[pc].astype(np.int64),
+                "gmv": amt.sum(axis=(0, 2, 3, 4))[pc],
+                "fee": fee.sum(axis=(0, 2, 3, 4))[pc],
+            })
+           .sort_values("transactions", ascending=False))
+
+    txn_r = txn.sum(axis=(0, 1, 3, 4))
+    pr = np.flatnonzero(txn_r)
+    reg = pd.DataFrame({"region": [reg_labels[i] for i in pr],
+                        "transactions": txn_r[pr].astype(np.int64)})
+
+    txn_cs = txn.sum(axis=(0, 2, 4))
+    ci, si = np.nonzero(txn_cs)
+    sf = pd.DataFrame({"category": [cat_labels[i] for i in ci],
+                       "status": [st_labels[i] for i in si],
+                       "count": txn_cs[ci, si].astype(np.int64)})
+
+    if bad is not None:
+        txn_f = txn[:, :, :, bad, :].sum(axis=(0, 1, 2))
+        fi = np.flatnonzero(txn_f)
+        fr = pd.DataFrame({"failure_reason": [fr_labels[i] or "Unknown" for i in fi],
+                           "Total": txn_f[fi].astype(np.int64)})
+        fr = (fr.groupby("failure_reason", as_index=False).sum()
+                .sort_values("Total", ascending=False))
+    else:
+        fr = pd.DataFrame({"failure_reason": [], "Total": np.array([], np.int64)})
+
+    return DashAggregates(
+        period=period,
+        gmv=float(amt.sum()),
+        fee=float(fee.sum()),
+        txns=int(txn_p.sum()),
+        users=len(per_user),
+        trend=trend,
+        cat=cat,
+        reg=reg,
+        sf=sf,
+        fr=fr,
+        per_user=per_user,
+    )
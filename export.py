@@ -0,0 +1,171 @@
+# export.py
+# Export baris terfilter secara streaming: tidak ada string CSV berisi seluruh data di memori.
+# Baris diambil per segmen partisi (pruning + bitmap index), dipotong per `chunk_rows`,
+# lalu ditulis langsung ke file tujuan sebagai gzip CSV, Parquet, atau CSV biasa.
+# Peak memori kerja selama export (chunk + buffer serialisasi + Arrow pool) diukur dan dilaporkan;
+# lewat tombol download, salinan file utuh yang dibaca Streamlit ke memori ikut dihitung.
+# Usage (optional): python export.py --year 2025 --month 3 --format parquet -o out.parquet
+
+import argparse
+import dataclasses
+import gzip
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_store import CSV_PATH, PartitionedDataset, open_dataset
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("TXN_EXPORT_CHUNK_ROWS", "100000"))
+
+# format -> (ekstensi file, mime)
+EXPORT_FORMATS = {
+    "csv.gz":  (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "csv":     (".csv", "text/csv"),
+}
+
+
+@dataclass(frozen=True)
+class ExportReport:
+    format: str
+    rows: int
+    bytes: int
+    seconds: float
+    peak_bytes: int          # working set saat menulis: chunk + buffer serialisasi + Arrow pool
+    copy_bytes: int = 0      # salinan file utuh di memori sesudahnya (media manager Streamlit)
+
+    @property
+    def total_peak_bytes(self) -> int:
+        return self.peak_bytes + self.copy_bytes
+
+    def __str__(self) -> str:
+        copy = f", incl. {self.copy_bytes / 1e6:,.1f} MB download copy" if self.copy_bytes else ""
+        return (f"{self.format}: {self.rows:,} rows -> {self.bytes / 1e6:,.1f} MB "
+                f"in {self.seconds * 1000:,.0f} ms (peak {self.total_peak_bytes / 1e6:,.1f} MB{copy})")
+
+
+def iter_chunks(data: PartitionedDataset, cats, chs, regs, year=None, month=None,
+                chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Baris terfilter per potongan <= chunk_rows (urut partisi, lalu segmen)."""
+    for y, m in data.prune(year, month):
+        for frame, index in data.partition(y, m):
+            pos = index.select(cats, chs, regs)
+            for i in range(0, len(pos), chunk_rows):
+                yield frame.take(pos[i:i + chunk_rows])
+
+
+def _write_csv(chunks, out, tick) -> int:
+    rows = 0
+    for chunk in chunks:
+        buf = chunk.to_csv(index=False, header=rows == 0).encode("utf-8")
+        tick(chunk, len(buf))
+        out.write(buf)
+        rows += len(chunk)
+    return rows
+
+
+def _write_parquet(chunks, out, tick) -> int:
+    rows, writer = 0, None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression="zstd")
+            tick(chunk, 0)                      # tabel Arrow chunk ada di memory pool
+            writer.write_table(table)
+            rows += len(chunk)
+            del table
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_export(data: PartitionedDataset, sel: dict, fmt: str, out,
+                 chunk_rows: int = EXPORT_CHUNK_ROWS) -> ExportReport:
+    """Tulis seleksi `sel` ke file object biner `out` dalam format `fmt`."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+    t0 = time.perf_counter()
+    pool = pa.default_memory_pool()
+    arrow_base, peak = pool.bytes_allocated(), 0
+
+    def tick(chunk, buf_bytes: int):
+        # working set per chunk: frame + buffer serialisasi + alokasi Arrow (allocator sendiri)
+        nonlocal peak
+        used = (int(chunk.memory_usage(index=True, deep=True).sum()) + buf_bytes
+                + max(pool.bytes_allocated() - arrow_base, 0))
+        peak = max(peak, used)
+
+    start = out.tell()
+    chunks = iter_chunks(data, **sel, chunk_rows=chunk_rows)
+    if fmt == "parquet":
+        rows = _write_parquet(chunks, out, tick)
+    elif fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6) as gz:
+            rows = _write_csv(chunks, gz, tick)
+    else:
+        rows = _write_csv(chunks, out, tick)
+    return ExportReport(fmt, rows, out.tell() - start, time.perf_counter() - t0, peak)
+
+
+class ExportLog:
+    """
+    Riwayat export terakhir (dibaca sidebar); aman dipakai dari thread download.
+    `on_add(report)` opsional dipanggil untuk tiap export (mis. sink timing).
+    """
+
+    def __init__(self, keep: int = 10, on_add=None):
+        self.keep = keep
+        self.history: list[ExportReport] = []
+        self.on_add = on_add
+        self._lock = threading.Lock()
+
+    def add(self, report: ExportReport) -> None:
+        with self._lock:
+            self.history = (self.history + [report])[-self.keep:]
+        if self.on_add is not None:
+            self.on_add(report)
+
+
+def export_callable(data: PartitionedDataset, sel: dict, fmt: str, log: ExportLog | None = None):
+    """
+    Callable untuk st.download_button(data=...): export baru dibuat saat tombol diklik,
+    ditulis ke file sementara di disk, lalu file object-nya diserahkan ke Streamlit.
+    Streamlit membaca seluruh file ke media manager-nya -> ukuran file masuk ke peak report.
+    """
+    def _run():
+        out = tempfile.TemporaryFile()
+        report = write_export(data, sel, fmt, out)
+        report = dataclasses.replace(report, copy_bytes=report.bytes)
+        if log is not None:
+            log.add(report)
+        out.seek(0)
+        return out
+    return _run
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream filtered transactions to a file")
+    ap.add_argument("--source", default=CSV_PATH)
+    ap.add_argument("--year", type=int)
+    ap.add_argument("--month", type=int)
+    ap.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv.gz")
+    ap.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    ap.add_argument("-o", "--output", required=True)
+    args = ap.parse_args()
+
+    data = open_dataset(args.source)
+    sel = dict(cats=data.categories["category"], chs=data.categories["channel"],
+               regs=data.categories["region"], year=args.year, month=args.month)
+    with open(args.output, "wb") as out:
+        print(write_export(data, sel, args.format, out, chunk_rows=args.chunk_rows))
+
+
+if __name__ == "__main__":
+    main()
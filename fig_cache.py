@@ -0,0 +1,89 @@
+# fig_cache.py
+# Cache figure Plotly per isi agregat: key = hash konten input (DataFrame hasil agregasi)
+# + opsi chart. Figure yang sama (mis. filter berbeda tapi hasil agregat identik, atau
+# rerun tanpa perubahan) tidak dibangun ulang lewat px/go + helper label/hover.
+# Figure yang di-cache dipakai bersama semua session -> jangan dimutasi setelah dibuat.
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from agg_cache import LRUCache, estimate_bytes
+
+
+def content_hash(*parts) -> str:
+    """Hash isi (bukan identitas objek) untuk DataFrame/Series/array/skalar/container."""
+    h = hashlib.blake2b(digest_size=16)
+
+    def feed(obj):
+        if isinstance(obj, pd.DataFrame):
+            h.update(repr((list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+            h.update(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes())
+        elif isinstance(obj, pd.Series):
+            h.update(repr((obj.name, str(obj.dtype))).encode())
+            h.update(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes())
+        elif isinstance(obj, np.ndarray):
+            h.update(repr((obj.dtype.str, obj.shape)).encode())
+            h.update(np.ascontiguousarray(obj).tobytes())
+        elif isinstance(obj, dict):
+            for k in sorted(obj, key=repr):
+                feed(k)
+                feed(obj[k])
+        elif isinstance(obj, (list, tuple)):
+            h.update(f"[{len(obj)}".encode())
+            for v in obj:
+                feed(v)
+        else:
+            h.update(repr(obj).encode())
+        h.update(b"|")
+
+    for p in parts:
+        feed(p)
+    return h.hexdigest()
+
+
+def figure_bytes(fig) -> int:
+    """Perkiraan ukuran figure: props trace (array numpy -> nbytes) + layout."""
+    # _data/_layout = dict props internal Plotly; to_dict()/to_plotly_json() men-deepcopy semuanya
+    return estimate_bytes(fig._data) + estimate_bytes(fig._layout)
+
+
+class FigureCache:
+    """
+    LRU figure per (nama chart, hash konten input, opsi).
+    Ukuran entry = perkiraan murah dari array data trace + layout (nbytes, tanpa serialisasi
+    JSON), dihitung sekali setelah build dan tidak ikut waktu build.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self._lru = LRUCache(max_entries=max_entries, max_bytes=max_bytes,
+                             sizeof=lambda entry: entry[1])
+        self._lock = threading.Lock()
+        self.build_seconds = 0.0            # total waktu build (miss)
+        self.saved_seconds = 0.0            # estimasi waktu build yang dihemat (hit)
+
+    def get_or_build(self, name: str, inputs, options: dict, build):
+        key = (name, content_hash(inputs, options))
+        entry = self._lru.get(key)
+        if entry is not None:
+            with self._lock:
+                self.saved_seconds += entry[2]
+            return entry[0]
+        t0 = time.perf_counter()
+        fig = build()
+        dt = time.perf_counter() - t0
+        spec_bytes = figure_bytes(fig)
+        with self._lock:
+            self.build_seconds += dt
+        self._lru.put(key, (fig, spec_bytes, dt))
+        return fig
+
+    def stats(self) -> dict:
+        s = self._lru.stats()
+        s.update(build_ms=self.build_seconds * 1000, saved_ms=self.saved_seconds * 1000)
+        return s
+
+    def clear(self) -> None:
+        self._lru.clear()
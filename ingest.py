@@ -0,0 +1,132 @@
+# ingest.py
+# Ingestion inkremental file transaksi harian dari drop directory (default data/incoming).
+# Hanya baris baru yang diproses: ditulis sebagai file part-N di partisi year/month-nya,
+# di-merge ke cube dan diberi bitmap index sendiri. Histori tidak pernah diproses ulang.
+# Satu file = satu commit (file staging + journal, data_store.commit_staged): gagal di tengah
+# tidak meninggalkan data setengah jadi, dan file baru tercatat di manifest setelah commit.
+# Beberapa worker boleh menjalankan watcher di cache yang sama: cek manifest -> append ->
+# commit berjalan di bawah lock antar proses (PartitionedDataset.exclusive), satu worker
+# ingest dan yang lain memuat ulang state dari meta (refresh).
+# Usage (optional): python ingest.py [--watch 30]
+
+import argparse
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from data_store import CSV_PATH, PartitionedDataset, add_period_columns, open_dataset
+
+DROP_DIR = os.environ.get("TXN_DROP_DIR", "data/incoming")
+
+
+@dataclass(frozen=True)
+class IngestReport:
+    file: str
+    rows: int
+    partitions: list
+    seconds: float
+
+    def __str__(self) -> str:
+        parts = ", ".join(f"{y}-{m:02d}" for y, m in self.partitions)
+        return f"{self.file}: {self.rows:,} rows -> [{parts}] in {self.seconds * 1000:,.0f} ms"
+
+
+def pending_files(data: PartitionedDataset, drop_dir: str = DROP_DIR) -> list[str]:
+    """CSV files in the drop dir that are not in the ingest manifest yet (urut nama)."""
+    if not os.path.isdir(drop_dir):
+        return []
+    done = data.meta.setdefault("ingested", {})
+    return sorted(e.path for e in os.scandir(drop_dir)
+                  if e.is_file() and e.name.endswith(".csv") and e.name not in done)
+
+
+def ingest_file(data: PartitionedDataset, path: str) -> IngestReport | None:
+    """
+    Append one daily file. File yang sudah tercatat di manifest (mis. di-ingest worker lain)
+    tidak dibaca lagi -> None.
+    """
+    with data.exclusive():
+        if os.path.basename(path) in data.meta.setdefault("ingested", {}):
+            return None
+        t0 = time.perf_counter()
+        rows = add_period_columns(pd.read_csv(path, parse_dates=["date"]))
+        stat = os.stat(path)
+        # entry manifest ikut commit append(): baru tercatat setelah semua file cache tertulis
+        entry = {os.path.basename(path): {
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "rows": len(rows),
+        }}
+        if len(rows):
+            touched = data.append(rows, ingested=entry)
+        else:
+            touched = []
+            data.meta["ingested"].update(entry)
+            data.save_meta()
+        return IngestReport(os.path.basename(path), len(rows), touched, time.perf_counter() - t0)
+
+
+def ingest_new_files(data: PartitionedDataset, drop_dir: str = DROP_DIR) -> list[IngestReport]:
+    with data.exclusive():
+        return [rep for p in pending_files(data, drop_dir) if (rep := ingest_file(data, p))]
+
+
+class IngestWatcher:
+    """
+    Polling drop dir paling sering sekali per `interval` detik.
+    Aman dipanggil dari banyak session dan banyak worker sekaligus: satu ingest berjalan pada
+    satu waktu; worker yang tidak kebagian lock memuat ulang hasilnya lewat data.refresh().
+    """
+
+    def __init__(self, data: PartitionedDataset, drop_dir: str = DROP_DIR,
+                 interval: float = 30.0, keep: int = 20):
+        self.data = data
+        self.drop_dir = drop_dir
+        self.interval = interval
+        self.keep = keep
+        self.history: list[IngestReport] = []
+        self._last = float("-inf")
+        self._lock = threading.Lock()
+
+    def poll(self, force: bool = False) -> list[IngestReport]:
+        # commit worker lain terlihat di request berikutnya (satu stat file meta)
+        self.data.refresh()
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return []
+        if not self._lock.acquire(blocking=False):
+            return []                           # session lain sedang ingest
+        try:
+            self._last = now
+            # force (CLI) menunggu giliran; poll dari request tidak ikut menunggu
+            with self.data.exclusive(blocking=force) as held:
+                if not held:
+                    return []                   # worker lain sedang ingest
+                reports = ingest_new_files(self.data, self.drop_dir)
+            self.history = (self.history + reports)[-self.keep:]
+            return reports
+        finally:
+            self._lock.release()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Append new daily transaction files to the store")
+    ap.add_argument("--source", default=CSV_PATH)
+    ap.add_argument("--drop-dir", default=DROP_DIR)
+    ap.add_argument("--watch", type=float, default=0,
+                    help="poll every N seconds (0 = ingest once and exit)")
+    args = ap.parse_args()
+
+    data = open_dataset(args.source)
+    watcher = IngestWatcher(data, args.drop_dir, interval=args.watch)
+    while True:
+        for rep in watcher.poll(force=True):
+            print(rep)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
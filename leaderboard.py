@@ -0,0 +1,50 @@
+# leaderboard.py
+# Top-K user leaderboard tanpa full sort.
+# Input: per-user totals (user_id, gmv, txns) hasil merge per-user partials periode terpilih.
+# Halaman ke-p cukup butuh (p+1)*size baris teratas: np.argpartition memilihnya dalam O(n),
+# lalu hanya kandidat itu yang diurutkan (O(k log k)). Tie diurutkan user_id naik supaya
+# halaman stabil (penting untuk sort by txns yang banyak nilai kembar).
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+SORT_COLUMNS = ["gmv", "txns"]
+
+
+@dataclass(frozen=True)
+class LeaderboardPage:
+    rows: pd.DataFrame      # user_id, gmv, txns (index = posisi di per_user)
+    page: int
+    n_pages: int
+    total: int
+    start: int              # rank (0-based) baris pertama di halaman ini
+
+
+def top_k_positions(values: np.ndarray, ids: np.ndarray, k: int) -> np.ndarray:
+    """Posisi k nilai terbesar (urut desc, tie -> id asc) tanpa mengurutkan semua n."""
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.array([], dtype=np.int64)
+    if k < n:
+        part = np.argpartition(values, n - k)[n - k:]
+        # nilai kembar di batas partisi: ikutkan semua agar urutan tie deterministik
+        cand = np.flatnonzero(values >= values[part].min())
+    else:
+        cand = np.arange(n)
+    order = np.lexsort((ids[cand], -values[cand]))
+    return cand[order[:k]]
+
+
+def leaderboard_page(per_user: pd.DataFrame, by: str = "gmv", page: int = 0,
+                     size: int = 200) -> LeaderboardPage:
+    """Satu halaman leaderboard (page 0-based) diurutkan `by` desc."""
+    if by not in SORT_COLUMNS:
+        raise ValueError(f"cannot sort leaderboard by {by!r}; expected one of {SORT_COLUMNS}")
+    total = len(per_user)
+    n_pages = max((total + size - 1) // size, 1)
+    page = min(max(int(page), 0), n_pages - 1)
+    start = page * size
+    pos = top_k_positions(per_user[by].to_numpy(), per_user["user_id"].to_numpy(), start + size)
+    return LeaderboardPage(per_user.iloc[pos[start:]], page, n_pages, total, start)
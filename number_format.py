@@ -0,0 +1,212 @@
+# number_format.py
+# Format angka (EN): 1,234,567 ; 1,234,567.89 ; short 10.25M ; Rp1,234.5
+# - fmt_en / fmt_rp / fmt_int / fmt_short : versi skalar (aturan acuan, dipakai KPI)
+# - *_array : versi vektor untuk label chart & tabel. Pembulatan ke sen dengan numpy,
+#   digit & pemisah ribuan dari aritmetika integer ke matriks karakter (tanpa loop per elemen).
+#   Nilai yang pembulatannya ambigu (nyaris .5 sen), non-finite atau sangat besar
+#   diformat ulang dengan versi skalar, jadi output selalu identik.
+
+import numpy as np
+
+_EXACT_LIMIT = 1e13          # |x| * 100 masih muat di int64 dengan ulp < 1 sen
+_SHORT_SCALES = [(1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "k")]
+
+
+# ---- skalar ----
+def fmt_en(x: float) -> str:
+    """Thousands with commas. No decimals if integer; else up to 2 decimals (trim zeros)."""
+    try:
+        xv = float(x)
+    except Exception:
+        return str(x)
+    s = f"{xv:,.2f}"
+    # jika bulat -> hilangkan desimal
+    if s.endswith("00"):
+        return f"{int(round(xv)):,}"
+    # jika ada pecahan -> pangkas trailing zero
+    return s.rstrip("0").rstrip(".")
+
+def fmt_rp(x: float) -> str:
+    return f"Rp{fmt_en(x)}"
+
+def fmt_int(x) -> str:
+    try:
+        return f"{int(x):,}"
+    except Exception:
+        return str(x)
+
+def fmt_short(x: float) -> str:
+    """K/M/B/T with exactly 2 decimals and NO space (e.g., 214.69k, 10.25M)."""
+    n = float(x)
+    if abs(n) >= 1e12:
+        return f"{n/1e12:,.2f}T"
+    if abs(n) >= 1e9:
+        return f"{n/1e9:,.2f}B"
+    if abs(n) >= 1e6:
+        return f"{n/1e6:,.2f}M"
+    if abs(n) >= 1e3:
+        return f"{n/1e3:,.2f}k"
+    return fmt_en(n)
+
+
+# ---- vektor ----
+# String dirakit sebagai matriks karakter UCS4 (n, lebar) dari aritmetika integer, lalu
+# di-view sebagai array '<U{lebar}' -- tidak ada operasi string per elemen / per kolom.
+_PAD = 0                                   # NUL di akhir baris dibuang numpy saat dibaca
+_MIN_VECTOR = 128                          # di bawah ini overhead numpy > loop skalar
+
+
+def _digit_count(ints: np.ndarray) -> np.ndarray:
+    pow10 = 10 ** np.arange(19, dtype=np.int64)
+    return np.maximum(np.searchsorted(pow10, ints, side="right"), 1)
+
+
+def _compose(neg: np.ndarray, ints: np.ndarray, tail: np.ndarray, tail_len: np.ndarray,
+             prefix: str = "") -> np.ndarray:
+    """
+    prefix + ['-'] + integer berpemisah ribuan + tail[:tail_len] per baris.
+    ints >= 0 (int64); tail = matriks kode karakter (n, T), rata kiri.
+    Bagian integer dirakit rata kanan (kiri diisi spasi), tail langsung menyambung;
+    sisa tail diisi NUL. Spasi depan dibuang dengan satu np.strings.lstrip.
+    """
+    n = len(ints)
+    ndig = _digit_count(ints)
+    head_len = ndig + (ndig - 1) // 3 + neg
+    wi = int(head_len.max(initial=1))
+    t = tail.shape[1]
+    # column-major: tiap kolom karakter ditulis kontigu
+    m = np.empty((wi + t, n), dtype=np.uint32)
+    q = ints.copy()
+    sign_at = np.where(neg, head_len - 1, -1)            # posisi '-' dihitung dari kanan
+    for j in range(wi):                                  # j = posisi dari kanan
+        col = m[wi - 1 - j]
+        if j % 4 == 3:
+            col[:] = ord(",")
+        else:
+            q, d = np.divmod(q, 10)
+            col[:] = d
+            col += ord("0")
+        col[sign_at == j] = ord("-")
+        col[head_len <= j] = ord(" ")
+    m[wi:] = tail.T
+    for k in range(t):
+        m[wi + k][tail_len <= k] = _PAD
+    body = np.ascontiguousarray(m.T).view(f"<U{wi + t}")[:, 0]
+    body = np.strings.lstrip(body, " ")
+    return np.strings.add(prefix, body) if prefix else body
+
+
+def _decimal_tail(frac: np.ndarray, n_dec: np.ndarray, suffix: np.ndarray | None = None):
+    """('.', d1, d2[, suffix]) dan panjangnya; n_dec = jumlah digit desimal (0/1/2)."""
+    cols = [np.full(len(frac), ord("."), dtype=np.uint32),
+            (frac // 10 + ord("0")).astype(np.uint32),
+            (frac % 10 + ord("0")).astype(np.uint32)]
+    length = np.where(n_dec > 0, n_dec + 1, 0)
+    if suffix is not None:
+        cols.append(suffix)
+        length = length + (suffix != _PAD)
+    return np.stack(cols, axis=1), length
+
+
+def _trimmed_decimals(frac: np.ndarray) -> np.ndarray:
+    # .50 -> .5 ; .00 -> "" (aturan fmt_en)
+    return np.where(frac == 0, 0, np.where(frac % 10 == 0, 1, 2))
+
+
+def _as_float(values) -> np.ndarray | None:
+    try:
+        return np.asarray(values, dtype=np.float64).ravel()
+    except (TypeError, ValueError):
+        return None
+
+
+def _cents(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (sen int64, mask fast-path). Di luar mask -> pakai fungsi skalar.
+    x*100 bisa meleset <= 1/2 ulp; kalau jarak ke .5 sen lebih kecil dari itu,
+    arah pembulatan belum pasti sama dengan format Python -> fallback.
+    Pengecualian: kelipatan 1/8 (0.125, 2.375, ...) adalah tie eksak dan x*100 eksak,
+    jadi np.round (half-even) sama dengan pembulatan format Python.
+    """
+    with np.errstate(invalid="ignore", over="ignore"):
+        c = x * 100
+        frac = c - np.floor(c)
+        eighth = x * 8
+        fast = (np.isfinite(x) & (np.abs(x) < _EXACT_LIMIT)
+                & ((np.abs(frac - 0.5) > 4 * np.spacing(np.abs(c)))
+                   | (eighth == np.floor(eighth))))
+    cents = np.where(fast, np.round(np.where(fast, c, 0)), 0).astype(np.int64)
+    return cents, fast
+
+
+def _fallback(out: np.ndarray, x, mask: np.ndarray, scalar) -> np.ndarray:
+    idx = np.flatnonzero(mask)
+    if len(idx):
+        out[idx] = [scalar(x[i]) for i in idx]
+    return out
+
+
+def _en_cents(cents: np.ndarray, prefix: str = "") -> np.ndarray:
+    a = np.abs(cents)
+    frac = a % 100
+    tail, tail_len = _decimal_tail(frac, _trimmed_decimals(frac))
+    return _compose(cents < 0, a // 100, tail, tail_len, prefix)
+
+
+def fmt_en_array(values, prefix: str = "") -> np.ndarray:
+    """Vektor fmt_en -> ndarray object (str). `prefix` ditempel di depan (mis. 'Rp')."""
+    x = _as_float(values)
+    if x is None:
+        return np.array([prefix + fmt_en(v) for v in np.asarray(values, dtype=object).ravel()],
+                        dtype=object)
+    if len(x) < _MIN_VECTOR:
+        return np.array([prefix + fmt_en(v) for v in x.tolist()], dtype=object)
+    cents, fast = _cents(x)
+    out = _en_cents(cents, prefix).astype(object)
+    return _fallback(out, x, ~fast, lambda v: prefix + fmt_en(v))
+
+
+def fmt_rp_array(values) -> np.ndarray:
+    return fmt_en_array(values, prefix="Rp")
+
+
+def fmt_int_array(values) -> np.ndarray:
+    """Vektor fmt_int (int() = truncate ke nol)."""
+    arr = np.asarray(values).ravel()
+    if len(arr) < _MIN_VECTOR:
+        return np.array([fmt_int(v) for v in arr.tolist()], dtype=object)
+    if arr.dtype.kind in "iub":
+        ints = arr.astype(np.int64)
+        fast = ints != np.iinfo(np.int64).min          # abs() overflow
+    elif arr.dtype.kind == "f":
+        fast = np.isfinite(arr) & (np.abs(arr) < 9e18)
+        ints = np.trunc(np.where(fast, arr, 0)).astype(np.int64)
+    else:
+        return np.array([fmt_int(v) for v in arr], dtype=object)
+    ints = np.where(fast, ints, 0)
+    no_tail = np.zeros((len(ints), 0), dtype=np.uint32)
+    out = _compose(ints < 0, np.abs(ints), no_tail, np.zeros(len(ints), dtype=np.int64))
+    return _fallback(out.astype(object), arr, ~fast, fmt_int)
+
+
+def fmt_short_array(values) -> np.ndarray:
+    """Vektor fmt_short: k/M/B/T 2 desimal tetap; |x| < 1000 -> fmt_en."""
+    x = _as_float(values)
+    if x is None:
+        raise TypeError("fmt_short_array needs numeric values")
+    if len(x) < _MIN_VECTOR:
+        return np.array([fmt_short(v) for v in x.tolist()], dtype=object)
+    a = np.abs(x)
+    scale = np.ones(len(x))
+    suffix = np.full(len(x), _PAD, dtype=np.uint32)
+    for s, suf in reversed(_SHORT_SCALES):
+        hit = a >= s
+        scale = np.where(hit, s, scale)
+        suffix = np.where(hit, ord(suf), suffix)
+    cents, fast = _cents(x / scale)
+    ac = np.abs(cents)
+    frac = ac % 100
+    n_dec = np.where(scale > 1, 2, _trimmed_decimals(frac))
+    tail, tail_len = _decimal_tail(frac, n_dec, suffix)
+    out = _compose(cents < 0, ac // 100, tail, tail_len).astype(object)
+    return _fallback(out, x, ~fast, fmt_short)
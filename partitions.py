@@ -0,0 +1,32 @@
+# partitions.py
+# Layout Parquet terpartisi year=YYYY/month=MM, dipakai cache (data_store.py) dan generator
+# data dummy skala besar (create_data_dummy.py --parquet) tanpa saling import.
+# Folder sumber ditulis dengan drop_keys=True: year/month hanya ada di nama folder (hive),
+# jadi pd.read_parquet(folder) / pyarrow dataset membacanya tanpa konflik tipe kolom
+# (int16 di file vs dictionary dari nama folder).
+
+import os
+
+import pandas as pd
+
+PARTITION_KEYS = ["year", "month"]
+
+
+def partition_path(root: str, year: int, month: int) -> str:
+    return os.path.join(root, f"year={int(year)}", f"month={int(month):02d}")
+
+
+def write_partitions(df: pd.DataFrame, root: str, part: int = 0, drop_keys: bool = False) -> dict:
+    """
+    Write one Parquet file per (year, month) as part-<part>; return {"YYYY-MM": rows}.
+    `drop_keys` = kolom year/month tidak ikut ditulis ke file (nilainya dari nama folder).
+    """
+    parts = {}
+    for (y, m), rows in df.groupby(PARTITION_KEYS, sort=True):
+        path = partition_path(root, y, m)
+        os.makedirs(path, exist_ok=True)
+        if drop_keys:
+            rows = rows.drop(columns=PARTITION_KEYS)
+        rows.to_parquet(os.path.join(path, f"part-{part}.parquet"), index=False)
+        parts[f"{int(y)}-{int(m):02d}"] = len(rows)
+    return parts
@@ -0,0 +1,104 @@
+# proc_memory.py
+# Laporan memori per proses dari /proc/<pid>/smaps (Linux): resident vs shared.
+# - rss     : semua page resident proses ini
+# - shared  : page resident yang juga dipetakan proses lain (Shared_Clean + Shared_Dirty)
+# - private : page resident milik proses ini saja (heap pandas/numpy, cache agregat, ...)
+# - pss     : rss dengan page shared dibagi rata ke semua pemetanya (jumlah pss semua
+#             worker = RAM fisik yang benar-benar dipakai)
+# - dataset_*: bagian dari angka di atas yang berasal dari file dataset .arrow (memory-mapped)
+# Usage (optional): python proc_memory.py [PID ...]   (default: semua proses streamlit)
+
+import argparse
+import os
+import re
+from dataclasses import dataclass
+
+import pandas as pd
+
+_FIELD = re.compile(r"^(Rss|Pss|Shared_Clean|Shared_Dirty|Private_Clean|Private_Dirty):\s+(\d+) kB", re.M)
+_NAMES = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+          "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+def _sum_fields(text: str) -> dict:
+    out = dict.fromkeys(("rss", "pss", "shared", "private"), 0)
+    for name, kb in _FIELD.findall(text):
+        out[_NAMES[name]] += int(kb) * 1024
+    return out
+
+
+@dataclass(frozen=True)
+class MemoryReport:
+    pid: int
+    rss: int
+    pss: int
+    shared: int
+    private: int
+    dataset_rss: int
+    dataset_shared: int
+    dataset_pss: int
+
+    def __str__(self) -> str:
+        mb = lambda b: f"{b / 1e6:,.1f} MB"
+        return (f"pid {self.pid}: RSS {mb(self.rss)} (shared {mb(self.shared)}, "
+                f"private {mb(self.private)}, PSS {mb(self.pss)}) · dataset mmap "
+                f"{mb(self.dataset_rss)} resident, {mb(self.dataset_shared)} shared")
+
+
+def memory_report(pid: int | str = "self", suffix: str = ".arrow") -> MemoryReport:
+    """Total dari /proc/<pid>/smaps_rollup; mapping file berakhiran `suffix` dari /proc/<pid>/smaps."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        total = _sum_fields(f.read())
+    with open(f"/proc/{pid}/smaps") as f:
+        text = f.read()
+    # blok mapping = baris header (alamat ... path) diikuti baris field sampai header berikutnya
+    block = re.compile(r"^[0-9a-f]+-[0-9a-f]+ [^\n]*" + re.escape(suffix) + r"\n((?:[A-Z][^\n]*\n)+)", re.M)
+    dataset = _sum_fields("".join(block.findall(text)))
+    return MemoryReport(os.getpid() if pid == "self" else int(pid), total["rss"], total["pss"],
+                        total["shared"], total["private"], dataset["rss"], dataset["shared"],
+                        dataset["pss"])
+
+
+def find_pids(pattern: str = "streamlit") -> list[int]:
+    """PID proses yang command line-nya memuat `pattern` (selain proses ini)."""
+    out = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit() or int(name) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{name}/cmdline", "rb") as f:
+                cmd = f.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        if pattern in cmd:
+            out.append(int(name))
+    return sorted(out)
+
+
+def report_frame(pids: list[int]) -> pd.DataFrame:
+    """Satu baris per worker (MB) + baris total; total pss = RAM fisik gabungan."""
+    rows = []
+    for pid in pids:
+        try:
+            rows.append(memory_report(pid))
+        except (FileNotFoundError, PermissionError, ProcessLookupError):
+            continue
+    df = pd.DataFrame([vars(r) for r in rows]).set_index("pid") / 1e6
+    df.loc["total"] = df.sum()
+    return df.round(1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Resident vs shared memory per worker (/proc smaps)")
+    ap.add_argument("pids", nargs="*", type=int)
+    ap.add_argument("--pattern", default="streamlit", help="cari worker dari command line")
+    args = ap.parse_args()
+    pids = args.pids or find_pids(args.pattern)
+    if not pids:
+        raise SystemExit(f"no process matching {args.pattern!r}")
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(report_frame(pids))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@
 # Versi dashboard dengan 4 tab periodik dan filter dinamis sesuai period
 # Pastikan file 'transactions_dummy.csv' ada di folder yang sama
 
+import os
+import time
+import uuid
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -11,56 +15,106 @@ import plotly.io as pio
 from itertools import count
 from plotly import graph_objects as go
 
+from analytics import API_HOST, API_PORT, TREND_POINTS, AnalyticsService, start_server
+from daily_totals import RangeAggregates
+from data_store import CSV_PATH, PartitionedDataset, open_dataset
+from engine import MONTH_NAMES, aggregate
+from export import EXPORT_FORMATS, ExportLog, export_callable
+from fig_cache import FigureCache
+from leaderboard import SORT_COLUMNS
+from proc_memory import MemoryReport, memory_report
+from number_format import fmt_en_array, fmt_int, fmt_int_array, fmt_rp, fmt_short_array
+from ingest import IngestWatcher
+from timing import TIMING_LOG, SectionTimer, TimingSink
+from warmup import CacheWarmer
+
 st.set_page_config(page_title="Synthetic Transactions Dashboard", layout="wide")
 pio.templates.default = "plotly_white"
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/transactions_dummy.csv", parse_dates=["date"])
-    df["year"] = df["date"].dt.year
-    df["month"] = df["date"].dt.month
-    df["week"] = df["date"].dt.isocalendar().week.astype(int)
-    df["quarter"] = df["date"].dt.quarter
-    return df
-
-MONTH_NAMES = {i: pd.Timestamp(2000, i, 1).strftime("%b") for i in range(1,13)}
-
-# ---- Number format (EN): 1,234,567 ; 1,234,567.89 ; short 10.25 M ----
-def fmt_en(x: float) -> str:
-    """Thousands with commas. No decimals if integer; else up to 2 decimals (trim zeros)."""
-    try:
-        xv = float(x)
-    except Exception:
-        return str(x)
-    s = f"{xv:,.2f}"
-    # jika bulat -> hilangkan desimal
-    if s.endswith("00"):
-        return f"{int(round(xv)):,}"
-    # jika ada pecahan -> pangkas trailing zero
-    return s.rstrip("0").rstrip(".")
-
-def fmt_rp(x: float) -> str:
-    return f"Rp{fmt_en(x)}"
-
-def fmt_int(x) -> str:
-    try:
-        return f"{int(x):,}"
-    except Exception:
-        return str(x)
-
-def fmt_short(x: float) -> str:
-    """K/M/B/T with exactly 2 decimals and NO space (e.g., 214.69k, 10.25M)."""
-    n = float(x)
-    if abs(n) >= 1e12:
-        return f"{n/1e12:,.2f}T"
-    if abs(n) >= 1e9:
-        return f"{n/1e9:,.2f}B"
-    if abs(n) >= 1e6:
-        return f"{n/1e6:,.2f}M"
-    if abs(n) >= 1e3:
-        return f"{n/1e3:,.2f}k"
-    return fmt_en(n)
-
+# "lazy"  -> hanya tab yang sedang dilihat yang dihitung (default)
+# "eager" -> st.tabs klasik, keempat tab dihitung setiap rerun
+TAB_MODE = os.environ.get("TXN_TAB_MODE", "lazy")
+PERIOD_TABS = {"Weekly": "W", "Monthly": "M", "Quarterly": "Q", "Yearly": "Y"}
+# tab rentang tanggal bebas (prefix sum harian, lihat daily_totals.py)
+RANGE_TAB   = "Date Range"
+TABS        = {**PERIOD_TABS, RANGE_TAB: "R"}
+RANGE_PRESETS = {"Custom": None, "Last 7 days": 7, "Last 30 days": 30, "Last 45 days": 45,
+                 "Last 90 days": 90, "Last 365 days": 365, "All history": 0}
+TREND_METRIC_LABELS = {"gmv": "GMV", "fee": "Fee", "txns": "Transactions", "success_rate": "Success Rate"}
+TREND_SPLITS = {"None": None, "Category": "category", "Channel": "channel", "Region": "region"}
+
+CAT_COLORS = {
+    "Airtime": "#4F46E5",             # indigo
+    "Electricity Prepaid": "#06B6D4", # cyan
+    "Data Bundle": "#22C55E",         # green
+    "Postpaid Bills": "#F59E0B",      # amber
+    "Micro-Insurance": "#EC4899",     # pink
+    "Water Utility": "#64748B",       # slate
+    }
+
+# batas cache agregat: TXN_CACHE_MAX_ENTRIES / TXN_CACHE_MAX_MB (lihat analytics.py)
+# batas cache figure Plotly (key = hash isi agregat + opsi chart)
+FIG_CACHE_MAX_ENTRIES = int(os.environ.get("TXN_FIG_CACHE_MAX_ENTRIES", "256"))
+FIG_CACHE_MAX_MB      = float(os.environ.get("TXN_FIG_CACHE_MAX_MB", "64"))
+# interval cek file harian baru di drop dir (lihat ingest.py)
+INGEST_POLL_SECONDS   = float(os.environ.get("TXN_INGEST_POLL_SECONDS", "30"))
+# jumlah baris per halaman leaderboard users
+LEADERBOARD_PAGE      = int(os.environ.get("TXN_LEADERBOARD_PAGE", "200"))
+# default toggle distinct users: 1 = exact (user index), 0 = approx (sketch HLL)
+EXACT_USERS_DEFAULT   = os.environ.get("TXN_EXACT_USERS", "1") == "1"
+# debug panel timing per section (toggle sidebar); log JSON lines via TXN_TIMING_LOG
+DEBUG_TIMINGS_DEFAULT = os.environ.get("TXN_DEBUG_TIMINGS", "0") == "1"
+
+@st.cache_resource
+def load_data() -> PartitionedDataset:
+    # CSV di-parse sekali ke Parquet terpartisi year/month (data/.cache) + rollup cube.
+    # Partisi baris mentah baru dibaca saat dibutuhkan (users & export) lalu di-share
+    # antar session (cache_resource, bukan salinan per session).
+    return open_dataset(CSV_PATH)
+
+@st.cache_resource
+def ingest_watcher() -> IngestWatcher:
+    return IngestWatcher(load_data(), interval=INGEST_POLL_SECONDS)
+
+@st.cache_resource
+def analytics_service() -> AnalyticsService:
+    # cache_resource -> satu service (dan satu cache agregat) untuk semua session;
+    # UI hanya memilih filter & menggambar hasil service ini
+    return AnalyticsService(load_data(), watcher=ingest_watcher())
+
+@st.cache_resource
+def cache_warmer() -> CacheWarmer:
+    # view default tiap tab dihitung di background (process pool, TXN_WARMUP / TXN_WARMUP_WORKERS)
+    # segera setelah server memuat data; diulang setelah ingest (versi data baru)
+    warmer = CacheWarmer(analytics_service(), exact_users=EXACT_USERS_DEFAULT)
+    warmer.start()
+    return warmer
+
+@st.cache_resource
+def api_server():
+    # TXN_API_PORT > 0: endpoint JSON ikut jalan di proses ini, berbagi cache dengan UI
+    return start_server(analytics_service(), API_HOST, API_PORT) if API_PORT else None
+
+@st.cache_resource
+def figure_cache() -> FigureCache:
+    return FigureCache(max_entries=FIG_CACHE_MAX_ENTRIES,
+                       max_bytes=int(FIG_CACHE_MAX_MB * 1024 * 1024))
+
+@st.cache_resource
+def export_log() -> ExportLog:
+    sink = timing_sink()
+    if sink is None:
+        return ExportLog()
+    # export jalan saat tombol diklik (thread download, di luar rerun) -> dicatat terpisah
+    return ExportLog(on_add=lambda rep: sink.write([{
+        "ts": time.time(), "name": f"export/{rep.format}", "depth": 0, "path": f"export/{rep.format}",
+        "ms": rep.seconds * 1000, "rows": rep.rows, "note": f"{rep.bytes} bytes"}]))
+
+@st.cache_resource
+def timing_sink() -> TimingSink | None:
+    return TimingSink(TIMING_LOG) if TIMING_LOG else None
+
+# ---- Number format (EN): lihat number_format.py (skalar untuk KPI, *_array untuk label & tabel) ----
 def format_number_short(value):
     if value >= 1_000_000:
         return f"{value/1_000_000:.2f}M"
@@ -74,7 +128,7 @@ def set_bar_text_per_trace(fig, values):
     - Single-trace: panjang text = jumlah bar
     - Multi-trace (tiap kategori 1 trace): text per-trace 1 nilai
     """
-    labels = [fmt_short(v) for v in values]
+    labels = fmt_short_array(values).tolist()
 
     if len(fig.data) == 1:
         tr = fig.data[0]
@@ -110,77 +164,91 @@ def kpi_card(title, value):
     </div>
     """, unsafe_allow_html=True)
 
-def agg_trend(dff, period):
-    import pandas as pd
-    if dff is None or dff.empty:
-        return pd.DataFrame(columns=["Period","GMV","Fee","Txn","success"])
-
-    if period == "Weekly":
-        # 1) Agregasi per ISO week
-        g = (dff.groupby("week")
-                .agg(GMV=("amount","sum"),
-                     Fee=("fee_amount","sum"),
-                     Txn=("amount","size"),
-                     success=("status", lambda s: (s == "SUCCESS").mean()))
-             ).reset_index().sort_values("week")
-
-        # 2) Map week -> W1..W5 (minggu ke-6 ikut W5)
-        weeks_sorted = g["week"].sort_values().unique().tolist()
-        labels = ["W1", "W2", "W3", "W4", "W5"]
-        week_to_w = {w: labels[min(i, 4)] for i, w in enumerate(weeks_sorted)}
-        g["Period"] = g["week"].map(week_to_w)
-
-        # 3) AGREGASI ULANG per Period (karena W5 bisa berisi >1 minggu)
-        gg = g.copy()
-        gg["success_num"] = gg["success"] * gg["Txn"]  # untuk rata-rata berbobot
-
-        gg = (gg.groupby("Period", as_index=False)
-                .agg(GMV=("GMV","sum"),
-                     Fee=("Fee","sum"),
-                     Txn=("Txn","sum"),
-                     success_num=("success_num","sum")))
-
-        gg["success"] = gg["success_num"] / gg["Txn"]
-        gg = gg.drop(columns=["success_num"])
-
-        # 4) Pastikan urutan kategori W1..W5 rapi
-        import pandas as pd
-        period_order = labels[:len(gg)]
-        gg["Period"] = pd.Categorical(gg["Period"], categories=labels, ordered=True)
-        gg = gg.sort_values("Period").reset_index(drop=True)
-
-        return gg
-
-    elif period == "Monthly":
-        g = (dff.groupby("month")
-                .agg(GMV=("amount","sum"),
-                     Fee=("fee_amount","sum"),
-                     Txn=("amount","size"),
-                     success=("status", lambda s: (s=="SUCCESS").mean()))
-             ).reset_index().sort_values("month")
-        g["Period"] = g["month"].map(MONTH_NAMES)
-
-    elif period == "Quarterly":
-        g = (dff.groupby("quarter")
-                .agg(GMV=("amount","sum"),
-                     Fee=("fee_amount","sum"),
-                     Txn=("amount","size"),
-                     success=("status", lambda s: (s=="SUCCESS").mean()))
-             ).reset_index().sort_values("quarter")
-        g["Period"] = "Q" + g["quarter"].astype(str)
-
-    else:  # Yearly
-        g = (dff.groupby("year")
-                .agg(GMV=("amount","sum"),
-                     Fee=("fee_amount","sum"),
-                     Txn=("amount","size"),
-                     success=("status", lambda s: (s=="SUCCESS").mean()))
-             ).reset_index().sort_values("year")
-        g["Period"] = g["year"].astype(str)
-
-    return g
+@st.cache_data(ttl=10, show_spinner=False)
+def worker_memory() -> MemoryReport | None:
+    # /proc/self/smaps ~10 ms -> cukup dibaca ulang tiap 10 detik per worker
+    try:
+        return memory_report()
+    except OSError:                             # bukan Linux
+        return None
+
+def cache_status(svc: AnalyticsService):
+    data = svc.data
+    s = svc.cache.stats()
+    st.sidebar.caption(
+        f"Aggregate cache: {s['entries']} entries · {s['bytes'] / 1e6:,.1f} MB · "
+        f"hits {s['hits']:,} / misses {s['misses']:,} ({s['hit_rate']:.0%}) · "
+        f"shared in-flight {s['coalesced']:,} · backend {svc.backend.name}"
+    )
+    warmer = cache_warmer()
+    if warmer.running:
+        st.sidebar.caption("Cache warm-up: running…")
+    elif warmer.error:
+        st.sidebar.caption(f"Cache warm-up failed: {warmer.error}")
+    elif warmer.history:
+        st.sidebar.caption(f"Cache warm-up: {warmer.history[-1]}")
+    server = api_server()
+    if server is not None:
+        r = server.RequestHandlerClass.response_cache.stats()
+        host, port = server.server_address[:2]
+        st.sidebar.caption(
+            f"JSON API: http://{host}:{port} · {r['entries']} responses · "
+            f"hit rate {r['hit_rate']:.0%}"
+        )
+    f = figure_cache().stats()
+    st.sidebar.caption(
+        f"Figure cache: {f['entries']} figures · {f['bytes'] / 1e6:,.1f} MB est. · "
+        f"hit rate {f['hit_rate']:.0%} · build {f['build_ms']:,.0f} ms total, "
+        f"~{f['saved_ms']:,.0f} ms saved"
+    )
+    st.sidebar.caption(
+        f"Resident data: {len(data.loaded)} row partitions + per-user partials · {data.memory_bytes() / 1e6:,.1f} MB "
+        f"(cap {data.max_bytes / 1e6:,.0f} MB, TXN_MEMORY_MB)"
+    )
+    mem = worker_memory()
+    if mem is not None:
+        st.sidebar.caption(
+            f"Worker memory (pid {mem.pid}): RSS {mem.rss / 1e6:,.0f} MB · shared {mem.shared / 1e6:,.0f} MB · "
+            f"private {mem.private / 1e6:,.0f} MB · dataset mmap {mem.dataset_rss / 1e6:,.0f} MB "
+            f"({mem.dataset_shared / 1e6:,.0f} MB shared with other workers)"
+        )
+    for rep in export_log().history[-3:]:
+        st.sidebar.caption(f"Export · {rep}")
+
+def ingest_status():
+    watcher = ingest_watcher()
+    version = watcher.data.version
+    reports = watcher.poll()
+    for rep in reports:
+        st.toast(f"Ingested {rep}")
+    if watcher.data.version != version:         # ingest di worker ini atau worker lain
+        cache_warmer().start()
+    if watcher.history:
+        st.sidebar.caption("Incremental ingest (terbaru):")
+        for rep in watcher.history[-5:]:
+            st.sidebar.caption(f"· {rep}")
+
+def keep_widget_state(prefixes):
+    """
+    Streamlit menghapus state widget yang tidak dirender pada satu run.
+    Di mode lazy, filter tab lain tidak dirender -> tulis ulang key-nya supaya tetap tersimpan.
+    """
+    for k in list(st.session_state.keys()):
+        if any(str(k).startswith(f"{p}_") for p in prefixes):
+            st.session_state[k] = st.session_state[k]
 
+def widget_default(key: str, value, options=None):
+    """
+    Nilai awal widget ber-key lewat Session State, hanya kalau key belum ada (atau nilainya
+    tidak ada lagi di `options`). Widget-nya sendiri tanpa index=/value=/default=, jadi
+    keep_widget_state tidak memicu warning "default value + Session State API".
+    """
+    if key not in st.session_state or (options is not None and st.session_state[key] not in options):
+        st.session_state[key] = value
 
+def agg_trend(dff, period):
+    """Trend per period. `dff` boleh baris mentah atau potongan cube (kolom `txns`)."""
+    return aggregate(dff, period).trend
 
 def filter_control(label: str, options: list[str], key: str) -> list[str]:
     """
@@ -192,16 +260,15 @@ def filter_control(label: str, options: list[str], key: str) -> list[str]:
     pick = st.selectbox(
         label,
         ["(All)", "(Custom...)"] + options,
-        index=0,
         key=f"{key}_select",
     )
     if pick == "(All)":
         return options
     if pick == "(Custom...)":
+        widget_default(f"{key}_custom", options)
         return st.multiselect(
             f"{label} — pilih item",
             options,
-            default=options,
             key=f"{key}_custom",
         )
     # single value
@@ -210,7 +277,7 @@ def filter_control(label: str, options: list[str], key: str) -> list[str]:
 def add_full_number_hover(fig, series, is_int=False):
     """Attach full-number hover text; works for single-trace & multi-trace (color='category')."""
     import numpy as np
-    vals = [(f"{int(v):,}" if is_int else fmt_en(v)) for v in series.tolist()]
+    vals = (fmt_int_array(series) if is_int else fmt_en_array(series)).tolist()
 
     # Single trace: cukup vektor
     if len(fig.data) == 1:
@@ -227,13 +294,28 @@ def add_full_number_hover(fig, series, is_int=False):
         tr.hovertemplate = "<b>%{x}</b><br>%{customdata}<extra></extra>"
     return fig
 
-def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
+def render_dash(period:str, svc:AnalyticsService, key_prefix:str, exact_users:bool=True,
+                timer:SectionTimer|None=None):
     kpi_css()
+    data = svc.data
+    timer = timer or SectionTimer()
 
     # --- unique key generator for charts in this tab ---
     _cid = count(1)
     def plot(fig, name: str):
-        st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_{name}_{next(_cid)}")
+        with timer.section(f"plot/{name}"):
+            st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_{name}_{next(_cid)}")
+
+    def cached_plot(name: str, inputs, build, **options):
+        """Figure dari cache (key = hash isi `inputs` + opsi); dibangun hanya saat miss."""
+        def timed_build():
+            with timer.section("build"):
+                return build()
+        with timer.section(f"chart/{name}", rows=len(inputs)) as sec:
+            fig = figure_cache().get_or_build(name, inputs, options, timed_build)
+            if not timer.has_children(sec):
+                sec.note = "cached"
+        plot(fig, name)
 
     def style_numeric(fig):
         fig.update_layout(separators=".,")      # ribuan '.', desimal ','
@@ -242,23 +324,24 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
         return fig
     st.subheader(f"{period} Dashboard — Filters")
 
-    cats_all = sorted(df["category"].unique().tolist())
-    chs_all  = sorted(df["channel"].unique().tolist())
-    regs_all = sorted(df["region"].unique().tolist())
-    years_all= sorted(df["year"].unique().tolist())
+    # opsi filter dari service (dibaca dari cube, di-cache per versi data)
+    opts = svc.options()
+    cats_all, chs_all, regs_all, years_all = opts["cats"], opts["chs"], opts["regs"], opts["years"]
 
     # --- WEEKLY FILTERS ---
     if period == "Weekly":
         # --- WEEKLY FILTERS ---
         c1, c2, c3, c4, c5 = st.columns([1, 1, 1, 1, 1])
         with c1:
-            year = st.selectbox("Year", years_all, index=len(years_all) - 1, key=f"{key_prefix}_year")
-        months_in_year = sorted(df.loc[df["year"] == year, "month"].unique().tolist())
+            widget_default(f"{key_prefix}_year", years_all[-1], years_all)
+            year = st.selectbox("Year", years_all, key=f"{key_prefix}_year")
+        months_in_year = opts["months"][year]
         with c2:
+            # ⬅️ default: bulan terakhir (juga saat bulan terpilih tidak ada di tahun baru)
+            widget_default(f"{key_prefix}_month", months_in_year[-1], months_in_year)
             month = st.selectbox(
                 "Month",
                 months_in_year,
-                index=(len(months_in_year) - 1),            # ⬅️ default: bulan terakhir
                 format_func=lambda m: MONTH_NAMES.get(m, ""),
                 key=f"{key_prefix}_month",
             )
@@ -269,23 +352,14 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
         with c5:
             regs = filter_control("Region", regs_all, key=f"{key_prefix}_regs")
 
-        dff = df[
-            (df["year"] == year)
-            & (df["month"] == month)
-            & (df["category"].isin(cats))
-            & (df["channel"].isin(chs))
-            & (df["region"].isin(regs))
-        ].copy()
-
-        if dff.empty:
-            st.warning("No data for the selected filters.")
-            return
+        sel = dict(cats=cats, chs=chs, regs=regs, year=year, month=month)
 
     # --- MONTHLY FILTERS ---
     elif period == "Monthly":
         c1, c2, c3, c4 = st.columns([1, 1, 1, 1])
         with c1:
-            year = st.selectbox("Year", years_all, index=len(years_all)-1, key=f"{key_prefix}_year")
+            widget_default(f"{key_prefix}_year", years_all[-1], years_all)
+            year = st.selectbox("Year", years_all, key=f"{key_prefix}_year")
         with c2:
             cats = filter_control("Category", cats_all, key=f"{key_prefix}_cats")
         with c3:
@@ -294,23 +368,15 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
             regs = filter_control("Region", regs_all, key=f"{key_prefix}_regs")
 
 
-        # ⬇️ Filter ke bulan terpilih
-        dff = df[
-            (df["year"]==year) &
-            (df["category"].isin(cats)) &
-            (df["channel"].isin(chs)) &
-            (df["region"].isin(regs))
-        ].copy()
-
-        if dff.empty:
-            st.warning("No data for the selected filters.")
-            return
+        # ⬇️ Filter ke tahun terpilih
+        sel = dict(cats=cats, chs=chs, regs=regs, year=year)
 
     # --- QUARTERLY FILTERS ---
     elif period == "Quarterly":
         c1, c2, c3, c4 = st.columns([1, 1, 1, 1])
         with c1:
-            year = st.selectbox("Year", years_all, index=len(years_all)-1, key=f"{key_prefix}_year")
+            widget_default(f"{key_prefix}_year", years_all[-1], years_all)
+            year = st.selectbox("Year", years_all, key=f"{key_prefix}_year")
         with c2:
             cats = filter_control("Category", cats_all, key=f"{key_prefix}_cats")
         with c3:
@@ -318,17 +384,8 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
         with c4:
             regs = filter_control("Region", regs_all, key=f"{key_prefix}_regs")
 
-        # ⬇️ Filter ke quarter terpilih
-        dff = df[
-            (df["year"]==year) &
-            (df["category"].isin(cats)) &
-            (df["channel"].isin(chs)) &
-            (df["region"].isin(regs))
-        ].copy()
-
-        if dff.empty:
-            st.warning("No data for the selected filters.")
-            return
+        # ⬇️ Filter ke tahun terpilih
+        sel = dict(cats=cats, chs=chs, regs=regs, year=year)
 
     # --- YEARLY FILTERS ---
     else:  # Yearly
@@ -341,208 +398,174 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
         with c4:
             regs = filter_control("Region", regs_all, key=f"{key_prefix}_regs")
     
-        dff = df[
-            (df["category"].isin(cats)) &
-            (df["channel"].isin(chs)) &
-            (df["region"].isin(regs))
-        ].copy()
-    
-        if dff.empty:
-            st.warning("No data for the selected filters.")
-            return
-
-
-    gmv = dff["amount"].sum()
-    fee = dff["fee_amount"].sum()
-    users = dff["user_id"].nunique()
-    txns = len(dff)
+        sel = dict(cats=cats, chs=chs, regs=regs)
+
+    # cube -> semua agregat; user index/HLL -> distinct user; baris mentah -> tabel users & export
+    # dihitung oleh AnalyticsService (satu pass fused, di-cache per (period, filter) lintas session)
+    with timer.section("compute_dash") as sec:
+        agg = svc.dashboard(period, sel, exact_users, timer)
+        if not timer.has_children(sec):
+            sec.note = "cached"
+    if agg.empty:
+        st.warning("No data for the selected filters.")
+        return
+    gmv, fee, users, txns = agg.gmv, agg.fee, agg.users, agg.txns
+    # approx (HLL): tampilkan '≈' + error standar
+    users_txt = fmt_int(users) if not agg.users_error else f"≈{fmt_int(users)}"
+    users_lbl = "Total Users" if not agg.users_error else f"Total Users (±{agg.users_error:.1%})"
 
     st.markdown(" ")
-    c1,c2,c3,c4 = st.columns(4, gap="large")
-    with c1: kpi_card("GMV", fmt_rp(gmv))
-    with c2: kpi_card("Fee Revenue", fmt_rp(fee))
-    with c3: kpi_card("Total Users", fmt_int(users))
-    with c4: kpi_card("Total Transactions", fmt_int(txns))
+    with timer.section("kpi_cards"):
+        c1,c2,c3,c4 = st.columns(4, gap="large")
+        with c1: kpi_card("GMV", fmt_rp(gmv))
+        with c2: kpi_card("Fee Revenue", fmt_rp(fee))
+        with c3: kpi_card(users_lbl, users_txt)
+        with c4: kpi_card("Total Transactions", fmt_int(txns))
 
     st.markdown("---")
 
     # ------- Overview -------
     st.subheader("Overview")
-    trend = agg_trend(dff, period)
+    trend = agg.trend
     co1,co2 = st.columns(2, gap="large")
     period_order = trend["Period"].tolist()
     with co1:
-        fig = px.bar(trend, x="Period", y="GMV", title=f"Total Transaction Value — {period}",
-                     category_orders={"Period": period_order}   # <-- pastikan urut W1..Wn
-                     )
-        ymax = float(trend["GMV"].max())
-        fig.update_yaxes(tickformat="~s", range=[0, ymax * 1.12])
-
-        # label di atas bar: 2 desimal (366.37M dst)
-        fig.update_traces(
-            text=trend["GMV"].apply(fmt_short),   # ← 2 desimal, tanpa spasi, k/M/B/T
-            texttemplate="%{text}",
-            textposition="outside",
-            cliponaxis=False,
-            textfont=dict(color="#111827")        # ⬅️ teks hitam
-        )
+        def build_trend_gmv():
+            fig = px.bar(trend, x="Period", y="GMV", title=f"Total Transaction Value — {period}",
+                         category_orders={"Period": period_order}   # <-- pastikan urut W1..Wn
+                         )
+            ymax = float(trend["GMV"].max())
+            fig.update_yaxes(tickformat="~s", range=[0, ymax * 1.12])
+
+            # label di atas bar: 2 desimal (366.37M dst)
+            fig.update_traces(
+                text=fmt_short_array(trend["GMV"]),   # ← 2 desimal, tanpa spasi, k/M/B/T
+                texttemplate="%{text}",
+                textposition="outside",
+                cliponaxis=False,
+                textfont=dict(color="#111827")        # ⬅️ teks hitam
+            )
 
-        # hover tetap angka full
-        fig.update_traces(
-            customdata=trend["GMV"].apply(fmt_en),
-            hovertemplate="<b>%{x}</b><br>%{customdata}<extra></extra>"
-        )
+            # hover tetap angka full
+            fig.update_traces(
+                customdata=fmt_en_array(trend["GMV"]),
+                hovertemplate="<b>%{x}</b><br>%{customdata}<extra></extra>"
+            )
+            return fig
 
-        plot(fig, "trend_gmv")
+        cached_plot("trend_gmv", trend[["Period", "GMV"]], build_trend_gmv, period=period)
     with co2:
-        fig = px.bar(trend, x="Period", y="Fee", title=f"Fee-based Revenue — {period}",
-                     category_orders={"Period": period_order}
-                     )
-        fig.update_yaxes(tickformat="~s")
+        def build_trend_fee():
+            fig = px.bar(trend, x="Period", y="Fee", title=f"Fee-based Revenue — {period}",
+                         category_orders={"Period": period_order}
+                         )
+            fig.update_yaxes(tickformat="~s")
+
+            fig.update_traces(
+                text=fmt_short_array(trend["Fee"]),   # ← 2 desimal (4.64M, 5.90M, dst)
+                texttemplate="%{text}",
+                textposition="outside",
+                cliponaxis=False,
+                textfont=dict(color="#111827")        # ⬅️ teks hitam
+            )
 
-        fig.update_traces(
-            text=trend["Fee"].apply(fmt_short),   # ← 2 desimal (4.64M, 5.90M, dst)
-            texttemplate="%{text}",
-            textposition="outside",
-            cliponaxis=False,
-            textfont=dict(color="#111827")        # ⬅️ teks hitam
+            fig.update_traces(
+                customdata=fmt_en_array(trend["Fee"]),
+                hovertemplate="<b>%{x}</b><br>%{customdata}<extra></extra>"
+            )
+            return fig
+
+        cached_plot("trend_fee", trend[["Period", "Fee"]], build_trend_fee, period=period)
+
+    # --- Success Rate line ---
+    def build_trend_sr():
+        sr = trend.copy()                      # trend = hasil agg_trend(dff, period)
+        sr["label"] = ""                       # kolom teks kosong untuk semua titik
+
+        imax = sr["success"].idxmax()          # index titik tertinggi
+        imin = sr["success"].idxmin()          # index titik terendah
+
+        # Jika imax==imin (semua sama), biarkan hanya satu label
+        sr.loc[imax, "label"] = f"{sr.loc[imax,'success']:.2%}"
+        if imax != imin:
+            sr.loc[imin, "label"] = f"{sr.loc[imin,'success']:.2%}"
+
+        # fig = px.line(trend, x="Period", y="success", markers=True, title=f"Success Rate — {period}")
+        fig = px.line(
+            sr,
+            x="Period",                         # pastikan sudah pakai 'Period' (W1..Wn / Jan..)
+            y="success",
+            text="label",                       # ⬅️ hanya max/min yang berisi teks
+            markers=True,
+            hover_data={  # sembunyikan kolom yang tidak mau ditampilkan
+                "label": False,
+                "Period": True,
+                "success": True
+            },
+            title=f"Success Rate — {period}",
+            category_orders={"Period": sr["Period"].tolist()}  # jaga urutan bila perlu
         )
 
+        fig.update_layout(
+            yaxis_title="Percentage",
+        )
+        fig.update_yaxes(tickformat=".0%")
         fig.update_traces(
-            customdata=trend["Fee"].apply(fmt_en),
-            hovertemplate="<b>%{x}</b><br>%{customdata}<extra></extra>"
+            textposition="top center",          # teks di atas titik
+            textfont=dict(color="#111827")      # warna teks hitam
         )
+        return fig
 
-        plot(fig, "trend_fee")
-
-    # --- Success Rate line ---
-    sr = trend.copy()                      # trend = hasil agg_trend(dff, period)
-    sr["label"] = ""                       # kolom teks kosong untuk semua titik
-    
-    imax = sr["success"].idxmax()          # index titik tertinggi
-    imin = sr["success"].idxmin()          # index titik terendah
-
-    # Jika imax==imin (semua sama), biarkan hanya satu label
-    sr.loc[imax, "label"] = f"{sr.loc[imax,'success']:.2%}"
-    if imax != imin:
-        sr.loc[imin, "label"] = f"{sr.loc[imin,'success']:.2%}"
-
-    # fig = px.line(trend, x="Period", y="success", markers=True, title=f"Success Rate — {period}")
-    fig = px.line(
-        sr,
-        x="Period",                         # pastikan sudah pakai 'Period' (W1..Wn / Jan..)
-        y="success",
-        text="label",                       # ⬅️ hanya max/min yang berisi teks
-        markers=True,
-        hover_data={  # sembunyikan kolom yang tidak mau ditampilkan
-            "label": False,
-            "Period": True,
-            "success": True
-        },
-        title=f"Success Rate — {period}",
-        category_orders={"Period": sr["Period"].tolist()}  # jaga urutan bila perlu
-    )
-    
-    fig.update_layout(
-        yaxis_title="Percentage",
-    )
-    fig.update_yaxes(tickformat=".0%")
-    fig.update_traces(
-        textposition="top center",          # teks di atas titik
-        textfont=dict(color="#111827")      # warna teks hitam
-    )
-    plot(fig, "trend_sr")
+    cached_plot("trend_sr", trend[["Period", "success"]], build_trend_sr, period=period)
 
     # ------- Business Mix -------
-    CAT_COLORS = {
-        "Airtime": "#4F46E5",             # indigo
-        "Electricity Prepaid": "#06B6D4", # cyan
-        "Data Bundle": "#22C55E",         # green
-        "Postpaid Bills": "#F59E0B",      # amber
-        "Micro-Insurance": "#EC4899",     # pink
-        "Water Utility": "#64748B",       # slate
-        }
     CAT_ORDER = list(CAT_COLORS.keys())
 
     st.subheader("Business Mix")
 
-    cat = (dff.groupby("category")
-              .agg(transactions=("amount","size"),
-                   gmv=("amount","sum"),
-                   fee=("fee_amount","sum"))
-              .reset_index()
-              .sort_values("transactions", ascending=False))
+    cat = agg.cat
 
-    # Row 1: Fee by Category & GMV by Category
-    r1c1, r1c2 = st.columns(2, gap="large")
-    with r1c1:
+    def build_cat_bar(col: str, title: str, is_int: bool):
         fig = go.Figure(go.Bar(
             x=cat["category"],
-            y=cat["fee"],
+            y=cat[col],
             marker_color=[CAT_COLORS[c] for c in cat["category"]],
             width=0.9  # batang lebih tebal (0..1 terhadap slot kategori)
         ))
         fig.update_layout(
-            title="Fee by Category",
+            title=title,
             bargap=0.05,              # jarak antar kategori
             showlegend=False,
             margin=dict(t=90, b=40),
             uniformtext_minsize=10,
             uniformtext_mode="hide"
         )
-        peak = float(cat["fee"].max())
-        fig.update_yaxes(range=[0, peak * 1.18], tickformat="~s", automargin=True)
-        set_bar_text_per_trace(fig, cat["fee"])
-        add_full_number_hover(fig, cat["fee"], is_int=False)
-        plot(fig, "mix_fee")
+        peak = float(cat[col].max())
+        fig.update_yaxes(range=[0, peak * 1.18], tickformat="~s", automargin=True)  # headroom 18%
+        set_bar_text_per_trace(fig, cat[col])
+        add_full_number_hover(fig, cat[col], is_int=is_int)
+        return fig
+
+    # Row 1: Fee by Category & GMV by Category
+    r1c1, r1c2 = st.columns(2, gap="large")
+    with r1c1:
+        cached_plot("mix_fee", cat[["category", "fee"]],
+                    lambda: build_cat_bar("fee", "Fee by Category", False), colors=CAT_COLORS)
     with r1c2:
-        fig = go.Figure(go.Bar(
-            x=cat["category"],
-            y=cat["gmv"],
-            marker_color=[CAT_COLORS[c] for c in cat["category"]],
-            width=0.9
-        ))
-        fig.update_layout(
-            title="GMV by Category",
-            bargap=0.05,
-            showlegend=False,
-            margin=dict(t=90, b=40),
-            uniformtext_minsize=10,
-            uniformtext_mode="hide"
-        )
-        peak = float(cat["gmv"].max())
-        fig.update_yaxes(range=[0, peak * 1.18], tickformat="~s", automargin=True)
-        set_bar_text_per_trace(fig, cat["gmv"])   
-        add_full_number_hover(fig, cat["gmv"], is_int=False)
-        plot(fig, "mix_gmv")
+        cached_plot("mix_gmv", cat[["category", "gmv"]],
+                    lambda: build_cat_bar("gmv", "GMV by Category", False), colors=CAT_COLORS)
 
     # Row 2: Txn share & Transactions by Region
     r2c1, r2c2 = st.columns(2, gap="large")
     with r2c1:
-        fig = go.Figure(go.Bar(
-            x=cat["category"],
-            y=cat["transactions"],
-            marker_color=[CAT_COLORS[c] for c in cat["category"]],
-            width=0.9
-        ))
-        fig.update_layout(
-            title="Share of Transactions by Category",
-            bargap=0.05,
-            showlegend=False,
-            margin=dict(t=90, b=40),
-            uniformtext_minsize=10,
-            uniformtext_mode="hide"
-        )
-        peak = float(cat["transactions"].max())
-        fig.update_yaxes(range=[0, peak * 1.18], tickformat="~s", automargin=True)  # headroom 18%
-        set_bar_text_per_trace(fig, cat["transactions"])  
-        add_full_number_hover(fig, cat["transactions"], is_int=True)
-        plot(fig, "mix_txn")
+        cached_plot("mix_txn", cat[["category", "transactions"]],
+                    lambda: build_cat_bar("transactions", "Share of Transactions by Category", True),
+                    colors=CAT_COLORS)
     with r2c2:
-        reg = (dff.groupby("region").agg(transactions=("amount","size")).reset_index())
-        fig = px.pie(reg, names="region", values="transactions", hole=0.25,
-                     title="Transactions by Region")
-        plot(fig, "mix_region")
+        reg = agg.reg
+        cached_plot("mix_region", reg,
+                    lambda: px.pie(reg, names="region", values="transactions", hole=0.25,
+                                   title="Transactions by Region"))
 
     # (Opsional) Row 3: GMV Share Pie per Category
     # r3c = st.container()
@@ -553,79 +576,63 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
 
     # ------- Reliability & Monitoring -------
     st.subheader("Reliability & Monitoring")
-    sf = (dff.groupby(["category","status"])
-          .size()
-          .reset_index(name="count"))
-    # Teks label di atas bar (pakai pemisah ribuan)
-    sf["count_txt"] = sf["count"].apply(lambda v: f"{int(v):,}")
 
     # Warna konsisten: SUCCESS = hijau, FAILED = merah
     STATUS_COLORS = {"SUCCESS": "#10B981", "FAILED": "#EF4444"}
-    
-    fig = px.bar(
-        sf, 
-        x="category", 
-        y="count", 
-        color="status", 
-        text="count_txt", 
-        barmode="group", 
-        title="Success vs Failed by Category",
-        category_orders={"status": ["SUCCESS", "FAILED"]},     # urutan legend
-        color_discrete_map=STATUS_COLORS
+
+    def build_rel_sf():
+        sf = agg.sf.copy()
+        # Teks label di atas bar (pakai pemisah ribuan)
+        sf["count_txt"] = sf["count"].apply(lambda v: f"{int(v):,}")
+
+        fig = px.bar(
+            sf, 
+            x="category", 
+            y="count", 
+            color="status", 
+            text="count_txt", 
+            barmode="group", 
+            title="Success vs Failed by Category",
+            category_orders={"status": ["SUCCESS", "FAILED"]},     # urutan legend
+            color_discrete_map=STATUS_COLORS
+            )
+
+        # Rapikan tampilan
+        fig.update_traces(
+            textposition="outside",                # teks di luar bar (di atas)
+            cliponaxis=False,                      # jangan terpotong di tepi
+            textfont=dict(color="#111827")         # teks hitam
         )
-    
-    # Rapikan tampilan
-    fig.update_traces(
-        textposition="outside",                # teks di luar bar (di atas)
-        cliponaxis=False,                      # jangan terpotong di tepi
-        textfont=dict(color="#111827")         # teks hitam
-    )
 
-    # Sumbu & hover
-    fig.update_layout(
-        xaxis_title="Category",
-        yaxis_title="Total",                   # ⬅️ ganti label sumbu-Y
-        legend_title_text="Status"
-    )
+        # Sumbu & hover
+        fig.update_layout(
+            xaxis_title="Category",
+            yaxis_title="Total",                   # ⬅️ ganti label sumbu-Y
+            legend_title_text="Status"
+        )
 
-    fig.update_yaxes(
-        tickformat="~s")  
+        fig.update_yaxes(
+            tickformat="~s")  
 
-    fig.update_traces(
-        customdata=sf[["status", "count"]],  # ⬅️ 2 kolom ke hover
-        hovertemplate=(
-            "status=%{customdata[0]}<br>"     # status asli
-            "category=%{x}<br>"
-            "total=%{customdata[1]:,}"        # total format ribuan
-            "<extra></extra>"
+        fig.update_traces(
+            customdata=sf[["status", "count"]],  # ⬅️ 2 kolom ke hover
+            hovertemplate=(
+                "status=%{customdata[0]}<br>"     # status asli
+                "category=%{x}<br>"
+                "total=%{customdata[1]:,}"        # total format ribuan
+                "<extra></extra>"
+            )
         )
-    )
+        return fig
 
-    plot(fig, "rel_sf")
+    cached_plot("rel_sf", agg.sf, build_rel_sf, colors=STATUS_COLORS)
 
-    failed = dff[dff.get("status", "").eq("FAILED")].copy()
-    if failed.empty:
+    # failure_reason "" sudah di-rename "Unknown" oleh engine; kolom 'Total'
+    fr = agg.fr
+    if fr.empty:
         st.info("Tidak ada transaksi FAILED untuk filter saat ini.")
-    elif "failure_reason" not in failed.columns:
-        st.info("Kolom 'failure_reason' tidak tersedia di dataset.")
     else:
-        failed["failure_reason"] = failed["failure_reason"].fillna("").replace("", "Unknown")
-    
-        # ↓ ganti 'count' → 'Total'
-        fr = (failed.groupby("failure_reason")
-                    .size()
-                    .reset_index(name="Total")
-                    .sort_values("Total", ascending=False)
-                    .head(15))
-    
-        if fr.empty:
-            st.info("Tidak ada data 'Failure Reasons' untuk filter saat ini.")
-        else:
-            fr = (failed.groupby("failure_reason")
-                        .size()
-                        .reset_index(name="Total")
-                        .sort_values("Total", ascending=False))
-
+        def build_rel_fr():
             fig = px.bar(
                 fr,
                 x="failure_reason",
@@ -646,8 +653,9 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
             ymax = float(fr["Total"].max())
             fig.update_yaxes(range=[0, ymax * 1.18])
             fig.update_traces(text=fr["Total"], textposition="outside", cliponaxis=False, textfont=dict(color="#111827") )
+            return fig
 
-            plot(fig, "rel_fr")
+        cached_plot("rel_fr", fr, build_rel_fr)
 
     # fr = (dff[dff["status"]=="FAILED"]
     #         .groupby("failure_reason").size()
@@ -658,45 +666,253 @@ def render_dash(period:str, df:pd.DataFrame, key_prefix:str):
 
     # ------- Users -------
     st.subheader("Users")
-    per_user = (dff.groupby("user_id")
-                   .agg(gmv=("amount","sum"), txns=("amount","size"))
-                   .reset_index())
+    # metrik dari user index / sketch HLL; tabel per-user dari per-user partials
+    with timer.section("compute_users") as sec:
+        per_user = svc.users(sel, timer)
+        if not timer.has_children(sec):
+            sec.note = "cached"
     colA,colB,colC = st.columns(3, gap="large")
 
-    active_users   = per_user["user_id"].nunique()
-    avg_gmv_user   = per_user["gmv"].mean()  if len(per_user)>0 else 0
-    total_txns     = int(per_user["txns"].sum()) if len(per_user)>0 else 0
-    avg_txn_user   = per_user["txns"].mean() if len(per_user)>0 else 0
+    active_users   = agg.users
+    avg_gmv_user   = agg.gmv / active_users if active_users > 0 else 0
+    total_txns     = agg.txns
 
     with colA:
-        st.metric("Active Users", fmt_int(per_user['user_id'].nunique()))
+        if agg.users_error:
+            st.metric("Active Users", f"≈{fmt_int(active_users)}",
+                      help=f"HyperLogLog estimate, standard error ±{agg.users_error:.1%}. "
+                           "Aktifkan 'Exact distinct users' di sidebar untuk hitungan exact.")
+        else:
+            st.metric("Active Users", fmt_int(active_users))
     with colB:
         st.metric("Avg GMV per Active User", fmt_rp(avg_gmv_user))
     with colC:
         st.metric("Total Transactions (Users)", fmt_int(total_txns))
 
+    # Leaderboard users — top-K via argpartition (tanpa full sort), bisa paging
+    lc1, lc2 = st.columns([1, 1])
+    with lc1:
+        by = st.radio("Sort users by", SORT_COLUMNS, horizontal=True, key=f"{key_prefix}_lb_by")
+    n_pages = max((len(per_user) + LEADERBOARD_PAGE - 1) // LEADERBOARD_PAGE, 1)
+    with lc2:
+        widget_default(f"{key_prefix}_lb_page", 1, range(1, n_pages + 1))
+        page = st.number_input("Page", min_value=1, max_value=n_pages, step=1,
+                               key=f"{key_prefix}_lb_page") - 1
+    with timer.section("leaderboard", rows=len(per_user), note=f"top {LEADERBOARD_PAGE} by {by}"):
+        lb = svc.leaderboard(sel, by=by, page=page, size=LEADERBOARD_PAGE)
+
     # Tabel users — full width + format kolom numerik
-    _tbl = per_user.sort_values("gmv", ascending=False).head(200).copy()
-    _tbl["gmv"]  = _tbl["gmv"].apply(fmt_en)   # 1,234,567.89
-    _tbl["txns"] = _tbl["txns"].apply(fmt_int)  # 12,345
-    st.dataframe(_tbl, use_container_width=True)
+    with timer.section("users_table", rows=len(lb.rows)):
+        _tbl = lb.rows.copy()
+        _tbl["gmv"]  = fmt_en_array(_tbl["gmv"])    # 1,234,567.89
+        _tbl["txns"] = fmt_int_array(_tbl["txns"])  # 12,345
+        st.dataframe(_tbl, use_container_width=True)
+    st.caption(f"Rank {lb.start + 1:,}–{lb.start + len(lb.rows):,} of {fmt_int(lb.total)} users "
+               f"(page {lb.page + 1:,}/{lb.n_pages:,})")
+
+    st.markdown("---")
+    # export dibuat hanya saat tombol diklik (deferred), ditulis streaming per chunk
+    fmt = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True,
+                   key=f"{key_prefix}_export_fmt")
+    ext, mime = EXPORT_FORMATS[fmt]
+    # file export baru ditulis saat diklik (di luar rerun) -> lihat 'Last export' di panel timing
+    with timer.section("export_button"):
+        st.download_button(f"Download filtered data ({fmt})",
+                           data=export_callable(data, sel, fmt, export_log()),
+                           file_name=f"filtered_{period.lower()}{ext}",
+                           mime=mime, on_click="ignore", key=f"download_{key_prefix}")
+
+def render_range(svc:AnalyticsService, key_prefix:str, timer:SectionTimer|None=None):
+    """Tab Date Range: total rentang tanggal bebas dari prefix sum harian (O(1) per cell)."""
+    kpi_css()
+    timer = timer or SectionTimer()
+
+    def cached_plot(name: str, inputs, build, **options):
+        with timer.section(f"chart/{name}", rows=len(inputs)) as sec:
+            fig = figure_cache().get_or_build(name, inputs, options, build)
+        with timer.section(f"plot/{name}"):
+            st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_{name}")
+
+    st.subheader("Date Range Dashboard — Filters")
+    opts = svc.options()
+    first, last = opts["dates"]
+    range_key, preset_key = f"{key_prefix}_range", f"{key_prefix}_preset"
+    widget_default(range_key, svc.default_range())
+
+    def apply_preset():
+        days = RANGE_PRESETS[st.session_state[preset_key]]
+        if days is not None:
+            st.session_state[range_key] = svc.default_range(days) if days else (first, last)
+
+    c1, c2, c3, c4 = st.columns([1, 1, 1, 1])
+    with c1:
+        st.selectbox("Quick range", list(RANGE_PRESETS), key=preset_key, on_change=apply_preset)
+    with c2:
+        cats = filter_control("Category", opts["cats"], key=f"{key_prefix}_cats")
+    with c3:
+        chs  = filter_control("Channel",  opts["chs"],  key=f"{key_prefix}_chs")
+    with c4:
+        regs = filter_control("Region", opts["regs"], key=f"{key_prefix}_regs")
+    # slider digeser -> preset kembali "Custom"
+    start, end = st.slider("Date range", min_value=first, max_value=last, key=range_key,
+                           format="YYYY-MM-DD",
+                           on_change=lambda: st.session_state.update({preset_key: "Custom"}))
+
+    sel = dict(cats=cats, chs=chs, regs=regs)
+    with timer.section("compute_range"):
+        agg: RangeAggregates = svc.date_range(sel, start, end, timer)
+    if agg.empty:
+        st.warning("No data for the selected filters.")
+        return
+
+    st.markdown(" ")
+    with timer.section("kpi_cards"):
+        c1,c2,c3,c4 = st.columns(4, gap="large")
+        with c1: kpi_card("GMV", fmt_rp(agg.gmv))
+        with c2: kpi_card("Fee Revenue", fmt_rp(agg.fee))
+        with c3: kpi_card("Total Transactions", fmt_int(agg.txns))
+        with c4: kpi_card("Success Rate", f"{agg.success_rate:.2%}")
+    st.caption(f"{start:%d %b %Y} – {end:%d %b %Y} · {agg.days:,} days. "
+               "Distinct users tidak tersedia untuk rentang bebas (tidak bisa dijumlahkan per hari).")
 
     st.markdown("---")
-    st.download_button("Download filtered data (CSV)",
-                       data=dff.to_csv(index=False).encode("utf-8"),
-                       file_name=f"filtered_{period.lower()}.csv",
-                       mime="text/csv")
+    # ------- Daily trend: LTTB server-side ke TREND_POINTS titik per series -------
+    st.subheader("Daily Trend")
+    t1, t2 = st.columns([1, 1])
+    with t1:
+        metric = st.radio("Metric", list(TREND_METRIC_LABELS), horizontal=True,
+                          format_func=TREND_METRIC_LABELS.get, key=f"{key_prefix}_trend_metric")
+    with t2:
+        split = st.radio("Split by", list(TREND_SPLITS), horizontal=True, key=f"{key_prefix}_trend_by")
+    with timer.section("compute_trend") as sec:
+        trend = svc.daily_trend(sel, start, end, metric, TREND_SPLITS[split], TREND_POINTS, timer)
+        if not timer.has_children(sec):
+            sec.note = "cached"
+
+    def build_daily_trend():
+        fig = go.Figure()
+        for name, g in trend.frame.groupby("series", sort=False):
+            fig.add_trace(go.Scatter(x=g["date"], y=g["value"], mode="lines", name=name,
+                                     line=dict(width=1.5, color=CAT_COLORS.get(name))))
+        fig.update_layout(title=f"Daily {TREND_METRIC_LABELS[metric]} — {trend.start:%d %b %Y} – {trend.end:%d %b %Y}",
+                          dragmode="select", selectdirection="h", hovermode="x unified",
+                          showlegend=len(fig.data) > 1, margin=dict(t=60, b=30))
+        fig.update_yaxes(tickformat=".0%" if metric == "success_rate" else "~s")
+        return fig
+
+    def zoom_to_selection():
+        # box-select di chart = zoom: rentang slider diganti -> detail dihitung ulang di server
+        selection = st.session_state[f"{key_prefix}_daily_trend"].selection
+        xs = [b["x"] for b in selection.get("box", [])] or [[p["x"] for p in selection.get("points", [])]]
+        days = sorted(pd.Timestamp(x).date() for x in sum(xs, []))
+        if days:
+            lo, hi = max(days[0], first), min(days[-1], last)
+            if lo <= hi:
+                st.session_state[range_key] = (lo, hi)
+                st.session_state[preset_key] = "Custom"
+
+    with timer.section("chart/daily_trend", rows=trend.points) as sec:
+        fig = figure_cache().get_or_build("daily_trend", trend.frame, {"metric": metric},
+                                          build_daily_trend)
+    with timer.section("plot/daily_trend"):
+        st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_daily_trend",
+                        on_select=zoom_to_selection, selection_mode="box")
+    st.caption(f"{trend.points:,} of {trend.raw_points:,} daily points "
+               + (f"(LTTB, max {TREND_POINTS:,} per series). " if trend.downsampled else "(full detail). ")
+               + "Box-select a period on the chart to zoom in; detail is re-resolved server-side.")
+
+    st.subheader("Business Mix")
+    cat, ch, reg = agg.cat, agg.ch, agg.reg
+
+    def build_bar(frame: pd.DataFrame, dim: str, col: str, title: str, is_int: bool):
+        colors = [CAT_COLORS.get(c, "#4F46E5") for c in frame[dim]] if dim == "category" else "#4F46E5"
+        fig = go.Figure(go.Bar(x=frame[dim], y=frame[col], marker_color=colors, width=0.8))
+        fig.update_layout(title=title, bargap=0.05, showlegend=False, margin=dict(t=90, b=40))
+        fig.update_yaxes(range=[0, float(frame[col].max()) * 1.18], tickformat="~s", automargin=True)
+        set_bar_text_per_trace(fig, frame[col])
+        add_full_number_hover(fig, frame[col], is_int=is_int)
+        return fig
 
-df = load_data()
+    r1c1, r1c2 = st.columns(2, gap="large")
+    with r1c1:
+        cached_plot("range_gmv", cat[["category", "gmv"]],
+                    lambda: build_bar(cat, "category", "gmv", "GMV by Category", False),
+                    colors=CAT_COLORS)
+    with r1c2:
+        cached_plot("range_fee", cat[["category", "fee"]],
+                    lambda: build_bar(cat, "category", "fee", "Fee by Category", False),
+                    colors=CAT_COLORS)
+    r2c1, r2c2 = st.columns(2, gap="large")
+    with r2c1:
+        cached_plot("range_channel", ch[["channel", "txns"]],
+                    lambda: build_bar(ch, "channel", "txns", "Transactions by Channel", True))
+    with r2c2:
+        cached_plot("range_region", reg[["region", "txns"]],
+                    lambda: px.pie(reg, names="region", values="txns", hole=0.25,
+                                   title="Transactions by Region"))
+
+    st.subheader("Reliability")
+    with timer.section("range_table", rows=len(cat)):
+        tbl = cat.copy()
+        tbl["gmv"] = fmt_en_array(tbl["gmv"])
+        tbl["fee"] = fmt_en_array(tbl["fee"])
+        tbl["txns"] = fmt_int_array(tbl["txns"])
+        tbl["success"] = fmt_int_array(tbl["success"])
+        tbl["success_rate"] = [f"{v:.2%}" for v in cat["success_rate"]]
+        st.dataframe(tbl, hide_index=True, use_container_width=True)
+
+def render_tab(name: str, svc: AnalyticsService, exact_users: bool, timer: SectionTimer):
+    if name == RANGE_TAB:
+        render_range(svc, key_prefix=TABS[name], timer=timer)
+    else:
+        render_dash(name, svc, key_prefix=TABS[name], exact_users=exact_users, timer=timer)
+
+def timing_panel(timer: SectionTimer):
+    """Debug panel: ms & baris per section untuk rerun ini (+ export terakhir)."""
+    with st.sidebar.expander("Timings (this rerun)", expanded=True):
+        st.caption(f"Total {timer.elapsed_ms:,.0f} ms · session {timer.context['session']}"
+                   + (f" · log → {TIMING_LOG}" if TIMING_LOG else ""))
+        st.dataframe(timer.frame(), hide_index=True, use_container_width=True)
+        for rep in export_log().history[-1:]:
+            st.caption(f"Last export (on click): {rep}")
+
+# satu timer per rerun; id session untuk agregasi log lintas session
+if "timing_session" not in st.session_state:
+    st.session_state["timing_session"] = uuid.uuid4().hex[:8]
+timer = SectionTimer({"session": st.session_state["timing_session"], "tab_mode": TAB_MODE})
+
+with timer.section("load_data"):
+    svc = analytics_service()
+    cache_warmer()
+    api_server()
+with timer.section("ingest_poll"):
+    ingest_status()
 st.title("Transaction Analytics Dashboard")
 st.caption("All figures are synthetic and for demo purposes only.")
 
-tabW, tabM, tabQ, tabY = st.tabs(["Weekly", "Monthly", "Quarterly", "Yearly"])
-with tabW:
-    render_dash("Weekly", df, key_prefix="W")
-with tabM:
-    render_dash("Monthly", df, key_prefix="M")
-with tabQ:
-    render_dash("Quarterly", df, key_prefix="Q")
-with tabY:
-    render_dash("Yearly", df, key_prefix="Y")
+exact_users = st.sidebar.toggle(
+    "Exact distinct users", value=EXACT_USERS_DEFAULT, key="exact_users",
+    help="Off: Total/Active Users dari sketch HyperLogLog (approx, tanpa scan baris). "
+         "On: hitungan exact dari bitmap user_id per cell.")
+show_timings = st.sidebar.toggle(
+    "Show timings", value=DEBUG_TIMINGS_DEFAULT, key="debug_timings",
+    help="Panel debug: milidetik & baris yang diproses per section pada rerun ini.")
+
+if TAB_MODE == "eager":
+    for tab, period in zip(st.tabs(list(TABS)), TABS):
+        with tab, timer.section(f"render_dash/{period}"):
+            render_tab(period, svc, exact_users, timer)
+else:
+    # st.tabs hanya menyembunyikan konten (semua tab tetap dieksekusi);
+    # di sini hanya tab aktif yang dirender & dihitung.
+    keep_widget_state(TABS.values())
+    period = st.radio("Period", list(TABS), horizontal=True,
+                      key="active_tab", label_visibility="collapsed")
+    with timer.section(f"render_dash/{period}"):
+        render_tab(period, svc, exact_users, timer)
+
+cache_status(svc)
+if show_timings:
+    timing_panel(timer)
+if timing_sink() is not None:
+    timing_sink().write(timer.records())
@@ -0,0 +1,119 @@
+# timing.py
+# Instrumentasi hot path dashboard: timer per section (ms + baris diproses) untuk satu rerun.
+# - SectionTimer : dibuat sekali per rerun; section boleh bersarang (compute_dash > filter/...)
+# - TimingSink   : sink JSON lines (TXN_TIMING_LOG), satu record per section, aman lintas thread
+# - latency_percentiles : p50/p90/p99 per section dari file log (lintas session)
+# Usage (optional): python timing.py data/timings.jsonl [--by path | name | session,name]
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+TIMING_LOG = os.environ.get("TXN_TIMING_LOG", "")    # kosong = sink mati
+
+
+@dataclass
+class Section:
+    name: str
+    depth: int
+    ms: float = 0.0
+    rows: int | None = None
+    note: str = ""
+
+
+class SectionTimer:
+    """Kumpulan section satu rerun, urut waktu mulai (parent sebelum child)."""
+
+    def __init__(self, context: dict | None = None):
+        self.context = dict(context or {})
+        self.sections: list[Section] = []
+        self._depth = 0
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def section(self, name: str, rows: int | None = None, note: str = ""):
+        """`with timer.section("filter", rows=n) as s:` -- s.rows / s.note boleh diisi di dalam."""
+        rec = Section(name, self._depth, rows=rows, note=note)
+        self.sections.append(rec)
+        self._depth += 1
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec.ms = (time.perf_counter() - t0) * 1000
+            self._depth -= 1
+
+    def has_children(self, rec: Section) -> bool:
+        i = self.sections.index(rec)
+        return i + 1 < len(self.sections) and self.sections[i + 1].depth > rec.depth
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def frame(self) -> pd.DataFrame:
+        """Tabel untuk debug panel (nama di-indent sesuai kedalaman)."""
+        return pd.DataFrame({
+            "section": [" " * s.depth + s.name for s in self.sections],
+            "ms": [round(s.ms, 1) for s in self.sections],
+            "rows": pd.array([s.rows for s in self.sections], dtype="Int64"),
+            "note": [s.note for s in self.sections],
+        })
+
+    def records(self) -> list[dict]:
+        """Satu dict per section + `path` (nama parent/.../section) untuk agregasi log."""
+        ts, stack, out = time.time(), [], []
+        for s in self.sections:
+            del stack[s.depth:]
+            stack.append(s.name)
+            out.append({"ts": ts, **self.context, **asdict(s), "path": "/".join(stack)})
+        return out
+
+
+class TimingSink:
+    """Append record ke file JSON lines (satu baris per section)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, records: list[dict]) -> None:
+        if not records:
+            return
+        lines = "".join(json.dumps(r, default=str) + "\n" for r in records)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def latency_percentiles(path: str, by=("path",)) -> pd.DataFrame:
+    """count / p50 / p90 / p99 / max (ms) per grup (path, name, session, ...) dari file JSON lines."""
+    df = pd.read_json(path, lines=True)
+    g = df.groupby(list(by))["ms"]
+    out = pd.DataFrame({
+        "count": g.size(),
+        "p50": g.quantile(0.50),
+        "p90": g.quantile(0.90),
+        "p99": g.quantile(0.99),
+        "max": g.max(),
+    }).round(1)
+    return out.sort_values("p90", ascending=False)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Latency percentiles from the timing log")
+    ap.add_argument("log", nargs="?", default=TIMING_LOG or "data/timings.jsonl")
+    ap.add_argument("--by", default="path", help="kolom grup, mis. path / name / session,name")
+    args = ap.parse_args()
+    with pd.option_context("display.width", 200, "display.max_rows", None, "display.max_columns", None):
+        print(latency_percentiles(args.log, by=args.by.split(",")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# user_index.py
+# Index exact distinct user_id per cell (year-month x category x channel x region).
+# Tiap cell menyimpan himpunan user_id aktif sebagai container terkompresi ala Roaring:
+# user_id dipecah per chunk hi = user_id >> CHUNK_BITS; tiap chunk menyimpan bit bawahnya sebagai
+# - "array" : uint16 terurut, untuk chunk dengan <= ARRAY_MAX id
+# - "bitmap": 2^CHUNK_BITS bit np.packbits, untuk chunk yang padat
+# Memori & waktu union mengikuti jumlah id yang tersimpan, bukan nilai user_id terbesar
+# (id negatif / di atas 2^32 juga aman).
+# Distinct count seleksi filter = union container cell terpilih, tanpa scan baris mentah.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from user_sketches import cell_codes, cell_key, select_cells
+
+# Roaring memakai chunk 16 bit; chunk 12 bit (bitmap 512 byte) membuat cell yang padat di
+# rentang id sempit tetap jadi bitmap -> index lebih kecil dan union lebih cepat.
+# Bagian dari format users_ix.npz: ubah -> naikkan data_store.SCHEMA_VERSION.
+CHUNK_BITS = 12
+CHUNK_SIZE = 1 << CHUNK_BITS
+ARRAY_MAX = CHUNK_SIZE // 16                    # array 2 byte/id vs bitmap CHUNK_SIZE/8 byte
+
+
+def _sorted_unique(x: np.ndarray) -> np.ndarray:
+    """np.unique lewat sort (jalur hash np.unique jauh lebih lambat untuk jutaan id)."""
+    x = np.sort(x)
+    return x[np.concatenate([[True], x[1:] != x[:-1]])] if len(x) else x
+
+
+def _ranges(starts: np.ndarray, lens: np.ndarray) -> np.ndarray:
+    """Gabungan arange(starts[i], starts[i] + lens[i]) tanpa loop Python."""
+    total = int(lens.sum())
+    offs = np.zeros(len(lens), dtype=np.int64)
+    np.cumsum(lens[:-1], out=offs[1:])
+    return np.repeat(starts - offs, lens) + np.arange(total)
+
+
+class UserIdIndex:
+    """
+    Layout flat (mudah disimpan ke .npz):
+    - keys : cell key terurut (encoding sama dengan user_sketches.cell_key)
+    - cptr : offset ke chunk per cell
+    - hi   : user_id >> CHUNK_BITS per chunk (naik di dalam satu cell)
+    - ptr  : offset ke `lo` per chunk (chunk bitmap -> panjang 0)
+    - lo   : CHUNK_BITS bit bawah user_id semua chunk array, disambung (uint16)
+    - row  : baris di `bits` per chunk (-1 = chunk array)
+    - bits : bitmap packed, shape (n_bitmap, CHUNK_SIZE/8)
+    """
+
+    def __init__(self, keys, cptr, hi, ptr, lo, row, bits):
+        self.keys, self.cptr, self.hi = keys, cptr, hi
+        self.ptr, self.lo = ptr, lo
+        self.row, self.bits = row, bits
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in (self.keys, self.cptr, self.hi, self.ptr,
+                                          self.lo, self.row, self.bits)))
+
+    @classmethod
+    def from_pairs(cls, cell: np.ndarray, uid: np.ndarray) -> "UserIdIndex":
+        """Build dari pasangan (cell key, user_id); duplikat diabaikan."""
+        order = np.lexsort([uid, cell])
+        cell, uid = cell.astype(np.int64)[order], uid.astype(np.int64)[order]
+        dup = np.zeros(len(uid), dtype=bool)
+        dup[1:] = (cell[1:] == cell[:-1]) & (uid[1:] == uid[:-1])
+        cell, uid = cell[~dup], uid[~dup]
+        hi, lo = uid >> CHUNK_BITS, (uid & (CHUNK_SIZE - 1)).astype(np.uint16)
+
+        # satu chunk per (cell, hi); pasangan sudah urut (cell, user_id) -> chunk berurutan
+        new = np.ones(len(uid), dtype=bool)
+        new[1:] = (cell[1:] != cell[:-1]) | (hi[1:] != hi[:-1])
+        start = np.flatnonzero(new)
+        count = np.diff(np.append(start, len(uid)))
+        chunk_cell = cell[start]
+        first = np.ones(len(start), dtype=bool)
+        first[1:] = chunk_cell[1:] != chunk_cell[:-1]
+        keys = chunk_cell[first]
+        cptr = np.append(np.flatnonzero(first), len(start)).astype(np.int64)
+
+        dense = count > ARRAY_MAX
+        row = np.full(len(start), -1, dtype=np.int32)
+        row[dense] = np.arange(int(dense.sum()), dtype=np.int32)
+        in_dense = np.repeat(dense, count)
+        mask = np.zeros((int(dense.sum()), CHUNK_SIZE), dtype=bool)
+        mask.ravel()[np.repeat(row[dense].astype(np.int64), count[dense]) * CHUNK_SIZE
+                     + lo[in_dense]] = True
+        bits = np.packbits(mask, axis=1)
+
+        ptr = np.zeros(len(start) + 1, dtype=np.int64)
+        ptr[1:] = np.cumsum(np.where(dense, 0, count))
+        return cls(keys, cptr, hi[start], ptr, lo[~in_dense], row, bits)
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, categories: dict) -> "UserIdIndex":
+        cell = cell_key(cell_codes(frame, categories))
+        return cls.from_pairs(cell, frame["user_id"].to_numpy(np.int64))
+
+    def _chunks(self, cells: np.ndarray) -> np.ndarray:
+        """Index chunk milik `cells` (urut cell lalu hi)."""
+        return _ranges(self.cptr[cells], self.cptr[cells + 1] - self.cptr[cells])
+
+    def _low_bits(self, chunks: np.ndarray) -> np.ndarray:
+        """Bit bawah semua id chunk array `chunks`, disambung."""
+        if not len(chunks):
+            return np.array([], np.uint16)
+        lo, hi = self.ptr[chunks], self.ptr[chunks + 1]
+        if int((hi - lo).sum()) > 64 * len(chunks):      # chunk panjang: salin per slice
+            return np.concatenate([self.lo[a:b] for a, b in zip(lo.tolist(), hi.tolist())])
+        return self.lo[_ranges(lo, hi - lo)]
+
+    def pairs(self, mask: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Decode kembali ke pasangan (cell key, user_id) untuk cell di `mask`."""
+        cells = np.flatnonzero(mask) if mask is not None else np.arange(len(self.keys))
+        chunk_cell = np.repeat(cells, self.cptr[cells + 1] - self.cptr[cells])
+        out_cell, out_uid = [], []
+        for c, j in zip(chunk_cell, self._chunks(cells)):
+            if self.row[j] >= 0:
+                low = np.flatnonzero(np.unpackbits(self.bits[self.row[j]], count=CHUNK_SIZE))
+            else:
+                low = self.lo[self.ptr[j]:self.ptr[j + 1]].astype(np.int64)
+            out_cell.append(np.full(len(low), self.keys[c], dtype=np.int64))
+            out_uid.append((int(self.hi[j]) << CHUNK_BITS) + low)
+        if not out_cell:
+            return np.array([], np.int64), np.array([], np.int64)
+        return np.concatenate(out_cell), np.concatenate(out_uid)
+
+    def merge(self, other: "UserIdIndex") -> "UserIdIndex":
+        """
+        Union dengan index baris baru (ingest). Hanya cell yang juga ada di `other`
+        yang di-decode ulang; container cell lain disalin apa adanya.
+        """
+        touched = np.isin(self.keys, other.keys)
+        oc, ou = other.pairs()
+        sc, su = self.pairs(touched)
+        fresh = UserIdIndex.from_pairs(np.concatenate([sc, oc]), np.concatenate([su, ou]))
+        both = UserIdIndex.concat([self.take(np.flatnonzero(~touched)), fresh])
+        return both.take(np.argsort(both.keys, kind="stable"))
+
+    def take(self, idx: np.ndarray) -> "UserIdIndex":
+        """Index baru berisi cell `idx` (urutan mengikuti idx)."""
+        idx = np.asarray(idx, dtype=np.int64)
+        chunks = self._chunks(idx)
+        cptr = np.zeros(len(idx) + 1, dtype=np.int64)
+        cptr[1:] = np.cumsum(self.cptr[idx + 1] - self.cptr[idx])
+        lens = self.ptr[chunks + 1] - self.ptr[chunks]
+        ptr = np.zeros(len(chunks) + 1, dtype=np.int64)
+        ptr[1:] = np.cumsum(lens)
+        old_rows = self.row[chunks]
+        dense = old_rows >= 0
+        row = np.full(len(chunks), -1, dtype=np.int32)
+        row[dense] = np.arange(int(dense.sum()), dtype=np.int32)
+        return UserIdIndex(self.keys[idx], cptr, self.hi[chunks], ptr,
+                           self._low_bits(chunks), row, self.bits[old_rows[dense]])
+
+    @classmethod
+    def concat(cls, parts: list) -> "UserIdIndex":
+        """
+        Sambung index dengan cell yang disjoint (mis. satu per partisi year/month).
+        Key tidak diurutkan ulang.
+        """
+        if not parts:
+            return cls.from_pairs(np.array([], np.int64), np.array([], np.int64))
+        cptr, ptr, row = [np.zeros(1, np.int64)], [np.zeros(1, np.int64)], []
+        n_chunks = n_lo = n_rows = 0
+        for p in parts:
+            cptr.append(p.cptr[1:] + n_chunks)
+            ptr.append(p.ptr[1:] + n_lo)
+            row.append(np.where(p.row >= 0, p.row + n_rows, -1).astype(np.int32))
+            n_chunks, n_lo, n_rows = n_chunks + len(p.hi), n_lo + len(p.lo), n_rows + len(p.bits)
+        return cls(np.concatenate([p.keys for p in parts]), np.concatenate(cptr),
+                   np.concatenate([p.hi for p in parts]), np.concatenate(ptr),
+                   np.concatenate([p.lo for p in parts]), np.concatenate(row),
+                   np.concatenate([p.bits for p in parts]))
+
+    def union(self, mask: np.ndarray) -> np.ndarray:
+        """user_id terurut (tanpa duplikat) hasil union cell di `mask`."""
+        chunks = self._chunks(np.flatnonzero(mask))
+        size = np.where(self.row[chunks] >= 0, CHUNK_SIZE, self.ptr[chunks + 1] - self.ptr[chunks])
+        # hi dengan bitmap / > ARRAY_MAX id -> satu bitmap CHUNK_SIZE per hi (biaya per chunk,
+        # bukan per nilai user_id terbesar); hi lain -> sort + unique atas id array-nya
+        order = np.argsort(self.hi[chunks])
+        hi = self.hi[chunks][order]
+        first = np.ones(len(hi), dtype=bool)
+        first[1:] = hi[1:] != hi[:-1]
+        group = np.cumsum(first) - 1
+        dense = np.bincount(group, size[order], minlength=int(first.sum())) > ARRAY_MAX
+        in_dense = np.zeros(len(chunks), dtype=bool)
+        in_dense[order] = dense[group]
+
+        sparse = chunks[~in_dense]                      # urutan simpan -> baca `lo` berurutan
+        lens = self.ptr[sparse + 1] - self.ptr[sparse]
+        out = [_sorted_unique((np.repeat(self.hi[sparse], lens) << CHUNK_BITS)
+                              + self._low_bits(sparse).astype(np.int64))]
+        if dense.any():
+            pick = dense[group]
+            dc, slot = chunks[order[pick]], (np.cumsum(dense) - 1)[group[pick]]
+            resort = np.lexsort((dc, slot))             # urut hi, lalu urutan simpan
+            dc, slot = dc[resort], slot[resort]
+            seen = np.zeros((int(dense.sum()), CHUNK_SIZE), dtype=bool)
+            rows = self.row[dc]
+            b = rows >= 0
+            if b.any():
+                starts = np.flatnonzero(np.diff(slot[b], prepend=-1))
+                words = self.bits[rows[b]].view(np.uint64)     # OR per 64 bit, bukan per byte
+                packed = np.bitwise_or.reduceat(words, starts, axis=0).view(np.uint8)
+                seen[slot[b][starts]] = np.unpackbits(packed, axis=1).astype(bool)
+            # id array satu hi bersebelahan -> scatter uint16 langsung ke baris `seen`-nya
+            a, a_slot = dc[~b], slot[~b]
+            if len(a):
+                ends = np.cumsum(self.ptr[a + 1] - self.ptr[a])
+                cut = np.flatnonzero(np.diff(a_slot)) + 1
+                for k, low in zip(a_slot[np.concatenate([[0], cut])].tolist(),
+                                  np.split(self._low_bits(a), ends[cut - 1])):
+                    seen[k, low] = True
+            flat = np.flatnonzero(seen)
+            out.append((hi[first][dense][flat // CHUNK_SIZE] << CHUNK_BITS) + flat % CHUNK_SIZE)
+        return np.sort(np.concatenate(out))
+
+    def count(self, categories: dict, cats, chs, regs, year=None, month=None) -> int:
+        """Exact distinct users untuk seleksi filter."""
+        mask = select_cells(self.keys, categories, cats, chs, regs, year, month)
+        if not mask.any():
+            return 0
+        return len(self.union(mask))
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, keys=self.keys, cptr=self.cptr, hi=self.hi, ptr=self.ptr, lo=self.lo,
+                 row=self.row, bits=self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "UserIdIndex":
+        with np.load(path) as z:
+            return cls(z["keys"], z["cptr"], z["hi"], z["ptr"], z["lo"], z["row"], z["bits"])
@@ -0,0 +1,182 @@
+# user_sketches.py
+# HyperLogLog sketch distinct user_id per cell (year-month x category x channel x region).
+# Sketch bisa di-merge (max register) untuk seleksi filter apa pun, jadi "Total Users" /
+# "Active Users" tidak perlu scan baris mentah. Error standar ~1.04/sqrt(2^p).
+
+import math
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+HLL_P = 11                                      # 2048 register/cell -> ±2.3% (1 sigma)
+CELL_DIMS = ["category", "channel", "region"]
+# cell key = ym (year*100+month) | category | channel | region sebagai bit field int64;
+# tiap dimensi CELL_BITS bit -> maksimal MAX_CELL_LABELS label, lebih dari itu error (bukan tabrakan)
+CELL_BITS = 14
+MAX_CELL_LABELS = 1 << CELL_BITS
+
+
+@dataclass(frozen=True)
+class DistinctEstimate:
+    value: int
+    rel_error: float                            # standard error relatif (1 sigma)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Vectorized splitmix64 finalizer (hash 64-bit yang tersebar rata)."""
+    z = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _register_updates(user_id: np.ndarray, p: int) -> tuple[np.ndarray, np.ndarray]:
+    """(register index, rank) per user_id: p bit atas = index, rank = posisi bit 1 pertama + 1."""
+    h = _splitmix64(user_id)
+    idx = (h >> np.uint64(64 - p)).astype(np.int64)
+    rest = ((h << np.uint64(p)) >> np.uint64(32)).astype(np.float64)   # 32 bit berikutnya
+    bitlen = np.frexp(rest)[1]                  # exact untuk integer 32-bit; 0 -> 0
+    return idx, (33 - bitlen).astype(np.uint8)
+
+
+def as_categories(s: pd.Series, categories: list) -> pd.Series:
+    """
+    Series kategori dengan daftar kategori (dan urutan kode) persis `categories`.
+    Catatan: CategoricalDtype unordered dianggap sama walau urutannya beda, dan astype ke
+    dtype yang "sama" tidak me-recode -> pakai set_categories.
+    """
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return s.astype(pd.CategoricalDtype(categories))
+    current = s.cat.categories.tolist()
+    if current == list(categories):
+        return s
+    if current == list(categories[:len(current)]):
+        # label baru hanya di akhir (ingest): kode lama tetap berlaku -> pakai array kode yang
+        # sama (view ke mmap .arrow), bukan recode ke salinan privat seperti set_categories
+        cat = pd.Categorical.from_codes(s.array.codes, dtype=pd.CategoricalDtype(categories),
+                                        validate=False)
+        return pd.Series(cat, index=s.index, name=s.name, copy=False)
+    return s.cat.set_categories(categories)
+
+
+def cell_codes(frame: pd.DataFrame, categories: dict) -> dict:
+    """Kode integer per cell; kode mengikuti daftar kategori global dataset."""
+    out = {"ym": frame["year"].to_numpy(np.int32) * 100 + frame["month"].to_numpy(np.int32)}
+    for c in CELL_DIMS:
+        out[c] = as_categories(frame[c], categories[c]).cat.codes.to_numpy(np.int32)
+    return out
+
+
+def check_cell_labels(dim: str, n_labels: int) -> None:
+    if n_labels > MAX_CELL_LABELS:
+        raise ValueError(f"{dim}: {n_labels:,} labels exceed the cell key limit of "
+                         f"{MAX_CELL_LABELS:,} (CELL_BITS={CELL_BITS})")
+
+
+def cell_key(codes: dict) -> np.ndarray:
+    key = codes["ym"].astype(np.int64)
+    for c in CELL_DIMS:
+        code = np.asarray(codes[c], dtype=np.int64)
+        if len(code) and (code.min() < 0 or code.max() >= MAX_CELL_LABELS):
+            raise ValueError(f"{c}: code {int(code.min() if code.min() < 0 else code.max())} "
+                             f"outside the cell key range 0..{MAX_CELL_LABELS - 1}")
+        key = (key << CELL_BITS) | code
+    return key
+
+
+def cell_parts(keys: np.ndarray) -> dict:
+    """Kebalikan cell_key: {"ym", "category", "channel", "region"} -> array kode."""
+    keys = np.asarray(keys, dtype=np.int64)
+    mask = MAX_CELL_LABELS - 1
+    out = {}
+    for i, c in enumerate(reversed(CELL_DIMS)):
+        out[c] = (keys >> (i * CELL_BITS)) & mask
+    out["ym"] = keys >> (len(CELL_DIMS) * CELL_BITS)
+    return out
+
+
+def select_cells(keys: np.ndarray, categories: dict, cats, chs, regs,
+                 year=None, month=None) -> np.ndarray:
+    """Mask cell key yang masuk filter (aturan sama dengan cube.filter_frame)."""
+    parts = cell_parts(keys)
+    ym, c, ch, r = parts["ym"], parts["category"], parts["channel"], parts["region"]
+    lut = {d: [categories[d].index(v) for v in vals if v in categories[d]]
+           for d, vals in (("category", cats), ("channel", chs), ("region", regs))}
+    mask = np.isin(c, lut["category"]) & np.isin(ch, lut["channel"]) & np.isin(r, lut["region"])
+    if year is not None:
+        mask &= ym // 100 == int(year)
+    if month is not None:
+        mask &= ym % 100 == int(month)
+    return mask
+
+
+class HLLSketches:
+    """Satu sketch HLL per cell; `keys` (int64 terurut) menyandikan (ym, category, channel, region)."""
+
+    def __init__(self, keys: np.ndarray, registers: np.ndarray, p: int = HLL_P):
+        self.keys = keys
+        self.registers = registers              # shape (n_cells, 2^p), uint8
+        self.p = p
+
+    @property
+    def m(self) -> int:
+        return 1 << self.p
+
+    @property
+    def rel_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.keys.nbytes + self.registers.nbytes)
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, categories: dict, p: int = HLL_P) -> "HLLSketches":
+        cell = cell_key(cell_codes(frame, categories))
+        keys, inv = np.unique(cell, return_inverse=True)
+        idx, rank = _register_updates(frame["user_id"].to_numpy(np.int64), p)
+        flat = np.zeros(len(keys) << p, dtype=np.uint8)
+        np.maximum.at(flat, (inv.astype(np.int64) << p) + idx, rank)
+        return cls(keys, flat.reshape(len(keys), 1 << p), p)
+
+    @classmethod
+    def concat(cls, parts: list) -> "HLLSketches":
+        """Sambung sketch dengan cell yang disjoint (mis. satu per partisi year/month)."""
+        keys = np.concatenate([s.keys for s in parts])
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], np.concatenate([s.registers for s in parts])[order], parts[0].p)
+
+    def merge(self, other: "HLLSketches") -> "HLLSketches":
+        """Union dua kumpulan sketch (mis. histori + file harian baru)."""
+        keys = np.union1d(self.keys, other.keys)
+        regs = np.zeros((len(keys), self.m), dtype=np.uint8)
+        regs[np.searchsorted(keys, self.keys)] = self.registers
+        pos = np.searchsorted(keys, other.keys)
+        regs[pos] = np.maximum(regs[pos], other.registers)
+        return HLLSketches(keys, regs, self.p)
+
+    def estimate(self, categories: dict, cats, chs, regs, year=None, month=None) -> DistinctEstimate:
+        """Approx distinct users untuk seleksi filter (merge = max register)."""
+        mask = select_cells(self.keys, categories, cats, chs, regs, year, month)
+        if not mask.any():
+            return DistinctEstimate(0, self.rel_error)
+        merged = self.registers[mask].max(axis=0)
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.ldexp(1.0, -merged.astype(np.int64)))
+        zeros = int(np.count_nonzero(merged == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * math.log(m / zeros)       # linear counting untuk kardinalitas kecil
+        return DistinctEstimate(int(round(est)), self.rel_error)
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, keys=self.keys, registers=self.registers, p=np.array(self.p))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "HLLSketches":
+        with np.load(path) as z:
+            return cls(z["keys"], z["registers"], int(z["p"]))
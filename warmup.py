@@ -0,0 +1,161 @@
+# warmup.py
+# Cache warmer: hitung view default tiap tab (Weekly = tahun+bulan terakhir, Monthly/Quarterly =
+# tahun terakhir, Yearly = semua data) sebelum pengunjung pertama datang, paralel di process pool.
+# Worker membuka dataset yang sama dari disk (meta snapshot proses induk), menghitung bundle
+# DashAggregates (+ tabel per-user untuk view default) lalu hasilnya dimasukkan induk ke
+# cache AnalyticsService. Mode "all" menambah setiap kombinasi tahun (dan bulan untuk Weekly).
+# Usage (optional): python warmup.py [--mode all] [--workers 4]
+
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from agg_cache import estimate_bytes
+from analytics import TIME_FILTERS, AnalyticsService
+from data_store import CSV_PATH, PartitionedDataset, open_dataset
+
+WARMUP_MODE    = os.environ.get("TXN_WARMUP", "default")         # off | default | all
+WARMUP_WORKERS = int(os.environ.get("TXN_WARMUP_WORKERS", "0"))  # 0 = jumlah CPU
+
+
+@dataclass(frozen=True)
+class WarmupReport:
+    views: int
+    entries: int
+    bytes: int
+    workers: int
+    seconds: float
+
+    def __str__(self) -> str:
+        return (f"{self.views} views -> {self.entries} cache entries ({self.bytes / 1e6:,.1f} MB) "
+                f"in {self.seconds:,.1f} s, {self.workers} worker{'s' if self.workers > 1 else ''}")
+
+
+def warmup_views(svc: AnalyticsService, mode: str = "default") -> list[tuple[str, dict, bool]]:
+    """(period, selection, with_users). Tabel per-user hanya untuk view default (besar)."""
+    views = [(p, svc.default_selection(p), True) for p in TIME_FILTERS]
+    if mode != "all":
+        return views
+    opts = svc.options()
+    for period, cols in TIME_FILTERS.items():
+        base = svc.default_selection(period)
+        for year in opts["years"]:
+            months = opts["months"][year] if "month" in cols else [None]
+            for month in months:
+                sel = dict(base, year=year) if cols else base
+                if month is not None:
+                    sel["month"] = month
+                if all(sel != s for p, s, _ in views if p == period):
+                    views.append((period, sel, False))
+    return views
+
+
+# ---- process pool ----
+_worker_svc: AnalyticsService | None = None
+
+
+def _init_worker(root: str, meta: dict, meta_path: str | None) -> None:
+    global _worker_svc
+    _worker_svc = AnalyticsService(PartitionedDataset(root, meta, meta_path))
+
+
+def _compute_view(period: str, sel: dict, exact_users: bool, with_users: bool):
+    agg = _worker_svc.dashboard(period, sel, exact_users)
+    return agg, (_worker_svc.users(sel) if with_users else None)
+
+
+def warm_cache(svc: AnalyticsService, mode: str = "default", workers: int = 0,
+               exact_users: bool = True) -> WarmupReport:
+    """Isi cache `svc` untuk view default (atau semua, mode="all"); view yang sudah ada dilewati."""
+    t0 = time.perf_counter()
+    version = svc.data.version
+    todo = [(p, s, u) for p, s, u in warmup_views(svc, mode)
+            if svc.dashboard_key(p, s, exact_users, version) not in svc.cache
+            or (u and svc.users_key(s, version) not in svc.cache)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    entries = nbytes = 0
+
+    def store(period, sel, agg, per_user):
+        nonlocal entries, nbytes
+        # key memakai versi saat warm-up dimulai: kalau ada ingest di tengah jalan,
+        # entry ini tidak akan terpakai (sama seperti cache biasa)
+        svc.cache.put(svc.dashboard_key(period, sel, exact_users, version), agg)
+        entries, nbytes = entries + 1, nbytes + estimate_bytes(agg)
+        if per_user is not None:
+            svc.cache.put(svc.users_key(sel, version), per_user)
+            entries, nbytes = entries + 1, nbytes + estimate_bytes(per_user)
+
+    if workers == 1:
+        for period, sel, with_users in todo:
+            store(period, sel, svc.dashboard(period, sel, exact_users),
+                  svc.users(sel) if with_users else None)
+    else:
+        data = svc.data
+        # spawn: aman dipanggil dari proses server yang sudah punya banyak thread
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(data.root, data.meta, data.meta_path)) as pool:
+            futures = {pool.submit(_compute_view, p, s, exact_users, u): (p, s) for p, s, u in todo}
+            for fut in as_completed(futures):
+                store(*futures[fut], *fut.result())
+    return WarmupReport(len(todo), entries, nbytes, workers, time.perf_counter() - t0)
+
+
+class CacheWarmer:
+    """Warm-up di thread background (server tetap melayani request selama warm-up)."""
+
+    def __init__(self, svc: AnalyticsService, mode: str = WARMUP_MODE,
+                 workers: int = WARMUP_WORKERS, exact_users: bool = True, keep: int = 5):
+        self.svc = svc
+        self.mode = mode
+        self.workers = workers
+        self.exact_users = exact_users
+        self.keep = keep
+        self.history: list[WarmupReport] = []
+        self.error: str = ""
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def start(self) -> bool:
+        """Mulai warm-up (mis. saat start atau setelah ingest); False kalau sedang berjalan / mati."""
+        if self.mode == "off" or not self._lock.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._run, name="cache-warmup", daemon=True).start()
+        return True
+
+    def _run(self) -> None:
+        try:
+            rep = warm_cache(self.svc, self.mode, self.workers, self.exact_users)
+            self.history = (self.history + [rep])[-self.keep:]
+            self.error = ""
+        except Exception as e:                  # warm-up gagal tidak boleh menjatuhkan app
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self._lock.release()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Precompute default dashboard views")
+    ap.add_argument("--source", default=CSV_PATH)
+    ap.add_argument("--mode", choices=["default", "all"],
+                    default=WARMUP_MODE if WARMUP_MODE != "off" else "default")
+    ap.add_argument("--workers", type=int, default=WARMUP_WORKERS)
+    ap.add_argument("--approx-users", action="store_true")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    svc = AnalyticsService(open_dataset(args.source))
+    svc.data.cube, svc.data.user_index            # yang dibutuhkan render pertama
+    print(f"load_data: {time.perf_counter() - t0:,.2f} s")
+    print(f"warm-up: {warm_cache(svc, args.mode, args.workers, not args.approx_users)}")
+
+
+if __name__ == "__main__":
+    main()